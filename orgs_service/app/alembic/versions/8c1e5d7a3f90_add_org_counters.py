@@ -0,0 +1,60 @@
+"""add members_count and teams_count to organizations
+
+Revision ID: 8c1e5d7a3f90
+Revises: 6b760689d2bd
+Create Date: 2026-10-17 22:54:19.042871
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8c1e5d7a3f90"
+down_revision: Union[str, None] = "6b760689d2bd"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "organizations",
+        sa.Column(
+            "members_count", sa.Integer(), server_default=sa.text("0"), nullable=False
+        ),
+    )
+    op.add_column(
+        "organizations",
+        sa.Column(
+            "teams_count", sa.Integer(), server_default=sa.text("0"), nullable=False
+        ),
+    )
+    op.add_column(
+        "organizations",
+        sa.Column("counts_updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_organizations_members_count_id",
+        "organizations",
+        ["members_count", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_organizations_region_members_count_id",
+        "organizations",
+        ["region", "members_count", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_organizations_region_members_count_id", table_name="organizations")
+    op.drop_index("ix_organizations_members_count_id", table_name="organizations")
+    op.drop_column("organizations", "counts_updated_at")
+    op.drop_column("organizations", "teams_count")
+    op.drop_column("organizations", "members_count")
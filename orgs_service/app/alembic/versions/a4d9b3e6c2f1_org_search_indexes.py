@@ -0,0 +1,79 @@
+"""organization search indexes
+
+Revision ID: a4d9b3e6c2f1
+Revises: 8c1e5d7a3f90
+Create Date: 2026-10-17 23:31:45.275130
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a4d9b3e6c2f1"
+down_revision: Union[str, None] = "8c1e5d7a3f90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.add_column(
+        "organizations",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "to_tsvector('russian', coalesce(full_name, '') || ' ' || coalesce(short_name, ''))",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+
+    op.create_index(
+        "ix_organizations_full_name_trgm",
+        "organizations",
+        ["full_name"],
+        postgresql_using="gin",
+        postgresql_ops={"full_name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_organizations_short_name_trgm",
+        "organizations",
+        ["short_name"],
+        postgresql_using="gin",
+        postgresql_ops={"short_name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_organizations_search_vector",
+        "organizations",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_organizations_full_name_normalized",
+        "organizations",
+        [sa.text("lower(trim(full_name))")],
+    )
+    # Поиск по префиксу ИНН: CAST(inn AS text) LIKE '123%'
+    op.execute(
+        "CREATE INDEX ix_organizations_inn_text ON organizations "
+        "((CAST(inn AS text)) text_pattern_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_organizations_inn_text", table_name="organizations")
+    op.drop_index("ix_organizations_full_name_normalized", table_name="organizations")
+    op.drop_index("ix_organizations_search_vector", table_name="organizations")
+    op.drop_index("ix_organizations_short_name_trgm", table_name="organizations")
+    op.drop_index("ix_organizations_full_name_trgm", table_name="organizations")
+    op.drop_column("organizations", "search_vector")
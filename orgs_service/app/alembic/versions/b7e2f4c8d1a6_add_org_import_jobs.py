@@ -0,0 +1,54 @@
+"""add org_import_jobs
+
+Revision ID: b7e2f4c8d1a6
+Revises: a4d9b3e6c2f1
+Create Date: 2026-10-18 00:12:08.661374
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e2f4c8d1a6"
+down_revision: Union[str, None] = "a4d9b3e6c2f1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "org_import_jobs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("excel_path", sa.String(), nullable=False),
+        sa.Column("sheet_name", sa.String(), server_default="0", nullable=False),
+        sa.Column("chunk_size", sa.Integer(), server_default="2000", nullable=False),
+        sa.Column("status", sa.String(), server_default="pending", nullable=False),
+        sa.Column("rows_processed", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("inserted", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("updated", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("skipped", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("org_import_jobs")
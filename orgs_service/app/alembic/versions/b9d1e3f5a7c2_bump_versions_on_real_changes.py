@@ -0,0 +1,139 @@
+"""bump catalog version and updated_at only when organization rows change
+
+Revision ID: b9d1e3f5a7c2
+Revises: f3c7a9d2b4e8
+Create Date: 2026-10-19 14:08:51.662013
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b9d1e3f5a7c2"
+down_revision: Union[str, None] = "f3c7a9d2b4e8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Служебные колонки: их изменение не меняет ответ API
+IGNORED_COLUMNS = (
+    "updated_at",
+    "counts_updated_at",
+    "members_count_at",
+    "teams_count_at",
+    "search_vector",
+)
+
+SET_UPDATED_AT_SQL = """
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+BEGIN
+    IF to_jsonb(NEW) - TG_ARGV IS DISTINCT FROM to_jsonb(OLD) - TG_ARGV THEN
+        NEW.updated_at = now();
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# TG_ARGV[0] — имя каталога, остальные — игнорируемые колонки
+BUMP_IF_CHANGED_SQL = """
+CREATE FUNCTION bump_catalog_version_if_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM 1 FROM new_rows LIMIT 1;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM 1 FROM old_rows LIMIT 1;
+    ELSE
+        PERFORM 1
+        FROM new_rows n JOIN old_rows o ON o.id = n.id
+        WHERE to_jsonb(n) - TG_ARGV[1:] IS DISTINCT FROM to_jsonb(o) - TG_ARGV[1:]
+        LIMIT 1;
+    END IF;
+
+    IF FOUND THEN
+        INSERT INTO catalog_versions (name, version) VALUES (TG_ARGV[0], 1)
+        ON CONFLICT (name) DO UPDATE SET version = catalog_versions.version + 1;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+TRANSITIONS = {
+    "insert": "INSERT ON organizations REFERENCING NEW TABLE AS new_rows",
+    "update": "UPDATE ON organizations REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "delete": "DELETE ON organizations REFERENCING OLD TABLE AS old_rows",
+}
+
+
+def _args(*args: str) -> str:
+    return ", ".join(f"'{arg}'" for arg in args)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(SET_UPDATED_AT_SQL)
+    op.execute("DROP TRIGGER organizations_set_updated_at ON organizations")
+    op.execute(
+        f"""
+        CREATE TRIGGER organizations_set_updated_at
+        BEFORE UPDATE ON organizations
+        FOR EACH ROW EXECUTE FUNCTION set_updated_at({_args(*IGNORED_COLUMNS)})
+        """
+    )
+
+    # Пустые и ничего не меняющие UPDATE больше не сдвигают версию каталога
+    op.execute("DROP TRIGGER organizations_catalog_version ON organizations")
+    op.execute(BUMP_IF_CHANGED_SQL)
+    for event, transition in TRANSITIONS.items():
+        op.execute(
+            f"""
+            CREATE TRIGGER organizations_catalog_version_{event}
+            AFTER {transition}
+            FOR EACH STATEMENT EXECUTE FUNCTION
+                bump_catalog_version_if_changed({_args("organizations", *IGNORED_COLUMNS)})
+            """
+        )
+    op.execute(
+        """
+        CREATE TRIGGER organizations_catalog_version_truncate
+        AFTER TRUNCATE ON organizations
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('organizations')
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for event in (*TRANSITIONS, "truncate"):
+        op.execute(f"DROP TRIGGER organizations_catalog_version_{event} ON organizations")
+    op.execute("DROP FUNCTION bump_catalog_version_if_changed()")
+    op.execute(
+        """
+        CREATE TRIGGER organizations_catalog_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON organizations
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('organizations')
+        """
+    )
+
+    op.execute("DROP TRIGGER organizations_set_updated_at ON organizations")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at = now();
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER organizations_set_updated_at
+        BEFORE UPDATE ON organizations
+        FOR EACH ROW EXECUTE FUNCTION set_updated_at()
+        """
+    )
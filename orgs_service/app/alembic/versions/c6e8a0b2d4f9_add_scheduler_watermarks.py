@@ -0,0 +1,34 @@
+"""add scheduler_watermarks
+
+Revision ID: c6e8a0b2d4f9
+Revises: b9d1e3f5a7c2
+Create Date: 2026-10-19 16:31:40.517293
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c6e8a0b2d4f9"
+down_revision: Union[str, None] = "b9d1e3f5a7c2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "scheduler_watermarks",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("watermark", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("scheduler_watermarks")
@@ -0,0 +1,41 @@
+"""add dadata_cache
+
+Revision ID: c9f3a1e7b5d2
+Revises: b7e2f4c8d1a6
+Create Date: 2026-10-18 00:47:52.903316
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c9f3a1e7b5d2"
+down_revision: Union[str, None] = "b7e2f4c8d1a6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "dadata_cache",
+        sa.Column("inn", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column(
+            "fetched_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("inn"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("dadata_cache")
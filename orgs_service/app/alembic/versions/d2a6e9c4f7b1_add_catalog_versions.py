@@ -0,0 +1,87 @@
+"""add catalog_versions and organizations.updated_at
+
+Revision ID: d2a6e9c4f7b1
+Revises: c9f3a1e7b5d2
+Create Date: 2026-10-18 02:14:09.518774
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d2a6e9c4f7b1"
+down_revision: Union[str, None] = "c9f3a1e7b5d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "catalog_versions",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("version", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.execute("INSERT INTO catalog_versions (name, version) VALUES ('organizations', 1)")
+
+    op.add_column(
+        "organizations",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+
+    # Триггеры покрывают и ORM, и сырой SQL (COPY-импорт, пакетные UPDATE счётчиков)
+    op.execute(
+        """
+        CREATE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO catalog_versions (name, version) VALUES (TG_ARGV[0], 1)
+            ON CONFLICT (name) DO UPDATE SET version = catalog_versions.version + 1;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER organizations_catalog_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON organizations
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('organizations')
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION set_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at = now();
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER organizations_set_updated_at
+        BEFORE UPDATE ON organizations
+        FOR EACH ROW EXECUTE FUNCTION set_updated_at()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS organizations_set_updated_at ON organizations")
+    op.execute("DROP FUNCTION IF EXISTS set_updated_at()")
+    op.execute("DROP TRIGGER IF EXISTS organizations_catalog_version ON organizations")
+    op.execute("DROP FUNCTION IF EXISTS bump_catalog_version()")
+    op.drop_column("organizations", "updated_at")
+    op.drop_table("catalog_versions")
@@ -0,0 +1,191 @@
+"""region_stats: append-only deltas instead of row-level upserts
+
+Revision ID: d8f0b2c4e6a1
+Revises: c6e8a0b2d4f9
+Create Date: 2026-10-19 18:02:13.804516
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d8f0b2c4e6a1"
+down_revision: Union[str, None] = "c6e8a0b2d4f9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ROLLUP_SQL = """
+WITH moved AS (
+    DELETE FROM region_stats_deltas
+    RETURNING region, type, orgs_count, teams_count, members_count, star_sum
+)
+INSERT INTO region_stats (region, type, orgs_count, teams_count, members_count, star_sum)
+SELECT region, type, sum(orgs_count), sum(teams_count), sum(members_count), sum(star_sum)
+FROM moved
+GROUP BY region, type
+ORDER BY region, type
+ON CONFLICT (region, type) DO UPDATE SET
+    orgs_count = region_stats.orgs_count + EXCLUDED.orgs_count,
+    teams_count = region_stats.teams_count + EXCLUDED.teams_count,
+    members_count = region_stats.members_count + EXCLUDED.members_count,
+    star_sum = region_stats.star_sum + EXCLUDED.star_sum,
+    updated_at = now()
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "region_stats_deltas",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("region", sa.String(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("orgs_count", sa.Integer(), nullable=False),
+        sa.Column("teams_count", sa.BigInteger(), nullable=False),
+        sa.Column("members_count", sa.BigInteger(), nullable=False),
+        sa.Column("star_sum", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.execute("DROP TRIGGER IF EXISTS organizations_region_stats_upd ON organizations")
+    op.execute("DROP TRIGGER IF EXISTS organizations_region_stats_ins_del ON organizations")
+    op.execute("DROP FUNCTION IF EXISTS organizations_region_stats()")
+
+    # Строковый триггер обновлял строку (region, type) в region_stats: все писатели
+    # одного региона вставали в очередь за её блокировкой, а UPDATE из нескольких
+    # регионов в разном порядке взаимно блокировались. Теперь оператор только
+    # добавляет свои дельты, по одной строке на (region, type).
+    op.execute(
+        """
+        CREATE FUNCTION organizations_region_stats_deltas() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO region_stats_deltas
+                    (region, type, orgs_count, teams_count, members_count, star_sum)
+                SELECT region, type::text, count(*), sum(teams_count),
+                       sum(members_count), sum(star)
+                FROM new_rows
+                GROUP BY region, type;
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO region_stats_deltas
+                    (region, type, orgs_count, teams_count, members_count, star_sum)
+                SELECT region, type::text, -count(*), -sum(teams_count),
+                       -sum(members_count), -sum(star)
+                FROM old_rows
+                GROUP BY region, type;
+            ELSE
+                INSERT INTO region_stats_deltas
+                    (region, type, orgs_count, teams_count, members_count, star_sum)
+                SELECT region, type, sum(orgs_count), sum(teams_count),
+                       sum(members_count), sum(star_sum)
+                FROM (
+                    SELECT region, type::text AS type, 1 AS orgs_count, teams_count,
+                           members_count, star AS star_sum
+                    FROM new_rows
+                    UNION ALL
+                    SELECT region, type::text, -1, -teams_count, -members_count, -star
+                    FROM old_rows
+                ) AS changes
+                GROUP BY region, type
+                HAVING sum(orgs_count) <> 0 OR sum(teams_count) <> 0
+                    OR sum(members_count) <> 0 OR sum(star_sum) <> 0;
+            END IF;
+
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER organizations_region_stats_ins
+        AFTER INSERT ON organizations
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION organizations_region_stats_deltas()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER organizations_region_stats_upd
+        AFTER UPDATE ON organizations
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION organizations_region_stats_deltas()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER organizations_region_stats_del
+        AFTER DELETE ON organizations
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION organizations_region_stats_deltas()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS organizations_region_stats_del ON organizations")
+    op.execute("DROP TRIGGER IF EXISTS organizations_region_stats_upd ON organizations")
+    op.execute("DROP TRIGGER IF EXISTS organizations_region_stats_ins ON organizations")
+    op.execute("DROP FUNCTION IF EXISTS organizations_region_stats_deltas()")
+
+    op.execute(ROLLUP_SQL)
+    op.drop_table("region_stats_deltas")
+
+    op.execute(
+        """
+        CREATE FUNCTION organizations_region_stats() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE region_stats
+                SET orgs_count = orgs_count - 1,
+                    teams_count = teams_count - OLD.teams_count,
+                    members_count = members_count - OLD.members_count,
+                    star_sum = star_sum - OLD.star,
+                    updated_at = now()
+                WHERE region = OLD.region AND type = OLD.type::text;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO region_stats
+                    (region, type, orgs_count, teams_count, members_count, star_sum)
+                VALUES
+                    (NEW.region, NEW.type::text, 1, NEW.teams_count, NEW.members_count, NEW.star)
+                ON CONFLICT (region, type) DO UPDATE SET
+                    orgs_count = region_stats.orgs_count + 1,
+                    teams_count = region_stats.teams_count + EXCLUDED.teams_count,
+                    members_count = region_stats.members_count + EXCLUDED.members_count,
+                    star_sum = region_stats.star_sum + EXCLUDED.star_sum,
+                    updated_at = now();
+            END IF;
+
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER organizations_region_stats_ins_del
+        AFTER INSERT OR DELETE ON organizations
+        FOR EACH ROW EXECUTE FUNCTION organizations_region_stats()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER organizations_region_stats_upd
+        AFTER UPDATE OF region, type, teams_count, members_count, star ON organizations
+        FOR EACH ROW
+        WHEN (
+            (OLD.region, OLD.type, OLD.teams_count, OLD.members_count, OLD.star)
+            IS DISTINCT FROM
+            (NEW.region, NEW.type, NEW.teams_count, NEW.members_count, NEW.star)
+        )
+        EXECUTE FUNCTION organizations_region_stats()
+        """
+    )
@@ -0,0 +1,111 @@
+"""add region_stats rollup
+
+Revision ID: e8b4c2f6a1d3
+Revises: d2a6e9c4f7b1
+Create Date: 2026-10-18 03:05:41.227390
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e8b4c2f6a1d3"
+down_revision: Union[str, None] = "d2a6e9c4f7b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+REBUILD_SQL = """
+INSERT INTO region_stats (region, type, orgs_count, teams_count, members_count, star_sum)
+SELECT region, type::text, count(*), sum(teams_count), sum(members_count), sum(star)
+FROM organizations
+GROUP BY region, type
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "region_stats",
+        sa.Column("region", sa.String(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("orgs_count", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("teams_count", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("members_count", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("star_sum", sa.Float(), server_default=sa.text("0"), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("region", "type"),
+    )
+
+    # Дельты по строке: вычитаем старое значение, прибавляем новое
+    op.execute(
+        """
+        CREATE FUNCTION organizations_region_stats() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE region_stats
+                SET orgs_count = orgs_count - 1,
+                    teams_count = teams_count - OLD.teams_count,
+                    members_count = members_count - OLD.members_count,
+                    star_sum = star_sum - OLD.star,
+                    updated_at = now()
+                WHERE region = OLD.region AND type = OLD.type::text;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO region_stats
+                    (region, type, orgs_count, teams_count, members_count, star_sum)
+                VALUES
+                    (NEW.region, NEW.type::text, 1, NEW.teams_count, NEW.members_count, NEW.star)
+                ON CONFLICT (region, type) DO UPDATE SET
+                    orgs_count = region_stats.orgs_count + 1,
+                    teams_count = region_stats.teams_count + EXCLUDED.teams_count,
+                    members_count = region_stats.members_count + EXCLUDED.members_count,
+                    star_sum = region_stats.star_sum + EXCLUDED.star_sum,
+                    updated_at = now();
+            END IF;
+
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER organizations_region_stats_ins_del
+        AFTER INSERT OR DELETE ON organizations
+        FOR EACH ROW EXECUTE FUNCTION organizations_region_stats()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER organizations_region_stats_upd
+        AFTER UPDATE OF region, type, teams_count, members_count, star ON organizations
+        FOR EACH ROW
+        WHEN (
+            (OLD.region, OLD.type, OLD.teams_count, OLD.members_count, OLD.star)
+            IS DISTINCT FROM
+            (NEW.region, NEW.type, NEW.teams_count, NEW.members_count, NEW.star)
+        )
+        EXECUTE FUNCTION organizations_region_stats()
+        """
+    )
+
+    op.execute(REBUILD_SQL)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS organizations_region_stats_upd ON organizations")
+    op.execute("DROP TRIGGER IF EXISTS organizations_region_stats_ins_del ON organizations")
+    op.execute("DROP FUNCTION IF EXISTS organizations_region_stats()")
+    op.drop_table("region_stats")
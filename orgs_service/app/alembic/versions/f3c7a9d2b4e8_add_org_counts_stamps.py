@@ -0,0 +1,37 @@
+"""add per-counter snapshot timestamps to organizations
+
+Revision ID: f3c7a9d2b4e8
+Revises: e8b4c2f6a1d3
+Create Date: 2026-10-19 11:42:07.318564
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3c7a9d2b4e8"
+down_revision: Union[str, None] = "e8b4c2f6a1d3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "organizations",
+        sa.Column("members_count_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "organizations",
+        sa.Column("teams_count_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("organizations", "teams_count_at")
+    op.drop_column("organizations", "members_count_at")
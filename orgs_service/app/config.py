@@ -8,10 +8,32 @@ class Settings(BaseSettings):
     DB_PASS: str
     DB_NAME: str
 
+    SECRET_KEY: str
+    ALGORITHM: str
+
     USERS_SERVICE_URL: str = "https://api.rosdk.ru/users"
     TEAMS_SERVICE_URL: str = "https://api.rosdk.ru/teams"
+    PROJECTS_SERVICE_URL: str = "https://api.rosdk.ru/projects"
     DADATA_TOKEN: str
     DADATA_SECRET: str
+    DADATA_STUB: bool = False
+    DADATA_CACHE_TTL_DAYS: int = 30
+    DADATA_BULK_CONCURRENCY: int = 5
+
+    RABBITMQ_URL: str = ""
+
+    ORG_COUNTS_TIMEOUT: float = 1.0
+    ORG_COUNTS_RECONCILE_INTERVAL: float = 3600.0
+
+    REGION_STATS_ROLLUP_INTERVAL: float = 5.0
+
+    CATALOG_CACHE_MAX_AGE: int = 0
+
+    STAR_INDEX_INTERVAL: float = 300.0
+
+    ORG_DIRECTORY_MEMORY_MB: int = 64
+
+    ORG_IMPORT_EXCEL_PATH: str = "/app/app/db/result_full.xlsx"
 
     @property
     def DATABASE_URL(self):
@@ -1,23 +1,55 @@
 import logging
-import httpx
+from datetime import datetime, timezone
 from typing import Optional, Literal
-from dadata import DadataAsync
 from sqlalchemy.future import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func
+from sqlalchemy import (
+    Float,
+    Integer,
+    String,
+    cast,
+    column,
+    delete,
+    func,
+    literal,
+    or_,
+    text,
+    union_all,
+    update,
+    values,
+)
 from sqlalchemy.inspection import inspect
 from db.models.orgs import Orgs
+from db.models.catalog_version import CatalogVersion
+from db.models.region_stats import RegionStats, RegionStatsDelta
 from schemas import OrgResponse
 from fastapi import HTTPException
 from config import settings
+from services.rabbitmq import publish_orgs_updated
+from services.org_directory import org_directory
+from services.dadata_lookup import dadata_lookup, parse_party
+from services.star_index import INDEX_COLUMNS
+from services.org_counts import fetch_members_counts, fetch_teams_counts
 import asyncio
 
+# Служебные колонки не отдаются: ровно те, что триггер set_updated_at
+# не считает изменением (IGNORED_COLUMNS в b9d1e3f5a7c2), иначе ETag
+# по updated_at совпал бы при другом теле ответа
+HIDDEN_COLUMNS = (
+    "updated_at",
+    "counts_updated_at",
+    "members_count_at",
+    "teams_count_at",
+    "search_vector",
+)
+
+# Одна свёртка region_stats за раз
+REGION_STATS_LOCK_ID = 0x5E61
+
 SortBy = Literal["name", "members", "index"]
 SortOrder = Literal["asc", "desc"]
 
-dadata = DadataAsync(token=settings.DADATA_TOKEN, secret=settings.DADATA_SECRET)
-
 
 class OrgsCRUD:
     @staticmethod
@@ -50,6 +82,20 @@ class OrgsCRUD:
             raise HTTPException(status_code=404, detail="Organization not found")
         return org
 
+    @staticmethod
+    async def get_catalog_version(db: AsyncSession) -> int:
+        version = await db.scalar(
+            select(CatalogVersion.version).where(CatalogVersion.name == "organizations")
+        )
+        return version or 0
+
+    @staticmethod
+    async def get_org_version(db: AsyncSession, org_id: int):
+        updated_at = await db.scalar(select(Orgs.updated_at).where(Orgs.id == org_id))
+        if updated_at is None:
+            raise HTTPException(status_code=404, detail="Organization not found")
+        return updated_at
+
     @staticmethod
     async def get_org_by_id(db: AsyncSession, org_id: int) -> OrgResponse:
         result = await db.execute(select(Orgs).where(Orgs.id == org_id))
@@ -58,38 +104,6 @@ class OrgsCRUD:
         if not org:
             raise HTTPException(status_code=404, detail="Organization not found")
 
-        members_count = 0
-        async with httpx.AsyncClient(timeout=10) as client:
-            try:
-                r = await client.get(
-                    f"{settings.USERS_SERVICE_URL}/profile_interaction/members-count",
-                    params={"org_ids": [org.id]},
-                )
-                r.raise_for_status()
-                members_data = r.json()
-                members_count = members_data.get("count", 0)
-            except httpx.RequestError as e:
-                logging.error(f"Request error: {e}")
-                # Можно также добавить логирование для других типов ошибок
-            except Exception as e:
-                logging.error(f"Unexpected error when fetching members count: {e}")
-
-        teams_count = 0
-        async with httpx.AsyncClient(timeout=10) as client:
-            try:
-                r = await client.get(
-                    f"{settings.TEAMS_SERVICE_URL}/teams/teams-count",
-                    params={"org_ids": [org.id]},
-                )
-                r.raise_for_status()
-                teams_count = r.json()
-                teams_count = teams_count.get("count", 0)
-            except httpx.RequestError as e:
-                logging.error(f"Request error: {e}")
-                # Можно также добавить логирование для других типов ошибок
-            except Exception as e:
-                logging.error(f"Unexpected error when fetching members count: {e}")
-
         return OrgResponse(
             id=org.id,
             full_name=org.full_name,
@@ -104,55 +118,55 @@ class OrgsCRUD:
             data_protection_z=org.data_protection_z,
             data_analytics_d=org.data_analytics_d,
             automation_a=org.automation_a,
-            members_count=members_count,
-            teams_count=teams_count,
+            # Денормализованные счётчики: без обращений к user_profile и teams_service
+            members_count=org.members_count,
+            teams_count=org.teams_count,
         )
 
     @staticmethod
-    async def create_org(db: AsyncSession, inn: int, org_type: str):
-        result = await dadata.find_by_id("party", str(inn))
-
-        if isinstance(result, dict):
-            suggestions = result.get("suggestions", [])
-        elif isinstance(result, list):
-            suggestions = result
-        else:
-            suggestions = []
-
-        if not suggestions:
-            return None
-
-        suggestion = next(
-            (s for s in suggestions if s.get("data", {}).get("branch_type") == "MAIN"),
-            suggestions[0],
-        )
+    async def get_orgs_by_ids(
+        db: AsyncSession, org_ids: list[int], with_counts: bool = False
+    ) -> dict[int, dict]:
+        org_ids = list({org_id for org_id in org_ids if org_id and org_id > 0})
+        if not org_ids:
+            return {}
 
-        name_block = suggestion.get("data", {}).get("name", {})
+        res = await db.execute(select(Orgs).where(Orgs.id.in_(org_ids)))
+        orgs = res.scalars().all()
 
-        full_name = (
-            name_block.get("full_with_opf") or suggestion.get("value") or ""
-        ).strip()
+        result = {}
+        for o in orgs:
+            data = OrgsCRUD.org_to_dict(o)
+            if not with_counts:
+                for key in ("members_count", "teams_count"):
+                    data.pop(key, None)
+            result[o.id] = data
 
-        short_raw = (
-            name_block.get("short_with_opf")
-            or name_block.get("short")
-            or suggestion.get("value")
-            or ""
-        )
-        short_name = short_raw.split(",")[0].strip()
+        return result
 
-        address_data = suggestion.get("data", {}).get("address", {}).get("data", {})
-        region = address_data.get("region_with_type")
+    @staticmethod
+    async def find_org_by_inn(db: AsyncSession, inn: int) -> Optional[Orgs]:
+        result = await db.execute(select(Orgs).where(Orgs.inn == inn))
+        return result.scalar_one_or_none()
 
-        org = await OrgsCRUD.get_org_by_inn(db=db, inn=inn)
+    @staticmethod
+    async def create_org(db: AsyncSession, inn: int, org_type: str):
+        # Сначала локальная таблица: повторное создание не тратит квоту Dadata
+        org = await OrgsCRUD.find_org_by_inn(db=db, inn=inn)
         if org:
             return org
 
+        suggestion = await dadata_lookup.find_party(inn)
+        if not suggestion:
+            return None
+
+        party = parse_party(suggestion)
+
         new_org = Orgs(
-            full_name=full_name,
-            short_name=short_name,
+            full_name=party["full_name"],
+            short_name=party["short_name"],
             inn=inn,
-            region=region,
+            region=party["region"],
             type=org_type,
         )
         db.add(new_org)
@@ -161,11 +175,67 @@ class OrgsCRUD:
         except IntegrityError:
             await db.rollback()
 
-            return await OrgsCRUD.get_org_by_inn(db=db, inn=inn)
+            return await OrgsCRUD.find_org_by_inn(db=db, inn=inn)
 
         await db.refresh(new_org)
+        await org_directory.upsert([new_org])
+        await publish_orgs_updated([new_org])
         return new_org
 
+    @staticmethod
+    async def lookup_inns(inns: list[int]) -> dict[int, Optional[dict]]:
+        """Пакетное обогащение списка ИНН данными Dadata (через кэш)."""
+        suggestions = await dadata_lookup.find_parties(inns)
+        return {
+            inn: parse_party(suggestion) if suggestion else None
+            for inn, suggestion in suggestions.items()
+        }
+
+    @staticmethod
+    async def search_orgs(db: AsyncSession, q: str, limit: int = 10) -> list[dict]:
+        """
+        Typeahead по организациям: цифры ищутся как префикс ИНН,
+        текст — по триграммам full_name/short_name и tsvector, с ранжированием.
+        """
+        q = q.strip()
+        if not q:
+            return []
+
+        columns = (Orgs.id, Orgs.full_name, Orgs.short_name, Orgs.inn, Orgs.region)
+
+        if q.isdigit():
+            stmt = (
+                select(*columns, literal(1.0).label("score"))
+                .where(cast(Orgs.inn, String).like(f"{q}%"))
+                .order_by(Orgs.inn)
+                .limit(limit)
+            )
+        else:
+            ts_query = func.plainto_tsquery("russian", q)
+            score = (
+                func.greatest(
+                    func.word_similarity(q, Orgs.full_name),
+                    func.word_similarity(q, Orgs.short_name),
+                )
+                + func.ts_rank(Orgs.search_vector, ts_query)
+            ).label("score")
+
+            stmt = (
+                select(*columns, score)
+                .where(
+                    or_(
+                        Orgs.full_name.op("%>")(q),
+                        Orgs.short_name.op("%>")(q),
+                        Orgs.search_vector.op("@@")(ts_query),
+                    )
+                )
+                .order_by(score.desc(), Orgs.id)
+                .limit(limit)
+            )
+
+        res = await db.execute(stmt)
+        return [dict(row._mapping) for row in res.all()]
+
     @staticmethod
     async def get_orgs_count(db: AsyncSession):
         result = await db.execute(select(func.count(Orgs.id)))
@@ -173,7 +243,11 @@ class OrgsCRUD:
 
     @staticmethod
     def org_to_dict(org: Orgs) -> dict:
-        data = {c.key: getattr(org, c.key) for c in inspect(org).mapper.column_attrs}
+        data = {
+            c.key: getattr(org, c.key)
+            for c in inspect(org).mapper.column_attrs
+            if c.key not in HIDDEN_COLUMNS
+        }
 
         # если type = Enum объект, то сделаем строкой
         if hasattr(org.type, "value"):
@@ -199,62 +273,242 @@ class OrgsCRUD:
         if region:
             stmt = stmt.where(Orgs.region == region)
 
-        if sort_by in ["name", "index"]:
-            if sort_by == "name":
-                stmt = stmt.order_by(
-                    Orgs.full_name.asc() if order == "asc" else Orgs.full_name.desc()
-                )
-            elif sort_by == "index":
-                stmt = stmt.order_by(
-                    Orgs.star.asc() if order == "asc" else Orgs.star.desc()
-                )
+        sort_columns = {
+            "name": Orgs.full_name,
+            "index": Orgs.star,
+            "members": Orgs.members_count,
+        }
+        if sort_by not in sort_columns:
+            raise HTTPException(status_code=400, detail="Invalid sort_by value")
 
-            stmt = stmt.offset(offset).limit(limit)
-            res = await db.execute(stmt)
-            orgs = res.scalars().all()
+        sort_column = sort_columns[sort_by]
+        if order == "asc":
+            stmt = stmt.order_by(sort_column.asc(), Orgs.id.asc())
+        else:
+            stmt = stmt.order_by(sort_column.desc(), Orgs.id.desc())
 
-            if not orgs:
-                return []
+        stmt = stmt.offset(offset).limit(limit)
+        res = await db.execute(stmt)
+        orgs = res.scalars().all()
 
-            org_ids = [o.id for o in orgs]
-            counts = await OrgsCRUD._get_orgs_counts(org_ids)
+        return [OrgsCRUD.org_to_dict(o) for o in orgs]
 
-            result = []
-            for o in orgs:
-                data = OrgsCRUD.org_to_dict(o)
-                data.update(counts.get(o.id, {"members_count": 0, "teams_count": 0}))
-                result.append(data)
+    @staticmethod
+    async def apply_counts(
+        db: AsyncSession, counts: list[dict], counted_at: Optional[datetime] = None
+    ) -> int:
+        """
+        Записывает присланные счётчики одним UPDATE ... FROM (VALUES ...) на поле.
+        Элементы содержат id и members_count и/или teams_count.
+        counted_at — момент, когда отправитель посчитал значения: счётчик,
+        записанный по более свежему снимку, не перезаписывается старым.
+        """
+        counted_at = counted_at or datetime.now(timezone.utc)
+        stamps = {"members_count": Orgs.members_count_at, "teams_count": Orgs.teams_count_at}
+
+        updated = 0
+        for field, stamp in stamps.items():
+            rows = sorted(
+                (item["id"], item[field])
+                for item in counts
+                if item.get("id") and item.get(field) is not None
+            )
+            if not rows:
+                continue
+
+            new_counts = values(
+                column("id", Integer), column("count", Integer), name="new_counts"
+            ).data(rows)
+            result = await db.execute(
+                update(Orgs)
+                .where(
+                    Orgs.id == new_counts.c.id,
+                    or_(stamp.is_(None), stamp < counted_at),
+                )
+                .values(
+                    {
+                        field: new_counts.c.count,
+                        stamp.key: counted_at,
+                        "counts_updated_at": func.now(),
+                    }
+                )
+                .execution_options(synchronize_session=False)
+            )
+            updated += result.rowcount
 
-            return result
+        await db.commit()
+        return updated
 
-        elif sort_by == "members":
-            stmt = stmt.order_by(Orgs.full_name.asc())
-            res = await db.execute(stmt)
-            orgs = res.scalars().all()
+    @staticmethod
+    async def apply_indices(db: AsyncSession, indices) -> int:
+        """Записывает пересчитанные индексы одним UPDATE ... FROM (VALUES ...)."""
+        if indices.empty:
+            return 0
+
+        rows = [
+            (int(row[0]), *map(float, row[1:]))
+            for row in indices[["id"] + INDEX_COLUMNS].itertuples(index=False, name=None)
+        ]
+        new_indices = values(
+            column("id", Integer),
+            *(column(name, Float) for name in INDEX_COLUMNS),
+            name="new_indices",
+        ).data(rows)
 
-            if not orgs:
-                return []
+        result = await db.execute(
+            update(Orgs)
+            .where(Orgs.id == new_indices.c.id)
+            .values({name: new_indices.c[name] for name in INDEX_COLUMNS})
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
 
-            org_ids = [o.id for o in orgs]
-            counts = await OrgsCRUD._get_orgs_counts(org_ids)
+    @staticmethod
+    async def get_region_stats(
+        db: AsyncSession,
+        types: Optional[list[str]] = None,
+        region: Optional[str] = None,
+    ) -> list[dict]:
+        """
+        Сводка по регионам из region_stats плюс ещё не свёрнутые дельты;
+        типы организаций суммируются.
+        """
+        stats = union_all(
+            *(
+                select(
+                    table.region,
+                    table.type,
+                    table.orgs_count,
+                    table.teams_count,
+                    table.members_count,
+                    table.star_sum,
+                )
+                for table in (RegionStats, RegionStatsDelta)
+            )
+        ).subquery()
+
+        orgs_count = func.sum(stats.c.orgs_count)
+        stmt = (
+            select(
+                stats.c.region,
+                orgs_count.label("orgs_count"),
+                func.sum(stats.c.teams_count).label("teams_count"),
+                func.sum(stats.c.members_count).label("members_count"),
+                (func.sum(stats.c.star_sum) / func.nullif(orgs_count, 0)).label(
+                    "avg_star"
+                ),
+            )
+            .group_by(stats.c.region)
+            .having(orgs_count > 0)
+            .order_by(stats.c.region)
+        )
+        if types:
+            stmt = stmt.where(stats.c.type.in_(types))
+        if region:
+            stmt = stmt.where(stats.c.region == region)
+
+        result = await db.execute(stmt)
+        return [
+            {
+                "region": row.region,
+                "orgs_count": int(row.orgs_count),
+                "teams_count": int(row.teams_count),
+                "members_count": int(row.members_count),
+                "avg_star": round(row.avg_star or 0.0, 4),
+            }
+            for row in result.all()
+        ]
 
-            orgs.sort(
-                key=lambda o: counts.get(o.id, {}).get("members_count", 0),
-                reverse=(order == "desc"),
+    @staticmethod
+    async def rebuild_region_stats(db: AsyncSession) -> int:
+        """Полная пересборка сводки (сбрасывает накопленную погрешность star_sum)."""
+        # Блокируем запись в organizations: после блокировки все дельты уже
+        # закоммичены и учтены в пересборке, новых не появится до коммита
+        await db.execute(text("LOCK TABLE organizations IN SHARE MODE"))
+        await db.execute(delete(RegionStatsDelta))
+        await db.execute(delete(RegionStats))
+        result = await db.execute(
+            text(
+                """
+                INSERT INTO region_stats
+                    (region, type, orgs_count, teams_count, members_count, star_sum)
+                SELECT region, type::text, count(*), sum(teams_count),
+                       sum(members_count), sum(star)
+                FROM organizations
+                GROUP BY region, type
+                """
             )
+        )
+        await db.commit()
+        return result.rowcount
 
-            sliced = orgs[offset : offset + limit]
+    @staticmethod
+    async def rollup_region_stats(db: AsyncSession) -> int:
+        """
+        Переносит накопленные дельты в region_stats. Дельты незакоммиченных
+        транзакций не видны DELETE и останутся до следующей свёртки.
+        """
+        locked = await db.scalar(
+            text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": REGION_STATS_LOCK_ID}
+        )
+        if not locked:
+            return 0
 
-            result = []
-            for o in sliced:
-                data = OrgsCRUD.org_to_dict(o)
-                data.update(counts.get(o.id, {"members_count": 0, "teams_count": 0}))
-                result.append(data)
+        # Строки region_stats блокируются в порядке ключа
+        result = await db.execute(
+            text(
+                """
+                WITH moved AS (
+                    DELETE FROM region_stats_deltas
+                    RETURNING region, type, orgs_count, teams_count, members_count, star_sum
+                )
+                INSERT INTO region_stats
+                    (region, type, orgs_count, teams_count, members_count, star_sum)
+                SELECT region, type, sum(orgs_count), sum(teams_count),
+                       sum(members_count), sum(star_sum)
+                FROM moved
+                GROUP BY region, type
+                ORDER BY region, type
+                ON CONFLICT (region, type) DO UPDATE SET
+                    orgs_count = region_stats.orgs_count + EXCLUDED.orgs_count,
+                    teams_count = region_stats.teams_count + EXCLUDED.teams_count,
+                    members_count = region_stats.members_count + EXCLUDED.members_count,
+                    star_sum = region_stats.star_sum + EXCLUDED.star_sum,
+                    updated_at = now()
+                """
+            )
+        )
+        await db.commit()
+        return result.rowcount
 
-            return result
+    @staticmethod
+    async def refresh_org_counters(db: AsyncSession, batch_size: int = 200) -> int:
+        """
+        Полный пересчёт счётчиков из user_profile и teams_service: первичное
+        заполнение и периодическая сверка на случай потерянных событий.
+        """
+        refreshed = 0
+        last_id = 0
+        while True:
+            res = await db.execute(
+                select(Orgs.id)
+                .where(Orgs.id > last_id)
+                .order_by(Orgs.id)
+                .limit(batch_size)
+            )
+            org_ids = list(res.scalars().all())
+            if not org_ids:
+                return refreshed
 
-        else:
-            raise HTTPException(status_code=400, detail="Invalid sort_by value")
+            counted_at = datetime.now(timezone.utc)
+            counts = await OrgsCRUD._get_orgs_counts(org_ids)
+            refreshed += await OrgsCRUD.apply_counts(
+                db,
+                [{"id": org_id, **data} for org_id, data in counts.items()],
+                counted_at,
+            )
+            last_id = org_ids[-1]
 
     @staticmethod
     async def _get_orgs_counts(org_ids: list[int]):
@@ -265,35 +519,17 @@ class OrgsCRUD:
         if not org_ids:
             return {}
 
-        async with httpx.AsyncClient(timeout=10) as client:
-            try:
-                members_req = client.get(
-                    f"{settings.USERS_SERVICE_URL}/profile_interaction/members-count",
-                    params=[("org_ids", oid) for oid in org_ids],
-                )
-                teams_req = client.get(
-                    f"{settings.TEAMS_SERVICE_URL}/teams/teams-count",
-                    params=[("org_ids", oid) for oid in org_ids],
-                )
-
-                members_resp, teams_resp = await asyncio.gather(members_req, teams_req)
-
-                if members_resp.status_code != 200 or teams_resp.status_code != 200:
-                    raise HTTPException(
-                        status_code=502, detail="Users service unavailable"
-                    )
-
-                members_counts = {int(k): v for k, v in members_resp.json().items()}
-                teams_counts = {int(k): v for k, v in teams_resp.json().items()}
-
-                # Объединяем результаты
-                result = {}
-                for org_id in org_ids:
-                    result[org_id] = {
-                        "members_count": members_counts.get(org_id, 0),
-                        "teams_count": teams_counts.get(org_id, 0),
-                    }
-                return result
-
-            except httpx.RequestError:
-                raise HTTPException(status_code=502, detail="Users service unavailable")
+        members_counts, teams_counts = await asyncio.gather(
+            fetch_members_counts(org_ids), fetch_teams_counts(org_ids)
+        )
+        if members_counts is None or teams_counts is None:
+            raise HTTPException(status_code=502, detail="Users service unavailable")
+
+        # Объединяем результаты
+        result = {}
+        for org_id in org_ids:
+            result[org_id] = {
+                "members_count": members_counts.get(org_id, 0),
+                "teams_count": teams_counts.get(org_id, 0),
+            }
+        return result
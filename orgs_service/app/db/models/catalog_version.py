@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Column, String, text
+from db.base import Base
+
+
+class CatalogVersion(Base):
+    """Версии каталогов для ETag; statement-триггеры увеличивают их, только если строки изменились."""
+
+    __tablename__ = "catalog_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, server_default=text("0"))
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Column, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+from db.base import Base
+
+
+class DadataCache(Base):
+    """Ответы Dadata findById/party по ИНН; payload = NULL — ИНН не найден."""
+
+    __tablename__ = "dadata_cache"
+
+    inn = Column(BigInteger, primary_key=True)
+    payload = Column(JSONB, nullable=True)
+    fetched_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, Integer, String, Text, func
+from db.base import Base
+
+
+class OrgImportJob(Base):
+    __tablename__ = "org_import_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    excel_path = Column(String, nullable=False)
+    sheet_name = Column(String, nullable=False, server_default="0")
+    chunk_size = Column(Integer, nullable=False, server_default="2000")
+
+    # pending | running | completed | failed
+    status = Column(String, nullable=False, server_default="pending")
+
+    # Строки данных, закоммиченные вместе с последним чанком — точка возобновления
+    rows_processed = Column(Integer, nullable=False, server_default="0")
+    inserted = Column(Integer, nullable=False, server_default="0")
+    updated = Column(Integer, nullable=False, server_default="0")
+    skipped = Column(Integer, nullable=False, server_default="0")
+
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
@@ -1,6 +1,20 @@
 from __future__ import annotations
 
-from sqlalchemy import Column, Integer, String, Enum, Float, BigInteger, text
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Enum,
+    Float,
+    BigInteger,
+    Computed,
+    DateTime,
+    Index,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 from db.base import Base
 from db.models.org_enum import OrgType
 
@@ -33,3 +47,46 @@ class Orgs(Base):
     data_protection_z = Column(Float, nullable=False, server_default=text("0"))
     data_analytics_d = Column(Float, nullable=False, server_default=text("0"))
     automation_a = Column(Float, nullable=False, server_default=text("0"))
+
+    # Денормализованные счётчики, поддерживаются событиями org.counts_changed
+    members_count = Column(Integer, nullable=False, server_default=text("0"))
+    teams_count = Column(Integer, nullable=False, server_default=text("0"))
+    counts_updated_at = Column(DateTime(timezone=True), nullable=True)
+    # Момент снимка у отправителя; более старые события не применяются
+    members_count_at = Column(DateTime(timezone=True), nullable=True)
+    teams_count_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Обновляется триггером, когда меняется отдаваемая колонка; используется для ETag
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    # Только для поиска: не загружается вместе с записью
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                "to_tsvector('russian', coalesce(full_name, '') || ' ' || coalesce(short_name, ''))",
+                persisted=True,
+            ),
+        )
+    )
+
+    __table_args__ = (
+        Index("ix_organizations_members_count_id", "members_count", "id"),
+        Index("ix_organizations_region_members_count_id", "region", "members_count", "id"),
+        Index(
+            "ix_organizations_full_name_trgm",
+            "full_name",
+            postgresql_using="gin",
+            postgresql_ops={"full_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_organizations_short_name_trgm",
+            "short_name",
+            postgresql_using="gin",
+            postgresql_ops={"short_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_organizations_search_vector", "search_vector", postgresql_using="gin"
+        ),
+        Index("ix_organizations_full_name_normalized", func.lower(func.trim(full_name))),
+    )
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Column, DateTime, Float, Integer, String, func, text
+from db.base import Base
+
+
+class RegionStats(Base):
+    """
+    Сводка по регионам и типам организаций. Триггер на organizations пишет
+    дельты в region_stats_deltas, фоновая свёртка переносит их сюда.
+    """
+
+    __tablename__ = "region_stats"
+
+    region = Column(String, primary_key=True)
+    type = Column(String, primary_key=True)
+
+    orgs_count = Column(Integer, nullable=False, server_default=text("0"))
+    teams_count = Column(BigInteger, nullable=False, server_default=text("0"))
+    members_count = Column(BigInteger, nullable=False, server_default=text("0"))
+    star_sum = Column(Float, nullable=False, server_default=text("0"))
+
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class RegionStatsDelta(Base):
+    """
+    Дельты сводки от одного оператора над organizations. Только вставки:
+    параллельные писатели не ждут друг друга на общей строке региона.
+    """
+
+    __tablename__ = "region_stats_deltas"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    region = Column(String, nullable=False)
+    type = Column(String, nullable=False)
+
+    orgs_count = Column(Integer, nullable=False)
+    teams_count = Column(BigInteger, nullable=False)
+    members_count = Column(BigInteger, nullable=False)
+    star_sum = Column(Float, nullable=False)
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, String
+from db.base import Base
+
+
+class SchedulerWatermark(Base):
+    """Отметки инкрементальных пересчётов: переживают рестарт и общие для всех воркеров."""
+
+    __tablename__ = "scheduler_watermarks"
+
+    name = Column(String, primary_key=True)
+    watermark = Column(DateTime(timezone=True), nullable=False)
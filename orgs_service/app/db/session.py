@@ -1,5 +1,8 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from config import settings
 
@@ -12,3 +15,29 @@ sync_engine = create_engine(settings.DATABASE_URL.replace("+asyncpg", ""))
 async def get_db():
     async with async_session_maker() as session:
         yield session
+
+
+@asynccontextmanager
+async def advisory_lock(lock_id: int) -> AsyncIterator[bool]:
+    """
+    Сессионная advisory-блокировка на отдельном соединении в autocommit: оно
+    не возвращается в пул, пока блокировка взята, и не висит idle in transaction.
+    Работу под блокировкой делают своими сессиями.
+    """
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        locked = await conn.scalar(
+            text("SELECT pg_try_advisory_lock(:id)"), {"id": lock_id}
+        )
+        try:
+            yield bool(locked)
+        finally:
+            if locked:
+                try:
+                    await conn.scalar(
+                        text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id}
+                    )
+                except BaseException:
+                    # Закрытое соединение снимает блокировку; в пул его не отдаём
+                    await conn.invalidate()
+                    raise
@@ -1,9 +1,24 @@
+import asyncio
+import logging
 import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_client import Counter, Histogram, generate_latest
 
 from routes.org_route import router as orgs_router
+from services.rabbitmq import (
+    init_rabbitmq,
+    close_rabbitmq,
+    consume_org_counts_events,
+    consume_org_directory_updates,
+)
+from services.org_directory import org_directory
+from services.org_import import resume_interrupted_jobs
+from services.org_counts import close_http_client, run_org_counts_reconciler
+from services.region_stats import run_region_stats_rollup
+from services.star_index import run_star_index_scheduler
+from config import settings
 
 
 SERVICE_NAME = "orgs_service"
@@ -21,10 +36,77 @@ REQUEST_LATENCY = Histogram(
 )
 
 
+logger = logging.getLogger(__name__)
+
+
+def handle_task_result(task: asyncio.Task, consumer_name: str) -> None:
+    try:
+        task.result()
+    except asyncio.CancelledError:
+        logger.info(f"{consumer_name} was cancelled")
+    except Exception as e:
+        logger.error(f"{consumer_name} crashed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_rabbitmq()
+
+    await resume_interrupted_jobs()
+
+    consumer_tasks = []
+
+    # Автодополнение ходит в SQL, пока справочник не загружен
+    directory_task = asyncio.create_task(org_directory.load())
+    directory_task.add_done_callback(
+        lambda t: handle_task_result(t, "Org directory load")
+    )
+    consumer_tasks.append(directory_task)
+
+    scheduler_task = asyncio.create_task(run_star_index_scheduler())
+    scheduler_task.add_done_callback(
+        lambda t: handle_task_result(t, "Star index scheduler")
+    )
+    consumer_tasks.append(scheduler_task)
+
+    reconciler_task = asyncio.create_task(run_org_counts_reconciler())
+    reconciler_task.add_done_callback(
+        lambda t: handle_task_result(t, "Org counts reconciler")
+    )
+    consumer_tasks.append(reconciler_task)
+
+    rollup_task = asyncio.create_task(run_region_stats_rollup())
+    rollup_task.add_done_callback(
+        lambda t: handle_task_result(t, "Region stats rollup")
+    )
+    consumer_tasks.append(rollup_task)
+
+    if settings.RABBITMQ_URL:
+        consumers = {
+            "Org counts consumer": consume_org_counts_events,
+            "Org directory consumer": consume_org_directory_updates,
+        }
+        for consumer_name, consumer in consumers.items():
+            task = asyncio.create_task(consumer(settings.RABBITMQ_URL))
+            task.add_done_callback(
+                lambda t, name=consumer_name: handle_task_result(t, name)
+            )
+            consumer_tasks.append(task)
+
+    yield
+
+    for task in consumer_tasks:
+        task.cancel()
+    await asyncio.gather(*consumer_tasks, return_exceptions=True)
+    await close_http_client()
+    await close_rabbitmq()
+
+
 app = FastAPI(
     title="ORGS FASTAPI",
     description="xxx",
     root_path="/orgs",
+    lifespan=lifespan,
 )
 
 
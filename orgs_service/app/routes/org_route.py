@@ -1,10 +1,15 @@
 from typing import Optional, Literal
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.session import get_db
-from db.parser import import_excel_to_sql
 from cruds.orgs_crud import OrgsCRUD
-from schemas import OrgCreateSchema
+from services.org_directory import org_directory
+from schemas import OrgBatchRequest, OrgCreateSchema, OrgImportJobCreate, OrgInnLookupRequest
+from services import org_export, org_import, star_index
+from services.auth_client import get_admin
+from services.http_cache import conditional_response, make_etag
+from config import settings
 
 
 router = APIRouter(prefix="/organizations", tags=["Organizations"])
@@ -12,11 +17,20 @@ router = APIRouter(prefix="/organizations", tags=["Organizations"])
 
 @router.post("/create")
 async def create_org(request: OrgCreateSchema, db: AsyncSession = Depends(get_db)):
-    inn = request.inn
-    org = await OrgsCRUD.create_org_by_inn(db, inn)
+    if not request.inn or not request.inn.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid INN")
+
+    org = await OrgsCRUD.create_org(db, int(request.inn), request.type)
+    if not org:
+        raise HTTPException(status_code=404, detail="Organization not found in Dadata")
     return "ok"
 
 
+@router.post("/dadata/lookup_batch")
+async def lookup_organizations_by_inn(request: OrgInnLookupRequest):
+    return await OrgsCRUD.lookup_inns(request.inns)
+
+
 @router.get("/count")
 async def get_organizations_count(db: AsyncSession = Depends(get_db)):
     count = await OrgsCRUD.get_orgs_count(db)
@@ -25,6 +39,8 @@ async def get_organizations_count(db: AsyncSession = Depends(get_db)):
 
 @router.get("/all")
 async def get_all_organizations(
+    request: Request,
+    response: Response,
     region: Optional[str] = Query(default=None),
     name: Optional[str] = Query(default=None),
     sort_by: Literal["name", "members", "index"] = Query(default="name"),
@@ -33,6 +49,14 @@ async def get_all_organizations(
     offset: int = Query(default=0, ge=0),
     db: AsyncSession = Depends(get_db),
 ):
+    version = await OrgsCRUD.get_catalog_version(db)
+    etag = make_etag("orgs", version, region, name, sort_by, order, limit, offset)
+    not_modified = conditional_response(
+        request, response, etag, max_age=settings.CATALOG_CACHE_MAX_AGE
+    )
+    if not_modified:
+        return not_modified
+
     orgs = await OrgsCRUD.get_orgs(
         db=db,
         region=region,
@@ -45,20 +69,123 @@ async def get_all_organizations(
     return orgs
 
 
+@router.get("/export")
+async def export_organizations(
+    format: Literal["csv", "xlsx"] = Query(default="csv"),
+    region: Optional[str] = Query(default=None),
+):
+    if format == "xlsx":
+        body = org_export.stream_xlsx(region=region)
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        body = org_export.stream_csv(region=region)
+        media_type = "text/csv; charset=utf-8"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="organizations.{format}"'},
+    )
+
+
+@router.post("/batch")
+async def get_organizations_batch(
+    request: OrgBatchRequest, db: AsyncSession = Depends(get_db)
+):
+    return await OrgsCRUD.get_orgs_by_ids(
+        db=db, org_ids=request.org_ids, with_counts=request.with_counts
+    )
+
+
+@router.post("/recount_counters")
+async def recount_counters(db: AsyncSession = Depends(get_db), _=Depends(get_admin)):
+    refreshed = await OrgsCRUD.refresh_org_counters(db)
+    return {"status": "ok", "refreshed": refreshed}
+
+
+@router.get("/region_stats")
+async def get_region_stats(
+    type: Optional[list[str]] = Query(default=None),
+    region: Optional[str] = Query(default=None),
+    db: AsyncSession = Depends(get_db),
+):
+    return await OrgsCRUD.get_region_stats(db=db, types=type, region=region)
+
+
+@router.post("/region_stats/rebuild")
+async def rebuild_region_stats(db: AsyncSession = Depends(get_db), _=Depends(get_admin)):
+    rebuilt = await OrgsCRUD.rebuild_region_stats(db)
+    return {"status": "ok", "rows": rebuilt}
+
+
+@router.post("/recompute_indices")
+async def recompute_organization_indices(_=Depends(get_admin)):
+    as_of, updated = await star_index.recompute_indices()
+    return {"updated": updated, "as_of": as_of}
+
+
 @router.get("/import_from_excel")
-def import_from_excel():
-    try:
-        import_excel_to_sql(
-            excel_path="/app/app/db/result_full.xlsx",
-            sheet_name="Sheet1",
-            table_name="organizations",
-            if_exists="append",
-            chunk_size=2000,
-            drop_duplicates_by_kpp=True,
-        )
-        return {"status": "ok", "message": "Импорт выполнен"}
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+async def import_from_excel(db: AsyncSession = Depends(get_db)):
+    job = await org_import.create_job(
+        db, excel_path=settings.ORG_IMPORT_EXCEL_PATH, sheet_name="Sheet1", chunk_size=2000
+    )
+    org_import.start_job(job.id)
+    return {"status": "started", "job_id": job.id}
+
+
+@router.post("/import_jobs")
+async def create_import_job(
+    request: OrgImportJobCreate,
+    db: AsyncSession = Depends(get_db),
+    _=Depends(get_admin),
+):
+    job = await org_import.create_job(
+        db,
+        excel_path=settings.ORG_IMPORT_EXCEL_PATH,
+        sheet_name=request.sheet_name,
+        chunk_size=request.chunk_size,
+    )
+    org_import.start_job(job.id)
+    return org_import.job_to_dict(job)
+
+
+@router.get("/import_jobs/{job_id}")
+async def get_import_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    job = await org_import.get_job(db, job_id)
+    return org_import.job_to_dict(job)
+
+
+@router.post("/import_jobs/{job_id}/resume")
+async def resume_import_job(
+    job_id: int, db: AsyncSession = Depends(get_db), _=Depends(get_admin)
+):
+    job = await org_import.get_job(db, job_id)
+    if job.status == "completed":
+        raise HTTPException(status_code=400, detail="Import job already completed")
+
+    started = org_import.start_job(job.id)
+    return {"job_id": job.id, "resumed": started, "rows_processed": job.rows_processed}
+
+
+@router.get("/search")
+async def search_organizations(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(default=10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    return await OrgsCRUD.search_orgs(db=db, q=q, limit=limit)
+
+
+@router.get("/autocomplete")
+async def autocomplete_organizations(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(default=10, ge=1, le=50),
+    region: Optional[str] = Query(default=None),
+    db: AsyncSession = Depends(get_db),
+):
+    if not org_directory.loaded:
+        return await OrgsCRUD.search_orgs(db=db, q=q, limit=limit)
+    return org_directory.search(q, limit=limit, region=region)
 
 
 @router.get("/exists/{org_name}")
@@ -74,7 +201,22 @@ async def get_organization(org_name: str, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/org/{org_id}")
-async def get_organization_by_id(org_id: int, db: AsyncSession = Depends(get_db)):
+async def get_organization_by_id(
+    org_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    # Ответ целиком из строки, включая счётчики, а updated_at меняется вместе
+    # с любой отдаваемой колонкой — ETag совпадает ровно при том же ответе
+    updated_at = await OrgsCRUD.get_org_version(db, org_id)
+    etag = make_etag("org", org_id, updated_at.isoformat())
+    not_modified = conditional_response(
+        request, response, etag, max_age=settings.CATALOG_CACHE_MAX_AGE
+    )
+    if not_modified:
+        return not_modified
+
     org = await OrgsCRUD.get_org_by_id(db, org_id)
     return {
         "id": org.id,
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class OrgCreateSchema(BaseModel):
@@ -6,6 +6,20 @@ class OrgCreateSchema(BaseModel):
     type: str = None
 
 
+class OrgInnLookupRequest(BaseModel):
+    inns: list[int] = Field(..., min_length=1, max_length=500)
+
+
+class OrgImportJobCreate(BaseModel):
+    sheet_name: str = "Sheet1"
+    chunk_size: int = Field(default=2000, ge=100, le=20000)
+
+
+class OrgBatchRequest(BaseModel):
+    org_ids: list[int]
+    with_counts: bool = False
+
+
 class OrgResponse(BaseModel):
     id: int
     full_name: str
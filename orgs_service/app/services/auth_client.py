@@ -0,0 +1,55 @@
+from fastapi import Depends, HTTPException, Request, status
+from jose import JWTError, jwt
+
+from config import settings
+
+
+async def get_current_user_role(request: Request) -> str:
+    token = request.cookies.get("users_access_token")
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token missing in cookies"
+        )
+
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
+        )
+
+    user_role = payload.get("role")
+    if not user_role:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Role not found in token"
+        )
+    return user_role
+
+
+def require_role(required_role: str):
+    def role_checker(user_role: str = Depends(get_current_user_role)):
+        if required_role == "moder":
+            if user_role not in ["moder", "admin"]:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Insufficient permissions. Required: moder or admin",
+                )
+
+        elif required_role == "admin":
+            if user_role != "admin":
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Insufficient permissions. Required: admin",
+                )
+
+        elif user_role != required_role:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Insufficient permissions. Required role: {required_role}",
+            )
+        return user_role
+
+    return role_checker
+
+
+get_admin = require_role("admin")
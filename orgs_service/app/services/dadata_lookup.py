@@ -0,0 +1,175 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from dadata import DadataAsync
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from config import settings
+from db.models.dadata_cache import DadataCache
+from db.session import async_session_maker
+from services.single_flight import SingleFlight
+
+
+logger = logging.getLogger(__name__)
+
+
+class DadataStub:
+    """
+    Локальная замена DadataAsync для тестов и разработки без ключей (DADATA_STUB=true).
+    Отдаёт заранее заданные ответы, иначе — синтетическую организацию для любого ИНН.
+    """
+
+    def __init__(
+        self,
+        parties: Optional[dict[str, dict]] = None,
+        synthesize: bool = True,
+        delay: float = 0.0,
+    ):
+        self.parties = parties or {}
+        self.synthesize = synthesize
+        self.delay = delay
+        self.calls = 0
+
+    async def find_by_id(self, name: str, query: str, **kwargs):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if query in self.parties:
+            return [self.parties[query]]
+        if not self.synthesize or not query.isdigit() or len(query) not in (10, 12):
+            return []
+        return [
+            {
+                "value": f"ООО \"ТЕСТ {query}\"",
+                "data": {
+                    "branch_type": "MAIN",
+                    "name": {
+                        "full_with_opf": f"ОБЩЕСТВО С ОГРАНИЧЕННОЙ ОТВЕТСТВЕННОСТЬЮ \"ТЕСТ {query}\"",
+                        "short_with_opf": f"ООО \"ТЕСТ {query}\"",
+                    },
+                    "address": {"data": {"region_with_type": "г Москва"}},
+                },
+            }
+        ]
+
+
+def parse_party(suggestion: dict) -> dict:
+    name_block = suggestion.get("data", {}).get("name", {})
+
+    full_name = (
+        name_block.get("full_with_opf") or suggestion.get("value") or ""
+    ).strip()
+
+    short_raw = (
+        name_block.get("short_with_opf")
+        or name_block.get("short")
+        or suggestion.get("value")
+        or ""
+    )
+    short_name = short_raw.split(",")[0].strip()
+
+    address_data = suggestion.get("data", {}).get("address", {}).get("data", {})
+
+    return {
+        "full_name": full_name,
+        "short_name": short_name,
+        "region": address_data.get("region_with_type"),
+    }
+
+
+class DadataLookup:
+    """
+    Поиск организации по ИНН: кэш в таблице dadata_cache с TTL (включая
+    «не найдено»), затем Dadata. Одновременные запросы одного ИНН
+    склеиваются в один вызов (single-flight).
+    """
+
+    def __init__(self, client, ttl: timedelta, concurrency: int):
+        self.client = client
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self._flight = SingleFlight()
+
+    async def _load_cached(self, inn: int) -> tuple[bool, Optional[dict]]:
+        async with async_session_maker() as session:  # type: ignore
+            entry = await session.scalar(
+                select(DadataCache).where(
+                    DadataCache.inn == inn,
+                    DadataCache.fetched_at > datetime.now(timezone.utc) - self.ttl,
+                )
+            )
+        if entry is None:
+            return False, None
+        return True, entry.payload
+
+    async def _store(self, inn: int, payload: Optional[dict]) -> None:
+        async with async_session_maker() as session:  # type: ignore
+            stmt = pg_insert(DadataCache).values(inn=inn, payload=payload)
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[DadataCache.inn],
+                    set_={"payload": stmt.excluded.payload, "fetched_at": func.now()},
+                )
+            )
+            await session.commit()
+
+    async def _fetch(self, inn: int) -> Optional[dict]:
+        result = await self.client.find_by_id("party", str(inn))
+
+        if isinstance(result, dict):
+            suggestions = result.get("suggestions", [])
+        elif isinstance(result, list):
+            suggestions = result
+        else:
+            suggestions = []
+
+        if not suggestions:
+            return None
+
+        return next(
+            (s for s in suggestions if s.get("data", {}).get("branch_type") == "MAIN"),
+            suggestions[0],
+        )
+
+    async def find_party(self, inn: int) -> Optional[dict]:
+        hit, payload = await self._load_cached(inn)
+        if hit:
+            return payload
+
+        return await self._flight.run(inn, lambda: self._fetch_and_store(inn))
+
+    async def _fetch_and_store(self, inn: int) -> Optional[dict]:
+        payload = await self._fetch(inn)
+        await self._store(inn, payload)
+        return payload
+
+    async def find_parties(self, inns: Iterable[int]) -> dict[int, Optional[dict]]:
+        """Пакетный режим: не больше `concurrency` одновременных обращений к Dadata."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def lookup(inn: int):
+            async with semaphore:
+                try:
+                    return inn, await self.find_party(inn)
+                except Exception as e:
+                    logger.error(f"Dadata lookup failed for INN {inn}: {e}")
+                    return inn, None
+
+        return dict(await asyncio.gather(*(lookup(inn) for inn in set(inns))))
+
+
+def _make_client():
+    if settings.DADATA_STUB:
+        logger.warning("DADATA_STUB is enabled, using local Dadata stub")
+        return DadataStub()
+    return DadataAsync(token=settings.DADATA_TOKEN, secret=settings.DADATA_SECRET)
+
+
+dadata_lookup = DadataLookup(
+    client=_make_client(),
+    ttl=timedelta(days=settings.DADATA_CACHE_TTL_DAYS),
+    concurrency=settings.DADATA_BULK_CONCURRENCY,
+)
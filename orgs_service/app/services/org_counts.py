@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from typing import Optional
+
+import httpx
+
+from config import settings
+from db.session import advisory_lock, async_session_maker
+
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+# Одна сверка счётчиков на все воркеры
+ORG_COUNTS_LOCK_ID = 0xC0A7
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Общий клиент с пулом keep-alive соединений к user_profile и teams_service."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.ORG_COUNTS_TIMEOUT),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _fetch_counts(url: str, org_ids: list[int]) -> Optional[dict[int, int]]:
+    """Эндпоинты счётчиков отвечают словарём {org_id: count}; None — сервис недоступен."""
+    try:
+        r = await get_http_client().get(
+            url, params=[("org_ids", org_id) for org_id in org_ids]
+        )
+        r.raise_for_status()
+        return {int(k): v for k, v in r.json().items()}
+    except Exception as e:
+        logger.error(f"Failed to fetch counts from {url}: {e}")
+        return None
+
+
+async def fetch_members_counts(org_ids: list[int]) -> Optional[dict[int, int]]:
+    return await _fetch_counts(
+        f"{settings.USERS_SERVICE_URL}/profile_interaction/members-count", org_ids
+    )
+
+
+async def fetch_teams_counts(org_ids: list[int]) -> Optional[dict[int, int]]:
+    return await _fetch_counts(f"{settings.TEAMS_SERVICE_URL}/teams/teams-count", org_ids)
+
+
+async def run_org_counts_reconciler() -> None:
+    """
+    Счётчики приходят событиями org.counts_changed, которые публикуются после
+    коммита без гарантии доставки. Периодическая сверка с user_profile и
+    teams_service исправляет значения, если событие потерялось.
+    """
+    from cruds.orgs_crud import OrgsCRUD
+
+    while True:
+        await asyncio.sleep(settings.ORG_COUNTS_RECONCILE_INTERVAL)
+        try:
+            # refresh_org_counters коммитит по пачкам и отдаёт соединение сессии
+            # в пул, поэтому блокировка держится на отдельном соединении
+            async with advisory_lock(ORG_COUNTS_LOCK_ID) as locked:
+                if locked:
+                    async with async_session_maker() as session:  # type: ignore
+                        refreshed = await OrgsCRUD.refresh_org_counters(session)
+                    logger.info(f"Org counters reconciled for {refreshed} orgs")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Org counters reconcile failed: {e}")
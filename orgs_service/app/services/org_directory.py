@@ -0,0 +1,420 @@
+import asyncio
+import bisect
+import heapq
+import logging
+import sys
+import time
+from typing import Iterable, Optional
+
+from prometheus_client import Histogram
+from sqlalchemy import select
+
+from config import settings
+from db.models.orgs import Orgs
+from db.session import async_session_maker
+
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_LATENCY = Histogram(
+    "org_autocomplete_seconds",
+    "In-memory organization autocomplete latency per keystroke",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05),
+)
+
+NGRAM = 3
+
+# Запросы шире этого числа кандидатов ранжируются проходом в порядке ранга
+SCAN_THRESHOLD = 1000
+
+
+def normalize(text: Optional[str]) -> str:
+    if not text:
+        return ""
+    text = text.lower().replace("ё", "е")
+    for char in "\"'«»()":
+        text = text.replace(char, " ")
+    return " ".join(text.split())
+
+
+def _ngrams(text: str) -> set[str]:
+    return {text[i : i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class OrgDirectory:
+    """
+    Справочник организаций в памяти процесса для автодополнения.
+    Префиксный индекс по словам и ИНН (отсортированные списки + bisect),
+    триграммный индекс для поиска по подстроке. Широкие запросы вроде «фед»
+    ищутся str.find по склейке ключей в порядке ранга (длина названия, id).
+    Если оценка памяти превышает ORG_DIRECTORY_MEMORY_MB, триграммы
+    отключаются и остаётся поиск по префиксу слов.
+
+    Отсортированные списки пересобираются слиянием в отдельном потоке и
+    подменяются целиком, поэтому поиск на цикле событий не ждёт обновлений.
+    """
+
+    def __init__(self, memory_budget_bytes: int):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.loaded = False
+        self._records: dict[int, dict] = {}
+        self._keys: dict[int, str] = {}
+        self._words: list[tuple[str, int]] = []
+        self._inns: list[tuple[str, int]] = []
+        self._by_rank: list[tuple[int, int]] = []
+        self._text = ""
+        self._offsets: list[int] = []
+        self._ngrams: dict[str, set[int]] = {}
+        self._ngrams_enabled = True
+        # Оценка памяти ведётся по мере изменений, без обхода индекса
+        self._entries_bytes = 0
+        self._postings = 0
+        self._lock = asyncio.Lock()
+        self._loading = False
+        self._pending_ids: set[int] = set()
+
+    # --- построение индекса ---
+
+    @staticmethod
+    def _record(org) -> dict:
+        return {
+            "id": org.id,
+            "full_name": org.full_name,
+            "short_name": org.short_name,
+            "inn": org.inn,
+            "region": org.region,
+        }
+
+    @staticmethod
+    def _key(record: dict) -> str:
+        return normalize(f"{record['full_name']} {record['short_name']}")
+
+    @staticmethod
+    def _entries(org_id: int, record: dict, key: str) -> tuple[list, list]:
+        words = [(word, org_id) for word in set(key.split())]
+        inns = [(str(record["inn"]), org_id)] if record["inn"] else []
+        return words, inns
+
+    @staticmethod
+    def _rank_entry(record: dict) -> tuple[int, int]:
+        return len(record["full_name"] or ""), record["id"]
+
+    @staticmethod
+    def _entry_bytes(key: str, words: list, inns: list) -> int:
+        # Ключ хранится дважды: в _keys и в склейке _text
+        return 2 * sys.getsizeof(key) + 400 + (len(words) + len(inns) + 2) * 120
+
+    def _estimate_bytes(self) -> int:
+        return self._entries_bytes + self._postings * 40 + len(self._ngrams) * 150
+
+    @staticmethod
+    def _build(records: list[dict]) -> tuple:
+        """Строит индексы с нуля; выполняется в отдельном потоке, состояние не трогает."""
+        by_id, keys, ngrams = {}, {}, {}
+        words, inns, by_rank = [], [], []
+        entries_bytes = postings = 0
+        for record in records:
+            key = OrgDirectory._key(record)
+            record_words, record_inns = OrgDirectory._entries(record["id"], record, key)
+            by_id[record["id"]] = record
+            keys[record["id"]] = key
+            words.extend(record_words)
+            inns.extend(record_inns)
+            by_rank.append(OrgDirectory._rank_entry(record))
+            entries_bytes += OrgDirectory._entry_bytes(key, record_words, record_inns)
+            for gram in _ngrams(key):
+                ngrams.setdefault(gram, set()).add(record["id"])
+                postings += 1
+
+        words.sort()
+        inns.sort()
+        by_rank.sort()
+        ranked = (by_rank, *OrgDirectory._layout(by_rank, keys.__getitem__))
+        return by_id, keys, words, inns, ranked, ngrams, entries_bytes, postings
+
+    @staticmethod
+    def _layout(by_rank: list, key_of) -> tuple[str, list[int]]:
+        """Склейка "\\n ключ" в порядке ранга и смещения начала каждой организации."""
+        parts, offsets, offset = [], [], 0
+        for _, org_id in by_rank:
+            part = f"\n {key_of(org_id)}"
+            parts.append(part)
+            offsets.append(offset)
+            offset += len(part)
+        return "".join(parts), offsets
+
+    @staticmethod
+    def _merge(entries: list, removed: set, added: list) -> list:
+        """Новый отсортированный список за O(n); исходный не меняется (читается поиском)."""
+        added.sort()
+        return list(heapq.merge((e for e in entries if e not in removed), added))
+
+    def _drop(self, org_id: int) -> None:
+        record = self._records.pop(org_id, None)
+        key = self._keys.pop(org_id, "")
+        if record is None:
+            return
+
+        self._entries_bytes -= self._entry_bytes(key, *self._entries(org_id, record, key))
+        if self._ngrams_enabled:
+            for gram in _ngrams(key):
+                ids = self._ngrams.get(gram)
+                if ids and org_id in ids:
+                    ids.discard(org_id)
+                    self._postings -= 1
+                    if not ids:
+                        del self._ngrams[gram]
+
+    def _put(self, record: dict, key: str, words: list, inns: list) -> None:
+        self._records[record["id"]] = record
+        self._keys[record["id"]] = key
+        self._entries_bytes += self._entry_bytes(key, words, inns)
+        if self._ngrams_enabled:
+            for gram in _ngrams(key):
+                ids = self._ngrams.setdefault(gram, set())
+                if record["id"] not in ids:
+                    ids.add(record["id"])
+                    self._postings += 1
+
+    def _enforce_budget(self) -> None:
+        if self._ngrams_enabled and self._estimate_bytes() > self.memory_budget_bytes:
+            logger.warning(
+                "Org directory exceeds memory budget (%s MB), substring search disabled",
+                settings.ORG_DIRECTORY_MEMORY_MB,
+            )
+            self._ngrams = {}
+            self._postings = 0
+            self._ngrams_enabled = False
+
+    async def _apply(self, records: list[dict], removed_ids: Iterable[int] = ()) -> None:
+        """Заменяет записи records и удаляет removed_ids одним слиянием."""
+        records = list({record["id"]: record for record in records}.values())
+        changed = {record["id"] for record in records} | set(removed_ids)
+        if not changed:
+            return
+
+        async with self._lock:
+            if self._loading:
+                # Снимок load() мог быть прочитан до изменения — перечитаем после
+                self._pending_ids |= changed
+                return
+
+            old_words, old_inns, old_ranks = set(), set(), set()
+            for org_id in changed:
+                if org_id in self._records:
+                    record = self._records[org_id]
+                    words, inns = self._entries(org_id, record, self._keys[org_id])
+                    old_words.update(words)
+                    old_inns.update(inns)
+                    old_ranks.add(self._rank_entry(record))
+
+            new = []
+            new_keys = {}
+            new_words, new_inns, new_ranks = [], [], []
+            for record in records:
+                key = new_keys[record["id"]] = self._key(record)
+                words, inns = self._entries(record["id"], record, key)
+                new.append((record, key, words, inns))
+                new_words.extend(words)
+                new_inns.extend(inns)
+                new_ranks.append(self._rank_entry(record))
+
+            def merge() -> tuple:
+                by_rank = self._merge(self._by_rank, old_ranks, new_ranks)
+                text, offsets = self._layout(
+                    by_rank, lambda org_id: new_keys[org_id] if org_id in new_keys else self._keys[org_id]
+                )
+                return (
+                    self._merge(self._words, old_words, new_words),
+                    self._merge(self._inns, old_inns, new_inns),
+                    (by_rank, text, offsets),
+                )
+
+            words, inns, ranked = await asyncio.to_thread(merge)
+
+            # Дальше без await: поиск видит либо старое, либо новое состояние
+            for org_id in changed:
+                self._drop(org_id)
+            for record, key, record_words, record_inns in new:
+                self._put(record, key, record_words, record_inns)
+            self._words, self._inns = words, inns
+            self._by_rank, self._text, self._offsets = ranked
+            self._enforce_budget()
+
+    async def _replace(self, records: list[dict]) -> None:
+        by_id, keys, words, inns, ranked, ngrams, entries_bytes, postings = (
+            await asyncio.to_thread(self._build, records)
+        )
+        async with self._lock:
+            self._records, self._keys, self._words, self._inns = by_id, keys, words, inns
+            self._by_rank, self._text, self._offsets = ranked
+            self._ngrams, self._ngrams_enabled = ngrams, True
+            self._entries_bytes, self._postings = entries_bytes, postings
+            self._enforce_budget()
+
+    async def load(self) -> None:
+        """
+        Полная загрузка; запускается в фоне при старте, до её окончания
+        автодополнение идёт в SQL. Изменения, пришедшие во время загрузки,
+        перечитываются после неё.
+        """
+        self._loading = True
+        try:
+            async with async_session_maker() as session:  # type: ignore
+                res = await session.execute(
+                    select(
+                        Orgs.id, Orgs.full_name, Orgs.short_name, Orgs.inn, Orgs.region
+                    )
+                )
+                records = [self._record(row) for row in res.all()]
+
+            await self._replace(records)
+        finally:
+            self._loading = False
+
+        self.loaded = True
+        logger.info(
+            "Org directory loaded: %s orgs, ~%.1f MB",
+            len(self._records),
+            self._estimate_bytes() / 1024 / 1024,
+        )
+
+        pending, self._pending_ids = self._pending_ids, set()
+        await self.refresh_ids(list(pending))
+
+    async def upsert(self, orgs: Iterable) -> None:
+        await self._apply([self._record(org) for org in orgs])
+
+    async def refresh_ids(self, org_ids: list[int]) -> None:
+        org_ids = [org_id for org_id in org_ids if org_id]
+        if not org_ids:
+            return
+
+        async with async_session_maker() as session:  # type: ignore
+            res = await session.execute(
+                select(
+                    Orgs.id, Orgs.full_name, Orgs.short_name, Orgs.inn, Orgs.region
+                ).where(Orgs.id.in_(org_ids))
+            )
+            rows = res.all()
+
+        await self._apply(
+            [self._record(row) for row in rows],
+            removed_ids=set(org_ids) - {row.id for row in rows},
+        )
+
+    # --- поиск ---
+
+    @staticmethod
+    def _prefix_range(entries: list[tuple[str, int]], prefix: str) -> tuple[int, int]:
+        start = bisect.bisect_left(entries, (prefix, -1))
+        end = bisect.bisect_left(entries, (prefix + "\uffff", -1), start)
+        return start, end
+
+    @staticmethod
+    def _prefix_ids(entries: list[tuple[str, int]], prefix: str) -> set[int]:
+        start, end = OrgDirectory._prefix_range(entries, prefix)
+        return {org_id for _, org_id in entries[start:end]}
+
+    def _candidates(self, q: str) -> Optional[set[int]]:
+        """Кандидаты по индексам; None — запрос слишком широкий, см. _scan."""
+        if q.isdigit():
+            return self._prefix_ids(self._inns, q) | self._prefix_ids(self._words, q)
+
+        if self._ngrams_enabled and len(q) >= NGRAM:
+            postings = sorted(
+                (self._ngrams.get(gram, set()) for gram in _ngrams(q)), key=len
+            )
+            if not postings or not postings[0]:
+                return set()
+            if len(postings[0]) > SCAN_THRESHOLD:
+                return None
+            ids = set(postings[0]).intersection(*postings[1:])
+            return {org_id for org_id in ids if q in self._keys[org_id]}
+
+        ranges = sorted(
+            (self._prefix_range(self._words, token) for token in q.split()),
+            key=lambda r: r[1] - r[0],
+        )
+        if ranges[0][1] - ranges[0][0] > SCAN_THRESHOLD:
+            return None
+
+        ids = None
+        for start, end in ranges:
+            token_ids = {org_id for _, org_id in self._words[start:end]}
+            ids = token_ids if ids is None else ids & token_ids
+            if not ids:
+                return set()
+        return ids or set()
+
+    def _rank(self, q: str, ids: set[int], limit: int) -> list[int]:
+        def rank(org_id: int):
+            key = self._keys[org_id]
+            if key.startswith(q):
+                position = 0
+            elif f" {q}" in key:
+                position = 1
+            else:
+                position = 2
+            return position, len(self._records[org_id]["full_name"] or ""), org_id
+
+        return heapq.nsmallest(limit, ids, key=rank)
+
+    def _scan(self, q: str, limit: int, region: Optional[str]) -> list[int]:
+        """
+        Тот же порядок, что у _rank, без сбора кандидатов: по одному проходу
+        str.find на позицию (начало ключа, начало слова, подстрока). Вхождения
+        идут в порядке ранга, поэтому каждый проход останавливается на limit.
+        """
+        text, offsets, by_rank = self._text, self._offsets, self._by_rank
+        patterns = [f"\n {q}", f" {q}"]
+        tokens = []
+        if self._ngrams_enabled and len(q) >= NGRAM:
+            patterns.append(q)
+        else:
+            # Без триграмм каждое слово запроса — префикс слова, не обязательно подряд
+            tokens = [f" {token}" for token in q.split()]
+            if len(tokens) > 1:
+                patterns.append(tokens[0])
+
+        found, seen = [], set()
+        for pattern in patterns:
+            if len(found) >= limit:
+                break
+            position = text.find(pattern)
+            while position != -1 and len(found) < limit:
+                i = bisect.bisect_right(offsets, position) - 1
+                end = offsets[i + 1] if i + 1 < len(offsets) else len(text)
+                org_id = by_rank[i][1]
+                if (
+                    org_id not in seen
+                    and all(token in text[offsets[i] + 1 : end] for token in tokens)
+                    and (not region or self._records[org_id]["region"] == region)
+                ):
+                    seen.add(org_id)
+                    found.append(org_id)
+                position = text.find(pattern, end)
+        return found
+
+    def search(self, q: str, limit: int = 10, region: Optional[str] = None) -> list[dict]:
+        start = time.perf_counter()
+        q = normalize(q)
+        if not q:
+            return []
+
+        ids = self._candidates(q)
+        if ids is None:
+            found = self._scan(q, limit, region)
+        else:
+            if region:
+                ids = {org_id for org_id in ids if self._records[org_id]["region"] == region}
+            found = self._rank(q, ids, limit)
+
+        result = [self._records[org_id] for org_id in found]
+        AUTOCOMPLETE_LATENCY.observe(time.perf_counter() - start)
+        return result
+
+
+org_directory = OrgDirectory(
+    memory_budget_bytes=settings.ORG_DIRECTORY_MEMORY_MB * 1024 * 1024
+)
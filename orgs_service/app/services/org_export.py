@@ -0,0 +1,101 @@
+import asyncio
+import csv
+import io
+import os
+import tempfile
+from typing import AsyncIterator, Optional
+
+from openpyxl import Workbook
+from sqlalchemy import select
+
+from db.models.orgs import Orgs
+from db.session import async_session_maker
+
+
+EXPORT_BATCH_SIZE = 1000
+FILE_CHUNK_SIZE = 64 * 1024
+
+EXPORT_COLUMNS = [
+    "id",
+    "full_name",
+    "short_name",
+    "inn",
+    "region",
+    "type",
+    "star",
+    "knowledge_skills_z",
+    "knowledge_skills_v",
+    "digital_env_e",
+    "data_protection_z",
+    "data_analytics_d",
+    "automation_a",
+    "members_count",
+    "teams_count",
+]
+
+
+async def _iter_batches(region: Optional[str]) -> AsyncIterator[list[tuple]]:
+    """
+    Читает organizations серверным курсором пачками по EXPORT_BATCH_SIZE.
+    Счётчики берутся из денормализованных колонок — без обращений к другим сервисам.
+    Своя сессия: зависимость get_db закрывается раньше, чем стримится ответ.
+    """
+    stmt = select(*(getattr(Orgs, name) for name in EXPORT_COLUMNS)).order_by(Orgs.id)
+    if region:
+        stmt = stmt.where(Orgs.region == region)
+
+    async with async_session_maker() as session:  # type: ignore
+        result = await session.stream(
+            stmt.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for partition in result.partitions():
+            yield [
+                tuple(value.value if hasattr(value, "value") else value for value in row)
+                for row in partition
+            ]
+
+
+async def stream_csv(region: Optional[str] = None) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM, чтобы Excel открыл кириллицу в UTF-8
+    writer.writerow(EXPORT_COLUMNS)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+    async for batch in _iter_batches(region):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _append_rows(sheet, rows: list[tuple]) -> None:
+    for row in rows:
+        sheet.append(row)
+
+
+async def stream_xlsx(region: Optional[str] = None) -> AsyncIterator[bytes]:
+    """
+    XLSX — zip-архив, его нельзя отдавать до закрытия книги. Строки пишутся
+    в write_only-книгу (openpyxl сбрасывает их во временные файлы), затем
+    готовый файл стримится кусками и удаляется.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("organizations")
+    sheet.append(EXPORT_COLUMNS)
+
+    # Сериализация строк в XML и сброс на диск — CPU и блокирующий I/O,
+    # поэтому каждая пачка пишется в потоке; пачки идут строго по очереди
+    async for batch in _iter_batches(region):
+        await asyncio.to_thread(_append_rows, sheet, batch)
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        await asyncio.to_thread(workbook.save, path)
+        with open(path, "rb") as f:
+            while chunk := await asyncio.to_thread(f.read, FILE_CHUNK_SIZE):
+                yield chunk
+    finally:
+        os.remove(path)
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pandas as pd
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models.import_job import OrgImportJob
+from db.parser import FLOAT_COLUMNS, IMPORT_COLUMNS, iter_excel_chunks, normalize_chunk
+from db.session import async_session_maker, engine
+from services.org_directory import org_directory
+from services.rabbitmq import publish_orgs_updated
+
+
+logger = logging.getLogger(__name__)
+
+# Пространство advisory-блокировок импорта: один воркер на задачу
+IMPORT_LOCK_NS = 0x0126
+
+STAGE_DDL = f"""
+CREATE TEMP TABLE org_import_stage (
+    full_name text,
+    short_name text,
+    inn bigint,
+    region text,
+    type text,
+    {", ".join(f"{c} double precision" for c in FLOAT_COLUMNS)}
+) ON COMMIT DROP
+"""
+
+UPDATED_COLUMNS = [c for c in IMPORT_COLUMNS if c != "inn"]
+
+UPSERT_SQL = f"""
+INSERT INTO organizations ({", ".join(IMPORT_COLUMNS)})
+SELECT full_name, short_name, inn, region, type::org_type_enum,
+       {", ".join(FLOAT_COLUMNS)}
+FROM org_import_stage
+ON CONFLICT (inn) DO UPDATE SET
+    {", ".join(f"{c} = EXCLUDED.{c}" for c in UPDATED_COLUMNS)}
+WHERE ({", ".join(f"organizations.{c}" for c in UPDATED_COLUMNS)})
+    IS DISTINCT FROM ({", ".join(f"EXCLUDED.{c}" for c in UPDATED_COLUMNS)})
+RETURNING id, full_name, short_name, inn, region, (xmax = 0) AS inserted
+"""
+
+_running: dict[int, asyncio.Task] = {}
+
+
+def job_to_dict(job: OrgImportJob) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "excel_path": job.excel_path,
+        "sheet_name": job.sheet_name,
+        "chunk_size": job.chunk_size,
+        "rows_processed": job.rows_processed,
+        "inserted": job.inserted,
+        "updated": job.updated,
+        "skipped": job.skipped,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+
+
+async def create_job(
+    db: AsyncSession, excel_path: str, sheet_name: str, chunk_size: int
+) -> OrgImportJob:
+    job = OrgImportJob(
+        excel_path=excel_path, sheet_name=str(sheet_name), chunk_size=chunk_size
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def get_job(db: AsyncSession, job_id: int) -> OrgImportJob:
+    job = await db.get(OrgImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+
+def start_job(job_id: int) -> bool:
+    """Запускает задачу в фоне этого воркера; False, если она уже выполняется здесь."""
+    task = _running.get(job_id)
+    if task and not task.done():
+        return False
+
+    task = asyncio.create_task(run_job(job_id))
+    _running[job_id] = task
+    task.add_done_callback(lambda t: _running.pop(job_id, None))
+    return True
+
+
+async def resume_interrupted_jobs() -> None:
+    """Подхватывает задачи, прерванные перезапуском (статус running без владельца)."""
+    async with async_session_maker() as session:  # type: ignore
+        res = await session.execute(
+            select(OrgImportJob.id).where(OrgImportJob.status == "running")
+        )
+        job_ids = res.scalars().all()
+
+    for job_id in job_ids:
+        start_job(job_id)
+
+
+def _stage_records(df: pd.DataFrame) -> list[tuple]:
+    return list(
+        df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    )
+
+
+async def _upsert_chunk(pg, job_id: int, row_number: int, df: pd.DataFrame, skipped: int):
+    async with pg.transaction():
+        changed = []
+        if not df.empty:
+            await pg.execute(STAGE_DDL)
+            await pg.copy_records_to_table(
+                "org_import_stage", records=_stage_records(df), columns=IMPORT_COLUMNS
+            )
+            changed = await pg.fetch(UPSERT_SQL)
+
+        inserted = sum(1 for row in changed if row["inserted"])
+        await pg.execute(
+            """
+            UPDATE org_import_jobs
+            SET rows_processed = $2,
+                inserted = inserted + $3,
+                updated = updated + $4,
+                skipped = skipped + $5,
+                updated_at = now()
+            WHERE id = $1
+            """,
+            job_id,
+            row_number,
+            inserted,
+            len(changed) - inserted,
+            skipped,
+        )
+
+    return [SimpleNamespace(**dict(row)) for row in changed]
+
+
+async def run_job(job_id: int) -> None:
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        pg = raw.driver_connection
+
+        if not await pg.fetchval(
+            "SELECT pg_try_advisory_lock($1, $2)", IMPORT_LOCK_NS, job_id
+        ):
+            logger.info("Import job %s is already running elsewhere", job_id)
+            return
+
+        try:
+            job = await pg.fetchrow("SELECT * FROM org_import_jobs WHERE id = $1", job_id)
+            if not job or job["status"] == "completed":
+                return
+
+            await pg.execute(
+                "UPDATE org_import_jobs SET status = 'running', error = NULL, "
+                "updated_at = now() WHERE id = $1",
+                job_id,
+            )
+            logger.info(
+                "Import job %s started from row %s", job_id, job["rows_processed"]
+            )
+
+            sheet_name = job["sheet_name"]
+            chunks = iter_excel_chunks(
+                job["excel_path"],
+                sheet_name=int(sheet_name) if sheet_name.isdigit() else sheet_name,
+                chunk_size=job["chunk_size"],
+                start_row=job["rows_processed"],
+            )
+
+            while True:
+                item = await asyncio.to_thread(next, chunks, None)
+                if item is None:
+                    break
+
+                row_number, raw_df = item
+                df, skipped = await asyncio.to_thread(normalize_chunk, raw_df)
+                changed = await _upsert_chunk(pg, job_id, row_number, df, skipped)
+
+                if changed:
+                    await org_directory.upsert(changed)
+                    await publish_orgs_updated(changed)
+
+            await pg.execute(
+                "UPDATE org_import_jobs SET status = 'completed', updated_at = now() "
+                "WHERE id = $1",
+                job_id,
+            )
+            logger.info("Import job %s completed", job_id)
+
+        except Exception as e:
+            logger.error("Import job %s failed: %s", job_id, e, exc_info=True)
+            await pg.execute(
+                "UPDATE org_import_jobs SET status = 'failed', error = $2, "
+                "updated_at = now() WHERE id = $1",
+                job_id,
+                str(e),
+            )
+        finally:
+            await pg.execute(
+                "SELECT pg_advisory_unlock($1, $2)", IMPORT_LOCK_NS, job_id
+            )
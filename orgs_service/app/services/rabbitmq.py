@@ -0,0 +1,139 @@
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+import aio_pika
+from aio_pika.abc import AbstractRobustConnection
+
+from config import settings
+from db.session import async_session_maker
+
+
+logger = logging.getLogger(__name__)
+
+rabbitmq_connection: AbstractRobustConnection | None = None
+
+
+async def init_rabbitmq():
+    global rabbitmq_connection
+    if not settings.RABBITMQ_URL:
+        logger.warning("RABBITMQ_URL is not set, org events will not be published")
+        return
+
+    try:
+        rabbitmq_connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
+        logger.info("RabbitMQ connection established")
+    except Exception as e:
+        logger.error(f"Failed to connect to RabbitMQ: {e}")
+
+
+async def close_rabbitmq():
+    global rabbitmq_connection
+    if rabbitmq_connection:
+        await rabbitmq_connection.close()
+        rabbitmq_connection = None
+
+
+async def publish_orgs_updated(orgs: list) -> None:
+    """
+    Публикует org.updated для изменённых организаций.
+    Подписчики (teams_service) сбрасывают кэш и обновляют денормализованные названия.
+    """
+    if not rabbitmq_connection or not orgs:
+        return
+
+    try:
+        channel = await rabbitmq_connection.channel()
+        exchange = await channel.declare_exchange(
+            "org_events", type="direct", durable=True
+        )
+
+        message_data = {
+            "event_type": "org.updated",
+            "orgs": [
+                {
+                    "id": org.id,
+                    "full_name": org.full_name,
+                    "short_name": org.short_name,
+                }
+                for org in orgs
+            ],
+            "timestamp": str(datetime.utcnow()),
+        }
+
+        await exchange.publish(
+            aio_pika.Message(
+                body=json.dumps(message_data).encode(),
+                headers={"event_type": "org.updated"},
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key="org.updated",
+        )
+        await channel.close()
+        logger.info("[PUBLISHER] org.updated published for %s orgs", len(orgs))
+
+    except Exception as e:
+        logger.error("[PUBLISHER] Failed to publish org.updated: %s", e, exc_info=True)
+
+
+async def consume_org_directory_updates(rabbitmq_url: str):
+    """Эксклюзивная очередь воркера: обновляет справочник автодополнения по org.updated."""
+    from services.org_directory import org_directory
+
+    connection = await aio_pika.connect_robust(rabbitmq_url)
+    channel = await connection.channel()
+    exchange = await channel.declare_exchange("org_events", type="direct", durable=True)
+
+    queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+    await queue.bind(exchange, routing_key="org.updated")
+
+    async with queue.iterator() as queue_iter:
+        async for message in queue_iter:
+            async with message.process():
+                data = json.loads(message.body.decode())
+                org_ids = [org.get("id") for org in data.get("orgs") or []]
+                await org_directory.refresh_ids(org_ids)
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """timestamp в событиях — str(datetime.utcnow()), т.е. наивное время UTC."""
+    try:
+        timestamp = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+
+async def consume_org_counts_events(rabbitmq_url: str):
+    """Применяет org.counts_changed от user_profile и teams_service к счётчикам организаций."""
+    from cruds.orgs_crud import OrgsCRUD
+
+    connection = await aio_pika.connect_robust(rabbitmq_url)
+    channel = await connection.channel()
+    exchange = await channel.declare_exchange("org_events", type="direct", durable=True)
+
+    queue = await channel.declare_queue("orgs_counts_queue", durable=True)
+    await queue.bind(exchange, routing_key="org.counts_changed")
+
+    logger.info("[CONSUMER] Waiting for org.counts_changed events")
+
+    async with queue.iterator() as queue_iter:
+        async for message in queue_iter:
+            try:
+                data = json.loads(message.body.decode())
+                counts = data.get("counts") or []
+
+                async with async_session_maker() as session:  # type: ignore
+                    updated = await OrgsCRUD.apply_counts(
+                        session, counts, _parse_timestamp(data.get("timestamp"))
+                    )
+
+                logger.info("[CONSUMER] Org counters updated for %s rows", updated)
+                await message.ack()
+
+            except Exception as e:
+                logger.error(
+                    "[CONSUMER] Error processing org.counts_changed: %s", e, exc_info=True
+                )
+                await message.nack(requeue=not message.redelivered)
@@ -0,0 +1,23 @@
+import asyncio
+import logging
+
+from config import settings
+from db.session import async_session_maker
+
+
+logger = logging.getLogger(__name__)
+
+
+async def run_region_stats_rollup() -> None:
+    """Периодически сворачивает дельты region_stats_deltas в region_stats."""
+    from cruds.orgs_crud import OrgsCRUD
+
+    while True:
+        await asyncio.sleep(settings.REGION_STATS_ROLLUP_INTERVAL)
+        try:
+            async with async_session_maker() as session:  # type: ignore
+                await OrgsCRUD.rollup_region_stats(session)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Region stats rollup failed: {e}")
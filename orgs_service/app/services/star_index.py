@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from config import settings
+from db.models.scheduler_watermark import SchedulerWatermark
+from db.session import advisory_lock, async_session_maker
+from services.org_counts import get_http_client
+
+
+logger = logging.getLogger(__name__)
+
+# Буквы ЗВЕЗДА: категория проекта -> подындекс организации
+CATEGORY_COLUMNS = {
+    "KNOWLEDGE": "knowledge_skills_z",
+    "INTERACTION": "knowledge_skills_v",
+    "ENVIRONMENT": "digital_env_e",
+    "PROTECTION": "data_protection_z",
+    "DATA": "data_analytics_d",
+    "AUTOMATION": "automation_a",
+}
+
+INDEX_COLUMNS = list(CATEGORY_COLUMNS.values()) + ["star"]
+
+# Один планировщик на все воркеры
+STAR_INDEX_LOCK_ID = 0x5EA1
+
+# Запас на проверки, закоммиченные уже после снимка as_of
+WATERMARK_OVERLAP = timedelta(minutes=1)
+
+WATERMARK_NAME = "star_index"
+
+
+def compute_indices(rows: list[dict]) -> pd.DataFrame:
+    """
+    Считает индексы сразу для всех организаций из строк «проект» projects_service.
+    Вклад проекта = star_index × доля принятых задач; подындекс — сумма вкладов
+    по категории, star — среднее шести подындексов.
+    """
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return pd.DataFrame(columns=["id"] + INDEX_COLUMNS)
+
+    df = df[df["star_category"].isin(list(CATEGORY_COLUMNS))].copy()
+    if df.empty:
+        return pd.DataFrame(columns=["id"] + INDEX_COLUMNS)
+
+    total = df["tasks_total"].where(df["tasks_total"] > 0)
+    df["score"] = (df["star_index"] * df["tasks_accepted"] / total).fillna(0.0)
+
+    indices = (
+        df.pivot_table(
+            index="organization_id",
+            columns="star_category",
+            values="score",
+            aggfunc="sum",
+            fill_value=0.0,
+        )
+        .reindex(columns=list(CATEGORY_COLUMNS), fill_value=0.0)
+        .rename(columns=CATEGORY_COLUMNS)
+    )
+    indices["star"] = indices.mean(axis=1)
+
+    return indices.round(4).rename_axis("id").reset_index()
+
+
+async def fetch_org_results(since: Optional[datetime] = None) -> dict:
+    params = {"since": since.isoformat()} if since else None
+    r = await get_http_client().get(
+        f"{settings.PROJECTS_SERVICE_URL}/zvezda/org_results",
+        params=params,
+        timeout=30,
+    )
+    r.raise_for_status()
+    return r.json()
+
+
+async def load_watermark() -> Optional[datetime]:
+    async with async_session_maker() as session:  # type: ignore
+        return await session.scalar(
+            select(SchedulerWatermark.watermark).where(
+                SchedulerWatermark.name == WATERMARK_NAME
+            )
+        )
+
+
+async def store_watermark(as_of: datetime) -> None:
+    """Отметка только растёт: ручной полный пересчёт не откатывает планировщик назад."""
+    async with async_session_maker() as session:  # type: ignore
+        stmt = pg_insert(SchedulerWatermark).values(name=WATERMARK_NAME, watermark=as_of)
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[SchedulerWatermark.name],
+                set_={
+                    "watermark": func.greatest(
+                        SchedulerWatermark.watermark, stmt.excluded.watermark
+                    )
+                },
+            )
+        )
+        await session.commit()
+
+
+async def recompute_indices(since: Optional[datetime] = None) -> tuple[datetime, int]:
+    """
+    Полный (since=None) или инкрементальный пересчёт. Организации без проектов
+    не трогаются — у них остаются значения из Excel-импорта.
+    """
+    from cruds.orgs_crud import OrgsCRUD
+
+    data = await fetch_org_results(since)
+    indices = await asyncio.to_thread(compute_indices, data["rows"])
+
+    async with async_session_maker() as session:  # type: ignore
+        updated = await OrgsCRUD.apply_indices(session, indices)
+
+    as_of = datetime.fromisoformat(data["as_of"])
+    await store_watermark(as_of)
+    return as_of, updated
+
+
+async def run_star_index_scheduler() -> None:
+    while True:
+        try:
+            # Блокировка на autocommit-соединении: HTTP-запрос и расчёт в pandas
+            # не держат открытую транзакцию
+            async with advisory_lock(STAR_INDEX_LOCK_ID) as locked:
+                if locked:
+                    # Отметка в таблице: после рестарта пересчёт остаётся инкрементальным
+                    watermark = await load_watermark()
+                    since = watermark - WATERMARK_OVERLAP if watermark else None
+                    _, updated = await recompute_indices(since)
+                    if updated:
+                        logger.info(f"Star indices recomputed for {updated} orgs")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Star index recompute failed: {e}")
+
+        await asyncio.sleep(settings.STAR_INDEX_INTERVAL)
@@ -0,0 +1,66 @@
+"""
+Тесты orgs_service. Запуск из каталога orgs_service:
+
+    pip install -r requirements.txt pytest pytest-asyncio
+    DB_HOST=localhost DB_PORT=5432 DB_USER=postgres DB_PASS=0 DB_NAME=orgs_test pytest tests
+
+Схема пересоздаётся в указанной базе на каждый тест. Тесты, которым нужен
+Postgres, пропускаются, если база недоступна. Dadata всегда подменяется
+локальной заглушкой (DADATA_STUB=true).
+"""
+
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "app"))
+
+for key, value in {
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_USER": "postgres",
+    "DB_PASS": "0",
+    "DB_NAME": "orgs_test",
+    "DADATA_TOKEN": "test-token",
+    "DADATA_SECRET": "test-secret",
+    "DADATA_STUB": "true",
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+}.items():
+    os.environ.setdefault(key, value)
+
+from db.base import Base  # noqa: E402
+from db.models import (  # noqa: E402,F401
+    catalog_version,
+    dadata_cache,
+    import_job,
+    orgs,
+    region_stats,
+    scheduler_watermark,
+)
+from db.session import engine  # noqa: E402
+
+
+@pytest_asyncio.fixture
+async def db_engine():
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+    except (OSError, ConnectionError) as e:
+        await engine.dispose()
+        pytest.skip(f"Postgres is not available: {e}")
+    except DBAPIError as e:
+        # Индексы поиска требуют расширения pg_trgm
+        await engine.dispose()
+        pytest.skip(f"Postgres without pg_trgm: {e.orig}")
+
+    yield engine
+
+    # asyncpg-соединения привязаны к циклу событий теста
+    await engine.dispose()
@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import select, text
+
+from cruds import orgs_crud
+from cruds.orgs_crud import OrgsCRUD
+from db.models.org_enum import OrgType
+from db.models.orgs import Orgs
+from db.session import advisory_lock, async_session_maker, engine
+from services.org_counts import ORG_COUNTS_LOCK_ID
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _held_advisory_locks() -> int:
+    async with engine.connect() as conn:
+        return await conn.scalar(
+            text("SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND granted")
+        )
+
+
+async def test_lock_survives_batched_commits_and_is_released(db_engine, monkeypatch):
+    async with async_session_maker() as session:
+        session.add_all(
+            [
+                Orgs(
+                    full_name=f"Университет {i}",
+                    short_name=f"У{i}",
+                    inn=7700000000 + i,
+                    region="Москва",
+                    type=list(OrgType)[0],
+                )
+                for i in range(1, 6)
+            ]
+        )
+        await session.commit()
+
+    async def counts(org_ids):
+        return {org_id: 3 for org_id in org_ids}
+
+    monkeypatch.setattr(orgs_crud, "fetch_members_counts", counts)
+    monkeypatch.setattr(orgs_crud, "fetch_teams_counts", counts)
+
+    async with advisory_lock(ORG_COUNTS_LOCK_ID) as locked:
+        assert locked
+        # Сессия коммитит после каждой пачки и меняет соединения пула
+        async with async_session_maker() as session:
+            await OrgsCRUD.refresh_org_counters(session, batch_size=2)
+            assert set(await session.scalars(select(Orgs.members_count))) == {3}
+
+        async with advisory_lock(ORG_COUNTS_LOCK_ID) as other:
+            assert not other
+
+    assert await _held_advisory_locks() == 0
+    async with advisory_lock(ORG_COUNTS_LOCK_ID) as locked:
+        assert locked
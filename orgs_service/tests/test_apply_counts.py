@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+
+from cruds.orgs_crud import HIDDEN_COLUMNS, OrgsCRUD
+from db.models.org_enum import OrgType
+from db.models.orgs import Orgs
+from db.session import async_session_maker
+from services.rabbitmq import _parse_timestamp
+
+pytestmark = pytest.mark.asyncio
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest_asyncio.fixture
+async def org_id(db_engine):
+    async with async_session_maker() as session:
+        org = Orgs(
+            full_name="Университет",
+            short_name="У",
+            inn=7700000001,
+            region="Москва",
+            type=list(OrgType)[0],
+        )
+        session.add(org)
+        await session.commit()
+        return org.id
+
+
+async def _counts(org_id: int) -> tuple[int, int]:
+    async with async_session_maker() as session:
+        org = await session.get(Orgs, org_id)
+        return org.members_count, org.teams_count
+
+
+async def _apply(counts: list[dict], counted_at: datetime) -> int:
+    async with async_session_maker() as session:
+        return await OrgsCRUD.apply_counts(session, counts, counted_at)
+
+
+async def test_older_snapshot_does_not_overwrite_newer(org_id):
+    assert await _apply([{"id": org_id, "members_count": 5}], NOW) == 1
+    assert await _apply([{"id": org_id, "members_count": 3}], NOW - timedelta(seconds=1)) == 0
+
+    assert await _counts(org_id) == (5, 0)
+
+
+async def test_counters_are_ordered_independently(org_id):
+    await _apply([{"id": org_id, "members_count": 5}], NOW)
+    await _apply([{"id": org_id, "teams_count": 2}], NOW - timedelta(minutes=1))
+
+    assert await _counts(org_id) == (5, 2)
+
+
+async def test_publisher_timestamp_is_naive_utc():
+    assert _parse_timestamp(str(NOW.replace(tzinfo=None))) == NOW
+    assert _parse_timestamp(None) is None
+    assert _parse_timestamp("garbage") is None
+
+
+async def test_detail_serves_row_counters_without_http(org_id, monkeypatch):
+    from services import org_counts
+
+    async def unexpected(*args, **kwargs):
+        raise AssertionError("org detail must not call user_profile/teams_service")
+
+    monkeypatch.setattr(org_counts, "_fetch_counts", unexpected)
+    await _apply([{"id": org_id, "members_count": 5, "teams_count": 2}], NOW)
+
+    async with async_session_maker() as session:
+        org = await OrgsCRUD.get_org_by_id(session, org_id)
+
+    assert (org.members_count, org.teams_count) == (5, 2)
+
+
+async def test_batch_body_hides_columns_ignored_by_version_trigger(org_id):
+    import importlib.util
+    from pathlib import Path
+
+    path = next(
+        Path(__file__).parent.parent.glob("app/alembic/versions/b9d1e3f5a7c2_*.py")
+    )
+    spec = importlib.util.spec_from_file_location("bump_versions", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    await _apply([{"id": org_id, "members_count": 5}], NOW)
+    async with async_session_maker() as session:
+        body = (await OrgsCRUD.get_orgs_by_ids(session, [org_id], with_counts=True))[org_id]
+
+    # Изменение этих колонок не сдвигает updated_at, значит их нет и в ответе
+    assert set(migration.IGNORED_COLUMNS) == set(HIDDEN_COLUMNS)
+    assert not set(migration.IGNORED_COLUMNS) & body.keys()
+    assert body["members_count"] == 5
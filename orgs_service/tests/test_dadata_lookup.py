@@ -0,0 +1,123 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import update
+
+import cruds.orgs_crud
+from cruds.orgs_crud import OrgsCRUD
+from db.models.dadata_cache import DadataCache
+from db.models.org_enum import OrgType
+from db.models.orgs import Orgs
+from db.session import async_session_maker
+from services.dadata_lookup import DadataLookup, DadataStub
+
+pytestmark = pytest.mark.asyncio
+
+INN = 7707083893
+
+
+@pytest_asyncio.fixture
+async def stub(db_engine, monkeypatch):
+    stub = DadataStub(delay=0.01)
+    lookup = DadataLookup(client=stub, ttl=timedelta(days=30), concurrency=5)
+    monkeypatch.setattr(cruds.orgs_crud, "dadata_lookup", lookup)
+    return stub
+
+
+async def test_existing_org_does_not_call_dadata(stub):
+    async with async_session_maker() as session:
+        session.add(
+            Orgs(
+                full_name="Университет",
+                short_name="У",
+                inn=INN,
+                region="Москва",
+                type=list(OrgType)[0],
+            )
+        )
+        await session.commit()
+
+        org = await OrgsCRUD.create_org(session, INN, list(OrgType)[0])
+
+    assert org.full_name == "Университет"
+    assert stub.calls == 0
+
+
+async def test_responses_are_cached_until_ttl(stub):
+    lookup = cruds.orgs_crud.dadata_lookup
+
+    first = await lookup.find_party(INN)
+    assert await lookup.find_party(INN) == first
+    assert stub.calls == 1
+
+    async with async_session_maker() as session:
+        await session.execute(
+            update(DadataCache).values(
+                fetched_at=DadataCache.fetched_at - timedelta(days=31)
+            )
+        )
+        await session.commit()
+
+    await lookup.find_party(INN)
+    assert stub.calls == 2
+
+
+async def test_not_found_is_cached(stub):
+    stub.synthesize = False
+    lookup = cruds.orgs_crud.dadata_lookup
+
+    assert await lookup.find_party(INN) is None
+    assert await lookup.find_party(INN) is None
+    assert stub.calls == 1
+
+
+async def test_concurrent_lookups_share_one_call(stub):
+    lookup = cruds.orgs_crud.dadata_lookup
+
+    results = await asyncio.gather(*(lookup.find_party(INN) for _ in range(20)))
+
+    assert stub.calls == 1
+    assert all(result == results[0] for result in results)
+
+
+async def test_waiters_survive_cancelled_lookup(stub):
+    lookup = cruds.orgs_crud.dadata_lookup
+    stub.delay = 0.05
+
+    leader = asyncio.create_task(lookup.find_party(INN))
+    await asyncio.sleep(0.02)
+    waiter = asyncio.create_task(lookup.find_party(INN))
+    await asyncio.sleep(0.01)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+    assert await asyncio.wait_for(waiter, 1) is not None
+    assert stub.calls == 2
+
+
+async def test_bulk_lookup_bounds_concurrency(stub):
+    lookup = DadataLookup(client=stub, ttl=timedelta(days=30), concurrency=3)
+    active = peak = 0
+    find_by_id = stub.find_by_id
+
+    async def tracked(*args, **kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            return await find_by_id(*args, **kwargs)
+        finally:
+            active -= 1
+
+    stub.find_by_id = tracked
+    inns = [7700000000 + i for i in range(12)]
+
+    result = await lookup.find_parties(inns)
+
+    assert set(result) == set(inns)
+    assert all(result.values())
+    assert peak <= 3
@@ -0,0 +1,166 @@
+"""
+Справочник автодополнения: инкрементальные обновления и бенчмарк задержки
+на нажатие клавиши (p99) без Postgres.
+"""
+
+import asyncio
+import os
+import random
+import time
+
+import pytest
+from openpyxl import load_workbook
+
+from services.org_directory import OrgDirectory
+
+pytestmark = pytest.mark.asyncio
+
+CATALOG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "app", "db", "result_full.xlsx"
+)
+# Справочник из репозитория, размноженный с запасом на рост
+CATALOG_COPIES = 10
+KEYSTROKE_P99_BUDGET = 0.01
+
+KINDS = ["университет", "колледж", "школа", "институт", "лицей", "академия", "техникум"]
+CITIES = ["московский", "казанский", "томский", "уральский", "сибирский", "донской"]
+
+
+def _records(count: int, seed: int = 13) -> list[dict]:
+    rnd = random.Random(seed)
+    return [
+        {
+            "id": org_id,
+            "full_name": f"{rnd.choice(CITIES)} {rnd.choice(KINDS)} имени {rnd.randrange(10_000)}",
+            "short_name": f"орг{org_id}",
+            "inn": 7700000000 + org_id,
+            "region": rnd.choice(["Москва", "Казань", "Томск"]),
+        }
+        for org_id in range(1, count + 1)
+    ]
+
+
+def _catalog() -> list[dict]:
+    """Полное и краткое название, ИНН, регион — первые колонки листа."""
+    workbook = load_workbook(CATALOG_PATH, read_only=True)
+    rows = [
+        {"full_name": full, "short_name": short, "inn": int(inn), "region": region}
+        for full, short, inn, region, *_ in workbook.worksheets[0].iter_rows(
+            min_row=2, values_only=True
+        )
+        if full and inn
+    ]
+    workbook.close()
+
+    return [
+        {**row, "id": copy * len(rows) + i + 1, "inn": row["inn"] + copy}
+        for copy in range(CATALOG_COPIES)
+        for i, row in enumerate(rows)
+    ]
+
+
+async def _directory(records: list[dict], budget_mb: int = 512) -> OrgDirectory:
+    directory = OrgDirectory(memory_budget_bytes=budget_mb * 1024 * 1024)
+    await directory._replace(records)
+    directory.loaded = True
+    return directory
+
+
+async def test_keystroke_latency_p99():
+    records = _catalog()
+    directory = await _directory(records)
+    rnd = random.Random(7)
+
+    latencies = []
+    for record in rnd.sample(records, 200):
+        for typed in (record["short_name"], record["full_name"][:40]):
+            for end in range(2, len(typed) + 1):
+                start = time.perf_counter()
+                directory.search(typed[:end], limit=10)
+                latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"\nkeystrokes={len(latencies)} p50={latencies[len(latencies) // 2] * 1000:.3f}ms "
+          f"p99={p99 * 1000:.3f}ms")
+    assert p99 < KEYSTROKE_P99_BUDGET
+
+
+@pytest.mark.parametrize("budget_mb", [512, 1])
+async def test_scan_ranks_like_candidates(budget_mb):
+    """Широкие запросы (проход по склейке) ранжируются так же, как узкие."""
+    directory = await _directory(_records(3_000), budget_mb=budget_mb)
+    queries = ["мо", "ск", "моск", "ниверс", "кий кол", "им", "ски уни", "томский ш"]
+
+    for q in queries:
+        for region in (None, "Томск"):
+            scanned = directory._scan(q, 10, region)
+
+            ids = directory._candidates(q)
+            if ids is None:
+                substring = directory._ngrams_enabled and len(q) >= 3
+                ids = {
+                    org_id
+                    for org_id, key in directory._keys.items()
+                    if (q in key if substring else all(f" {t}" in f" {key}" for t in q.split()))
+                }
+            if region:
+                ids = {i for i in ids if directory._records[i]["region"] == region}
+
+            assert scanned == directory._rank(q, ids, 10), (q, region)
+
+
+async def test_upsert_matches_full_build():
+    records = _records(2_000)
+    incremental = await _directory(records[:1_500])
+
+    renamed = dict(records[10], full_name="новое название")
+    await incremental._apply(records[1_500:] + [renamed], removed_ids=[20])
+
+    expected = [record for record in records if record["id"] != 20]
+    expected[10] = renamed
+    full = await _directory(expected)
+
+    assert incremental._words == full._words
+    assert incremental._inns == full._inns
+    assert incremental._by_rank == full._by_rank
+    assert incremental._text == full._text
+    assert incremental._ngrams == full._ngrams
+    assert incremental._estimate_bytes() == full._estimate_bytes()
+    assert incremental.search("новое назв")[0]["id"] == renamed["id"]
+    assert incremental.search(str(records[19]["inn"])) == []
+
+
+async def test_budget_disables_ngrams_and_keeps_prefix_search():
+    directory = await _directory(_records(2_000), budget_mb=1)
+
+    assert not directory._ngrams_enabled
+    assert directory._postings == 0
+    assert directory.search("томский техн")
+
+
+async def test_changes_during_load_are_reread(monkeypatch):
+    directory = OrgDirectory(memory_budget_bytes=64 * 1024 * 1024)
+    directory._loading = True
+    await directory._apply(_records(3))
+
+    assert directory._records == {}
+    assert directory._pending_ids == {1, 2, 3}
+
+
+async def test_search_is_not_blocked_by_merge():
+    directory = await _directory(_records(20_000))
+
+    searches = 0
+
+    async def typing():
+        nonlocal searches
+        while not merge.done():
+            directory.search("уральский", limit=10)
+            searches += 1
+            await asyncio.sleep(0)
+
+    merge = asyncio.create_task(directory._apply(_records(5_000, seed=99)))
+    await asyncio.gather(merge, typing())
+
+    assert searches > 1
@@ -0,0 +1,38 @@
+import io
+
+import pytest
+from openpyxl import load_workbook
+
+from db.models.org_enum import OrgType
+from db.models.orgs import Orgs
+from db.session import async_session_maker
+from services import org_export
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_xlsx_export_contains_all_rows(db_engine, monkeypatch):
+    monkeypatch.setattr(org_export, "EXPORT_BATCH_SIZE", 7)
+    async with async_session_maker() as session:
+        session.add_all(
+            [
+                Orgs(
+                    full_name=f"Университет {i}",
+                    short_name=f"У{i}",
+                    inn=7700000000 + i,
+                    region="Москва",
+                    type=list(OrgType)[0],
+                    members_count=i,
+                )
+                for i in range(1, 31)
+            ]
+        )
+        await session.commit()
+
+    body = b"".join([chunk async for chunk in org_export.stream_xlsx()])
+
+    rows = list(load_workbook(io.BytesIO(body), read_only=True).active.values)
+    assert list(rows[0]) == org_export.EXPORT_COLUMNS
+    assert len(rows) == 31
+    members = org_export.EXPORT_COLUMNS.index("members_count")
+    assert [row[members] for row in rows[1:]] == list(range(1, 31))
@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import func, select
+
+from cruds.orgs_crud import OrgsCRUD
+from db.models.region_stats import RegionStats, RegionStatsDelta
+from db.session import async_session_maker
+
+pytestmark = pytest.mark.asyncio
+
+
+def _delta(region: str, orgs: int, teams: int, members: int, star: float) -> RegionStatsDelta:
+    return RegionStatsDelta(
+        region=region,
+        type="ВУЗ",
+        orgs_count=orgs,
+        teams_count=teams,
+        members_count=members,
+        star_sum=star,
+    )
+
+
+async def _stats() -> dict[str, dict]:
+    async with async_session_maker() as session:
+        return {row["region"]: row for row in await OrgsCRUD.get_region_stats(session)}
+
+
+async def test_pending_deltas_are_visible_and_rolled_up(db_engine):
+    async with async_session_maker() as session:
+        session.add_all(
+            [
+                _delta("Москва", 2, 3, 10, 1.0),
+                _delta("Москва", -1, -1, -4, -0.5),
+                _delta("Казань", 1, 0, 2, 0.25),
+            ]
+        )
+        await session.commit()
+
+    before = await _stats()
+    assert before["Москва"]["orgs_count"] == 1
+    assert before["Москва"]["members_count"] == 6
+
+    async with async_session_maker() as session:
+        assert await OrgsCRUD.rollup_region_stats(session) == 2
+
+    async with async_session_maker() as session:
+        assert await session.scalar(select(func.count(RegionStatsDelta.id))) == 0
+        rows = {row.region: row for row in (await session.scalars(select(RegionStats))).all()}
+    assert rows["Москва"].orgs_count == 1
+    assert rows["Москва"].teams_count == 2
+    assert await _stats() == before
+
+    # Повторная свёртка прибавляет только новые дельты
+    async with async_session_maker() as session:
+        session.add(_delta("Казань", -1, 0, -2, -0.25))
+        await session.commit()
+        await OrgsCRUD.rollup_region_stats(session)
+
+    assert "Казань" not in await _stats()
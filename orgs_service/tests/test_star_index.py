@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from jose import jwt
+
+from config import settings
+from services import star_index
+
+pytestmark = pytest.mark.asyncio
+
+AS_OF = datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc)
+
+
+async def test_watermark_survives_restart_and_only_grows(db_engine):
+    assert await star_index.load_watermark() is None
+
+    await star_index.store_watermark(AS_OF)
+    # Ручной полный пересчёт со старым снимком не откатывает отметку
+    await star_index.store_watermark(AS_OF - timedelta(hours=1))
+    assert await star_index.load_watermark() == AS_OF
+
+    await star_index.store_watermark(AS_OF + timedelta(hours=1))
+    assert await star_index.load_watermark() == AS_OF + timedelta(hours=1)
+
+
+async def test_manual_recompute_persists_watermark(db_engine, monkeypatch):
+    async def fetch_org_results(since):
+        return {"as_of": AS_OF.isoformat(), "rows": []}
+
+    monkeypatch.setattr(star_index, "fetch_org_results", fetch_org_results)
+
+    assert await star_index.recompute_indices() == (AS_OF, 0)
+    assert await star_index.load_watermark() == AS_OF
+
+
+@pytest.mark.parametrize(
+    "role, status", [(None, 401), ("student", 403), ("moder", 403)]
+)
+async def test_recompute_indices_requires_admin(db_engine, monkeypatch, role, status):
+    from main import app
+
+    async def recompute_indices():
+        raise AssertionError("recompute must not start")
+
+    monkeypatch.setattr(star_index, "recompute_indices", recompute_indices)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://orgs.test"
+    ) as http:
+        if role:
+            token = jwt.encode(
+                {"sub": "1", "role": role}, settings.SECRET_KEY, algorithm=settings.ALGORITHM
+            )
+            http.cookies.set("users_access_token", token)
+        response = await http.post("/organizations/recompute_indices")
+
+    assert response.status_code == status
+
+
+async def test_scheduler_holds_no_transaction_during_fetch(db_engine, monkeypatch):
+    from sqlalchemy import text
+
+    from db.session import engine
+
+    states = []
+    done = asyncio.Event()
+
+    async def fetch_org_results(since):
+        async with engine.connect() as conn:
+            states.extend(
+                await conn.scalars(
+                    text(
+                        "SELECT state FROM pg_stat_activity "
+                        "WHERE datname = current_database() AND pid <> pg_backend_pid()"
+                    )
+                )
+            )
+        return {"as_of": AS_OF.isoformat(), "rows": []}
+
+    store_watermark = star_index.store_watermark
+
+    async def store_and_signal(as_of):
+        await store_watermark(as_of)
+        done.set()
+
+    monkeypatch.setattr(star_index, "fetch_org_results", fetch_org_results)
+    monkeypatch.setattr(star_index, "store_watermark", store_and_signal)
+    monkeypatch.setattr(settings, "STAR_INDEX_INTERVAL", 3600.0)
+
+    scheduler = asyncio.create_task(star_index.run_star_index_scheduler())
+    await asyncio.wait_for(done.wait(), 5)
+    scheduler.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await scheduler
+
+    assert "idle in transaction" not in states
+    assert await star_index.load_watermark() == AS_OF
@@ -0,0 +1,59 @@
+"""add catalog_versions
+
+Revision ID: a8c3f1d6e2b9
+Revises: 62bfdf593409
+Create Date: 2026-10-18 02:21:47.106352
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a8c3f1d6e2b9"
+down_revision: Union[str, Sequence[str], None] = "62bfdf593409"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "catalog_versions",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("version", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.execute("INSERT INTO catalog_versions (name, version) VALUES ('projects', 1)")
+
+    op.execute(
+        """
+        CREATE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO catalog_versions (name, version) VALUES (TG_ARGV[0], 1)
+            ON CONFLICT (name) DO UPDATE SET version = catalog_versions.version + 1;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    # Список проектов отдаётся вместе с задачами, поэтому версия общая
+    for table in ("projects", "tasks"):
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_catalog_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('projects')
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("projects", "tasks"):
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_catalog_version ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS bump_catalog_version()")
+    op.drop_table("catalog_versions")
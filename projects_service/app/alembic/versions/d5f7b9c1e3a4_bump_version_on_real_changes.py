@@ -0,0 +1,89 @@
+"""bump projects catalog version only when rows change
+
+Revision ID: d5f7b9c1e3a4
+Revises: a8c3f1d6e2b9
+Create Date: 2026-10-19 14:16:22.904178
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d5f7b9c1e3a4"
+down_revision: Union[str, Sequence[str], None] = "a8c3f1d6e2b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BUMP_IF_CHANGED_SQL = """
+CREATE FUNCTION bump_catalog_version_if_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM 1 FROM new_rows LIMIT 1;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM 1 FROM old_rows LIMIT 1;
+    ELSE
+        -- to_jsonb: у tasks.materials (json) нет оператора равенства
+        PERFORM 1
+        FROM new_rows n JOIN old_rows o ON o.id = n.id
+        WHERE to_jsonb(n) IS DISTINCT FROM to_jsonb(o)
+        LIMIT 1;
+    END IF;
+
+    IF FOUND THEN
+        INSERT INTO catalog_versions (name, version) VALUES (TG_ARGV[0], 1)
+        ON CONFLICT (name) DO UPDATE SET version = catalog_versions.version + 1;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+TRANSITIONS = {
+    "insert": "INSERT ON {table} REFERENCING NEW TABLE AS new_rows",
+    "update": "UPDATE ON {table} REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "delete": "DELETE ON {table} REFERENCING OLD TABLE AS old_rows",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(BUMP_IF_CHANGED_SQL)
+
+    # Пустые и ничего не меняющие UPDATE больше не сдвигают версию каталога
+    for table in ("projects", "tasks"):
+        op.execute(f"DROP TRIGGER {table}_catalog_version ON {table}")
+        for event, transition in TRANSITIONS.items():
+            op.execute(
+                f"""
+                CREATE TRIGGER {table}_catalog_version_{event}
+                AFTER {transition.format(table=table)}
+                FOR EACH STATEMENT EXECUTE FUNCTION
+                    bump_catalog_version_if_changed('projects')
+                """
+            )
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_catalog_version_truncate
+            AFTER TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('projects')
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("projects", "tasks"):
+        for event in (*TRANSITIONS, "truncate"):
+            op.execute(f"DROP TRIGGER {table}_catalog_version_{event} ON {table}")
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_catalog_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('projects')
+            """
+        )
+    op.execute("DROP FUNCTION bump_catalog_version_if_changed()")
@@ -14,6 +14,8 @@ class Settings(BaseSettings):
     TEAMS_SERVICE_URL: str
     AUTH_SERVICE_URL: str
 
+    CATALOG_CACHE_MAX_AGE: int = 0
+
     @property
     def DATABASE_URL(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
@@ -3,13 +3,14 @@ from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 
 from fastapi import HTTPException, Request
-from sqlalchemy import and_, or_, update, text
+from sqlalchemy import and_, or_, update, text, func
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 
 from db.models.projects import Project, Task, TaskSubmission, TaskStatus
+from db.models.catalog_version import CatalogVersion
 from services.teams_client import TeamsClient
 
 
@@ -37,6 +38,63 @@ class ZvezdaCRUD:
 
         return result.scalar_one()
 
+    @staticmethod
+    async def get_catalog_version(db: AsyncSession) -> int:
+        version = await db.scalar(
+            select(CatalogVersion.version).where(CatalogVersion.name == "projects")
+        )
+        return version or 0
+
+    @staticmethod
+    async def get_org_results(
+        db: AsyncSession, since: Optional[datetime] = None
+    ) -> dict:
+        """
+        Итоги по проектам организаций для пересчёта индексов в orgs_service:
+        одна строка на проект — категория, вес (star_index), число задач и принятых.
+        since — только организации, у которых после этого момента были проверки.
+        """
+        as_of = await db.scalar(select(func.now()))
+
+        query = (
+            select(
+                Project.organization_id,
+                Project.star_category,
+                Project.star_index,
+                func.count(Task.id).label("tasks_total"),
+                func.count(Task.id)
+                .filter(Task.status == TaskStatus.ACCEPTED)
+                .label("tasks_accepted"),
+            )
+            .outerjoin(Task, Task.project_id == Project.id)
+            .where(Project.organization_id.is_not(None))
+            .group_by(Project.id)
+        )
+
+        if since is not None:
+            changed_orgs = (
+                select(Project.organization_id)
+                .join(Task, Task.project_id == Project.id)
+                .join(TaskSubmission, TaskSubmission.task_id == Task.id)
+                .where(TaskSubmission.reviewed_at > since)
+            )
+            query = query.where(Project.organization_id.in_(changed_orgs))
+
+        result = await db.execute(query)
+        return {
+            "as_of": as_of,
+            "rows": [
+                {
+                    "organization_id": row.organization_id,
+                    "star_category": row.star_category.value,
+                    "star_index": row.star_index,
+                    "tasks_total": row.tasks_total,
+                    "tasks_accepted": row.tasks_accepted,
+                }
+                for row in result.all()
+            ],
+        }
+
     @staticmethod
     async def list_projects(db: AsyncSession, organization_id: Optional[int] = None):
         query = select(Project).options(selectinload(Project.tasks))
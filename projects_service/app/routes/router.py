@@ -1,5 +1,6 @@
+from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.session import get_db
@@ -7,6 +8,8 @@ from cruds.crud import ZvezdaCRUD
 from services.service import get_current_user
 from services.auth_client import get_moderator, get_admin
 from services.teams_client import TeamsClient
+from services.http_cache import conditional_response, make_etag
+from config import settings
 
 from schemas.proj import (
     ProjectCreate,
@@ -32,12 +35,30 @@ async def create_project(
 
 @router.get("/projects", response_model=List[ProjectRead])
 async def list_projects(
+    request: Request,
+    response: Response,
     organization_id: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
 ):
+    version = await ZvezdaCRUD.get_catalog_version(db)
+    etag = make_etag("projects", version, organization_id)
+    not_modified = conditional_response(
+        request, response, etag, max_age=settings.CATALOG_CACHE_MAX_AGE
+    )
+    if not_modified:
+        return not_modified
+
     return await ZvezdaCRUD.list_projects(db, organization_id)
 
 
+@router.get("/org_results")
+async def get_org_results(
+    since: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    return await ZvezdaCRUD.get_org_results(db, since)
+
+
 @router.get("/projects/{project_id}", response_model=ProjectRead)
 async def get_project(
     project_id: int,
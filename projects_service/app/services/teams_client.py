@@ -35,49 +35,30 @@ class TeamsClient:
                 status_code=503, detail=f"Teams service error: {str(e)}"
             )
     
-    # 👇 ЭТОТ МЕТОД ДОЛЖЕН БЫТЬ НА ОДНОМ УРОВНЕ С is_user_team_leader
     @staticmethod
     async def add_points_to_team(team_id: int, points: int) -> bool:
         """
-        Начисляет очки команде после успешного выполнения задачи
+        Начисляет очки команде после успешного выполнения задачи.
+        teams_service увеличивает points и tasks_completed атомарно.
         """
         try:
             async with httpx.AsyncClient() as client:
-                # 👇 ИСПРАВЛЕНО: добавляем /teams/teams/
-                team_response = await client.get(
-                    f"{settings.TEAMS_SERVICE_URL}/teams/get_team_by_id/{team_id}",
+                response = await client.post(
+                    f"{settings.TEAMS_SERVICE_URL}/teams/add_points/{team_id}",
+                    json={"points": points, "tasks_completed": 1},
                     timeout=5.0,
                 )
-                
-                if team_response.status_code != 200:
-                    print(f"❌ Failed to get team {team_id}: {team_response.status_code}")
-                    return False
-                
-                team_data = team_response.json()
-                team_info = team_data.get("team_info", {})
-                current_points = team_info.get("points", 0) or 0
-                current_tasks_completed = team_info.get("tasks_completed", 0) or 0
-                
-                # 👇 ИСПРАВЛЕНО: используем правильный путь update_team_data
-                update_response = await client.patch(
-                    f"{settings.TEAMS_SERVICE_URL}/teams/update_team_data/{team_id}",
-                    json={
-                        "points": current_points + points,
-                        "tasks_completed": current_tasks_completed + 1
-                    },
-                    timeout=5.0,
-                )
-                
-                if update_response.status_code == 200:
+
+                if response.status_code == 200:
                     print(f"✅ Successfully added {points} points to team {team_id}")
                     return True
                 else:
-                    print(f"❌ Failed to add points: {update_response.status_code}")
+                    print(f"❌ Failed to add points: {response.status_code}")
                     return False
-                        
+
         except httpx.RequestError as e:
             print(f"❌ Network error while adding points: {str(e)}")
             return False
         except Exception as e:
             print(f"❌ Unexpected error while adding points: {str(e)}")
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,33 @@
+"""add role to team_members
+
+Revision ID: b1f4c2d9e7a3
+Revises: a644275ac3c6
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b1f4c2d9e7a3"
+down_revision: Union[str, None] = "a644275ac3c6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("team_members", sa.Column("role", sa.String(), nullable=True))
+    op.create_index(
+        op.f("ix_team_members_team_id"), "team_members", ["team_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_team_members_team_id"), table_name="team_members")
+    op.drop_column("team_members", "role")
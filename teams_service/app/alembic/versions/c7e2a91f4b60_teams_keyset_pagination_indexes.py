@@ -0,0 +1,52 @@
+"""teams keyset pagination indexes
+
+Revision ID: c7e2a91f4b60
+Revises: b1f4c2d9e7a3
+Create Date: 2026-10-17 11:02:15.604122
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c7e2a91f4b60"
+down_revision: Union[str, None] = "b1f4c2d9e7a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Курсор по (points, id) не работает с NULL, поэтому очки по умолчанию 0
+    op.execute("UPDATE teams SET points = 0 WHERE points IS NULL")
+    op.alter_column("teams", "points", server_default=sa.text("0"))
+
+    op.create_index("ix_teams_points_id", "teams", ["points", "id"], unique=False)
+    op.create_index(
+        "ix_teams_region_points_id", "teams", ["region", "points", "id"], unique=False
+    )
+    op.create_index(
+        "ix_teams_organization_id_points_id",
+        "teams",
+        ["organization_id", "points", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_teams_direction_points_id",
+        "teams",
+        ["direction", "points", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_teams_direction_points_id", table_name="teams")
+    op.drop_index("ix_teams_organization_id_points_id", table_name="teams")
+    op.drop_index("ix_teams_region_points_id", table_name="teams")
+    op.drop_index("ix_teams_points_id", table_name="teams")
+    op.alter_column("teams", "points", server_default=None)
@@ -0,0 +1,72 @@
+"""team composition counters and unique team_members.user_id
+
+Revision ID: e5b7c1d3a9f2
+Revises: d3a8f5b2c914
+Create Date: 2026-10-17 21:48:03.517290
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b7c1d3a9f2"
+down_revision: Union[str, None] = "d3a8f5b2c914"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "teams",
+        sa.Column(
+            "students_count", sa.Integer(), server_default=sa.text("0"), nullable=False
+        ),
+    )
+    op.add_column(
+        "teams",
+        sa.Column(
+            "teachers_count", sa.Integer(), server_default=sa.text("0"), nullable=False
+        ),
+    )
+
+    # Пользователь может состоять только в одной команде: оставляем самое раннее членство
+    op.execute(
+        """
+        DELETE FROM team_members a
+        USING team_members b
+        WHERE a.user_id = b.user_id AND a.id > b.id
+        """
+    )
+    op.create_unique_constraint(
+        "uq_team_members_user_id", "team_members", ["user_id"]
+    )
+
+    op.execute(
+        """
+        UPDATE teams t
+        SET students_count = c.students,
+            teachers_count = c.teachers,
+            number_of_members = c.total
+        FROM (
+            SELECT team_id,
+                   count(*) FILTER (WHERE role = 'student') AS students,
+                   count(*) FILTER (WHERE role = 'teacher') AS teachers,
+                   count(*) AS total
+            FROM team_members
+            GROUP BY team_id
+        ) c
+        WHERE t.id = c.team_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("uq_team_members_user_id", "team_members", type_="unique")
+    op.drop_column("teams", "teachers_count")
+    op.drop_column("teams", "students_count")
@@ -0,0 +1,60 @@
+"""team counts tables
+
+Revision ID: f1c4e8a2b7d5
+Revises: e5b7c1d3a9f2
+Create Date: 2026-10-17 22:20:37.184402
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f1c4e8a2b7d5"
+down_revision: Union[str, None] = "e5b7c1d3a9f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "team_region_counts",
+        sa.Column("region", sa.String(), nullable=False),
+        sa.Column(
+            "teams_count", sa.Integer(), server_default=sa.text("0"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("region"),
+    )
+    op.create_table(
+        "team_org_counts",
+        sa.Column("organization_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "teams_count", sa.Integer(), server_default=sa.text("0"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("organization_id"),
+    )
+
+    op.execute(
+        """
+        INSERT INTO team_region_counts (region, teams_count)
+        SELECT coalesce(region, ''), count(*) FROM teams GROUP BY coalesce(region, '')
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO team_org_counts (organization_id, teams_count)
+        SELECT organization_id, count(*) FROM teams
+        WHERE organization_id IS NOT NULL
+        GROUP BY organization_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("team_org_counts")
+    op.drop_table("team_region_counts")
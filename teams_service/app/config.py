@@ -12,6 +12,25 @@ class Settings(BaseSettings):
     ORGS_URL: str
     USER_PROFILE_URL: str
 
+    RABBITMQ_URL: str
+    REDIS_URL: str = "redis://redis:6379/0"
+
+    HTTP_CONNECT_TIMEOUT: float = 2.0
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+
+    ORG_CACHE_TTL: float = 300.0
+    ORG_CACHE_MAXSIZE: int = 5000
+
+    OUTBOX_POLL_INTERVAL: float = 1.0
+    OUTBOX_BATCH_SIZE: int = 500
+
+    TEAM_COUNTS_CACHE_TTL: float = 10.0
+    TEAM_COUNTS_CACHE_MAXSIZE: int = 1000
+
+    ROLE_BACKFILL_INTERVAL: float = 600.0
+
+    LEADERBOARD_RECONCILE_INTERVAL: float = 30.0
+
     SECRET_KEY: str
     ALGORITHM: str
 
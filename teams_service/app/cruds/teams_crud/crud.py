@@ -1,33 +1,71 @@
+import base64
+import json
+from typing import AsyncIterator, Literal, Optional
+
 from sqlalchemy.future import select
-from sqlalchemy import func
+from sqlalchemy import and_, case, func, or_, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from services.user_profile_client import UserProfileClient
+from services.outbox import (
+    enqueue_membership_changes,
+    enqueue_org_counts_changed,
+    membership_change,
+    notify_relay,
+)
 from db.models.teams import Team
 from db.models.team_members import TeamMember
+from db.models.team_counts import TeamOrgCount, TeamRegionCount
+from db.models.user_roles import UserRole
+from db.models.teams_enums.enums import DirectionEnum
+from db.session import async_session_maker
 from fastapi import HTTPException
 from services.bot_client import BotClient
 from services.orgs_client import OrgsClient
+from services import leaderboard
+from services.counts_cache import team_counts_cache
 import logging
 
+TeamsSortBy = Literal["id", "points"]
+SortOrder = Literal["asc", "desc"]
+
+TEAMS_STREAM_CHUNK = 50
+
 
 class TeamCRUD:
     @staticmethod
-    async def get_user_role(user_id: int) -> str:
-        user_info = await UserProfileClient.get_user_profile(user_id)
+    def _extract_role(user_info: dict | None) -> str | None:
+        if not user_info:
+            return None
 
-        print(f"DEBUG get_user_role: User {user_id} info: {user_info}")
+        role = user_info.get("Type") or user_info.get("type") or user_info.get("role")
+        return role.lower() if role else None
+
+    @staticmethod
+    async def get_users_roles(user_ids: list[int]) -> dict[int, str | None]:
+        """Resolves roles for several users with a single get_users_batch call."""
+        if not user_ids:
+            return {}
+
+        profiles = await UserProfileClient.get_users_profiles(
+            list(set(user_ids)), fields=["Type"]
+        )
+        return {
+            user_id: TeamCRUD._extract_role(profiles.get(str(user_id)))
+            for user_id in user_ids
+        }
+
+    @staticmethod
+    async def get_user_role(user_id: int) -> str:
+        user_info = await UserProfileClient.get_user_profile(user_id, fields=["Type"])
 
         if not user_info:
             raise HTTPException(status_code=404, detail=f"User {user_id} not found")
 
-        role = user_info.get("Type") or user_info.get("type") or user_info.get("role")
-        print(f"DEBUG get_user_role: Found role field: {role}")
-
-        if role:
-            role = role.lower()
+        role = TeamCRUD._extract_role(user_info)
 
         if not role:
-            print(f"DEBUG get_user_role: Available fields: {list(user_info.keys())}")
             raise HTTPException(
                 status_code=400, detail=f"User {user_id} doesn't have a role assigned"
             )
@@ -35,50 +73,102 @@ class TeamCRUD:
         return role
 
     @staticmethod
-    async def analyze_team_composition(db: AsyncSession, team_id: int):
-        members = await TeamCRUD.get_team_members(db, team_id)
-
-        student_count = 0
-        teacher_count = 0
-
-        for member in members:
-            role = await TeamCRUD.get_user_role(member.user_id)
-            if role == "student":
-                student_count += 1
-            elif role == "teacher":
-                teacher_count += 1
+    async def _claim_user_role(db: AsyncSession, user_id: int, fetched_role: str) -> str:
+        """
+        Роль пользователя внутри транзакции, добавляющей его в команду.
+        Upsert блокирует строку user_roles до коммита: событие смены роли,
+        пришедшее после запроса к user_profile, либо уже записано и берётся
+        отсюда, либо ждёт коммита и затем видит нового участника.
+        Роль из события (changed_at задан) важнее ответа user_profile.
+        """
+        stmt = pg_insert(UserRole).values(user_id=user_id, role=fetched_role)
+        return await db.scalar(
+            stmt.on_conflict_do_update(
+                index_elements=[UserRole.user_id],
+                set_={
+                    "role": case(
+                        (UserRole.changed_at.is_(None), stmt.excluded.role),
+                        else_=UserRole.role,
+                    )
+                },
+            ).returning(UserRole.role)
+        )
 
+    @staticmethod
+    def team_composition(
+        team: Team, legacy_roles: Optional[dict[int, str | None]] = None
+    ) -> dict:
+        """
+        Состав из счётчиков строки teams. legacy_roles — роли участников без
+        сохранённой роли: до бэкфилла (services/role_backfill.py) счётчики их
+        учитывают только в total.
+        """
+        legacy = list((legacy_roles or {}).values())
         return {
-            "students": student_count,
-            "teachers": teacher_count,
-            "total": len(members),
+            "students": (team.students_count or 0) + legacy.count("student"),
+            "teachers": (team.teachers_count or 0) + legacy.count("teacher"),
+            "total": team.number_of_members or 0,
         }
 
     @staticmethod
-    async def can_user_join_team(db: AsyncSession, team_id: int, user_id: int):
-        print(
-            f" DEBUG can_user_join_team: Called with user_id={user_id}, team_id={team_id}"
+    def _apply_role_delta(team: Team, role: str | None, delta: int):
+        team.number_of_members = (team.number_of_members or 0) + delta
+        if role == "student":
+            team.students_count = (team.students_count or 0) + delta
+        elif role == "teacher":
+            team.teachers_count = (team.teachers_count or 0) + delta
+
+    @staticmethod
+    async def _legacy_member_ids(db: AsyncSession, team_id: int) -> list[int]:
+        """Участники, вступившие до появления колонки role."""
+        return list(
+            await db.scalars(
+                select(TeamMember.user_id).where(
+                    TeamMember.team_id == team_id, TeamMember.role.is_(None)
+                )
+            )
         )
 
-        existing_membership = await db.execute(
-            select(TeamMember).where(TeamMember.user_id == user_id)
+    @staticmethod
+    async def _sync_legacy_roles(
+        db: AsyncSession, team: Team, roles: dict[int, str | None]
+    ):
+        """
+        Дозаполняет роль у участников без неё из заранее полученных roles
+        и пересчитывает счётчики состава команды. Вызывается под блокировкой
+        строки команды, поэтому в user_profile не ходит. Коммит делает вызывающий.
+        """
+        result = await db.execute(
+            select(TeamMember).where(
+                TeamMember.team_id == team.id, TeamMember.role.is_(None)
+            )
         )
-        if existing_membership.scalar_one_or_none():
-            return False, "You already belong to another team"
+        members = [m for m in result.scalars().all() if roles.get(m.user_id)]
+        if not members:
+            return
 
-        team_result = await db.execute(select(Team).where(Team.id == team_id))
-        team = team_result.scalar_one_or_none()
-        if not team:
-            return False, "Team not found"
+        for member in members:
+            member.role = roles[member.user_id]
+        await db.flush()
+
+        counts = dict(
+            (
+                await db.execute(
+                    select(TeamMember.role, func.count(TeamMember.id))
+                    .where(TeamMember.team_id == team.id)
+                    .group_by(TeamMember.role)
+                )
+            ).all()
+        )
+        team.students_count = counts.get("student", 0)
+        team.teachers_count = counts.get("teacher", 0)
+        team.number_of_members = sum(counts.values())
 
-        composition = await TeamCRUD.analyze_team_composition(db, team_id)
+    @staticmethod
+    def _check_composition(composition: dict, user_role: str) -> tuple[bool, str]:
         if composition["total"] >= 4:
             return False, "Team is full (1 student + 3 teachers)"
 
-        print(f"DEBUG can_user_join_team: Before get_user_role, user_id={user_id}")
-        user_role = await TeamCRUD.get_user_role(user_id)
-        print(f"DEBUG can_user_join_team: After get_user_role, user_role={user_role}")
-
         if user_role == "student":
             if composition["students"] >= 1:
                 return False, "Team already has a student"
@@ -97,6 +187,75 @@ class TeamCRUD:
         else:
             return False, f"Role '{user_role}' cannot join teams"
 
+    @staticmethod
+    async def _evaluate_join(db: AsyncSession, team_id: int, user_id: int):
+        """
+        Проверяет, может ли пользователь вступить в команду, без блокировок.
+        Состав команды берётся из счётчиков в строке teams, в user_profile
+        одним вызовом запрашиваются роль вступающего и участников без роли.
+        Возвращает (can_join, message, composition, user_role).
+        """
+        existing_membership = await db.execute(
+            select(TeamMember).where(TeamMember.user_id == user_id)
+        )
+        if existing_membership.scalar_one_or_none():
+            return False, "You already belong to another team", None, None
+
+        team_result = await db.execute(select(Team).where(Team.id == team_id))
+        team = team_result.scalar_one_or_none()
+        if not team:
+            return False, "Team not found", None, None
+
+        composition = TeamCRUD.team_composition(team)
+        if composition["total"] >= 4:
+            return False, "Team is full (1 student + 3 teachers)", composition, None
+
+        legacy_ids = await TeamCRUD._legacy_member_ids(db, team_id)
+        roles = await TeamCRUD.get_users_roles([user_id, *legacy_ids])
+        user_role = roles.get(user_id)
+        if not user_role:
+            raise HTTPException(
+                status_code=404, detail=f"User {user_id} not found or has no role"
+            )
+
+        composition = TeamCRUD.team_composition(
+            team, {member_id: roles.get(member_id) for member_id in legacy_ids}
+        )
+        can_join, message = TeamCRUD._check_composition(composition, user_role)
+        return can_join, message, composition, user_role
+
+    @staticmethod
+    async def can_user_join_team(db: AsyncSession, team_id: int, user_id: int):
+        can_join, message, _, _ = await TeamCRUD._evaluate_join(db, team_id, user_id)
+        return can_join, message
+
+    @staticmethod
+    async def _bump_team_counts(
+        db: AsyncSession, region: Optional[str], organization_id: Optional[int], delta: int
+    ):
+        """Меняет счётчики команд региона и организации в текущей транзакции."""
+        region_stmt = pg_insert(TeamRegionCount).values(
+            region=region or "", teams_count=delta
+        )
+        await db.execute(
+            region_stmt.on_conflict_do_update(
+                index_elements=[TeamRegionCount.region],
+                set_={"teams_count": TeamRegionCount.teams_count + delta},
+            )
+        )
+
+        if organization_id:
+            org_stmt = pg_insert(TeamOrgCount).values(
+                organization_id=organization_id, teams_count=delta
+            )
+            await db.execute(
+                org_stmt.on_conflict_do_update(
+                    index_elements=[TeamOrgCount.organization_id],
+                    set_={"teams_count": TeamOrgCount.teams_count + delta},
+                )
+            )
+            enqueue_org_counts_changed(db, [organization_id])
+
     @staticmethod
     async def create_team(db: AsyncSession, team_data, leader_id: int):
         logging.info(f"User {leader_id} is trying to create team '{team_data.name}'")
@@ -120,7 +279,7 @@ class TeamCRUD:
                 raise HTTPException(status_code=400, detail="Team already exists")
 
             org_id = team_data.organization_id
-            org_data = await OrgsClient.get_organization_by_id(org_id)
+            org_data = await OrgsClient.get_cached_organization(org_id)
 
             if not org_data:
                 logging.info(
@@ -142,6 +301,10 @@ class TeamCRUD:
                 org_name = f"Организация {org_id}"
                 logging.warning(f"No organization name found for id {org_id}")
 
+            leader_role = (await TeamCRUD.get_users_roles([leader_id])).get(leader_id)
+            if leader_role:
+                leader_role = await TeamCRUD._claim_user_role(db, leader_id, leader_role)
+
             new_team = Team(
                 name=team_data.name,
                 direction=team_data.direction,
@@ -152,31 +315,37 @@ class TeamCRUD:
                 points=team_data.points,
                 description=team_data.description,
                 tasks_completed=team_data.tasks_completed,
-                number_of_members=1,
+                number_of_members=0,
+                students_count=0,
+                teachers_count=0,
             )
+            TeamCRUD._apply_role_delta(new_team, leader_role, 1)
 
             db.add(new_team)
-            await db.commit()
-            await db.refresh(new_team)
-            logging.info(
-                f"Team '{new_team.name}' successfully created with ID {new_team.id}"
-            )
+            await db.flush()
 
             team_member_leader = TeamMember(
-                team_id=new_team.id, user_id=leader_id, is_leader=True
+                team_id=new_team.id, user_id=leader_id, is_leader=True, role=leader_role
             )
             db.add(team_member_leader)
+            await TeamCRUD._bump_team_counts(db, new_team.region, org_id, 1)
+            enqueue_membership_changes(
+                db,
+                [
+                    membership_change(
+                        leader_id, new_team.id, new_team.name, org_id, org_name
+                    )
+                ],
+            )
             await db.commit()
-
-            await UserProfileClient.update_user_team(
-                user_id=leader_id, team_name=new_team.name, team_id=new_team.id
+            await db.refresh(new_team)
+            logging.info(
+                f"Team '{new_team.name}' successfully created with ID {new_team.id}"
             )
 
-            await UserProfileClient.update_user_org(
-                user_id=leader_id,
-                organization_name=org_name,
-                organization_id=org_id,
-            )
+            notify_relay()
+            team_counts_cache.invalidate()
+            await leaderboard.set_team(new_team)
 
             return new_team
 
@@ -184,6 +353,13 @@ class TeamCRUD:
             await db.rollback()
             logging.warning(f"HTTPException during team creation: {he.detail}")
             raise he
+        except IntegrityError:
+            await db.rollback()
+            logging.info(f"User {leader_id} joined another team concurrently")
+            raise HTTPException(
+                status_code=400,
+                detail="You already have a team. Leave your current team to create a new one",
+            )
         except Exception as e:
             await db.rollback()
             logging.error(
@@ -210,64 +386,91 @@ class TeamCRUD:
 
     @staticmethod
     async def join_team(db: AsyncSession, team_id: int, user_id: int):
-        print(f" DEBUG join_team: Called with user_id={user_id}, team_id={team_id}")
+        # Роли вступающего и участников без сохранённой роли запрашиваем одним
+        # вызовом до блокировки, чтобы не держать строку команды во время HTTP-вызова
+        legacy_ids = await TeamCRUD._legacy_member_ids(db, team_id)
+        roles = await TeamCRUD.get_users_roles([user_id, *legacy_ids])
+        user_role = roles.get(user_id)
+        if not user_role:
+            raise HTTPException(
+                status_code=404, detail=f"User {user_id} not found or has no role"
+            )
+
+        # SELECT ... FOR UPDATE сериализует вступления в одну команду до коммита
+        team_result = await db.execute(
+            select(Team).where(Team.id == team_id).with_for_update()
+        )
+        team = team_result.scalar_one_or_none()
+
+        if not team:
+            raise HTTPException(status_code=404, detail="Team not found")
 
         existing_membership = await db.execute(
-            select(TeamMember).where(TeamMember.user_id == user_id)
+            select(TeamMember.id).where(TeamMember.user_id == user_id)
         )
 
         if existing_membership.scalar_one_or_none():
+            await db.rollback()
             raise HTTPException(
                 status_code=400,
                 detail="You already belong to a team. Leave your current team first.",
             )
 
-        team_result = await db.execute(select(Team).where(Team.id == team_id))
-        team = team_result.scalar_one_or_none()
+        await TeamCRUD._sync_legacy_roles(db, team, roles)
+        user_role = await TeamCRUD._claim_user_role(db, user_id, user_role)
 
-        if not team:
-            raise HTTPException(status_code=404, detail="Team not found")
-
-        print(f"DEBUG join_team: Before can_user_join_team, user_id={user_id}")
-        can_join, message = await TeamCRUD.can_user_join_team(db, team_id, user_id)
-        print(
-            f"DEBUG join_team: After can_user_join_team, can_join={can_join}, message={message}"
+        can_join, message = TeamCRUD._check_composition(
+            TeamCRUD.team_composition(team), user_role
         )
 
         if not can_join:
+            await db.rollback()
             raise HTTPException(status_code=400, detail=message)
 
-        current_composition = await TeamCRUD.analyze_team_composition(db, team_id)
-
-        team_member = TeamMember(team_id=team_id, user_id=user_id, is_leader=False)
+        team_member = TeamMember(
+            team_id=team_id, user_id=user_id, is_leader=False, role=user_role
+        )
 
         db.add(team_member)
-        team.number_of_members = current_composition["total"] + 1
+        TeamCRUD._apply_role_delta(team, user_role, 1)
+        enqueue_membership_changes(
+            db,
+            [
+                membership_change(
+                    user_id,
+                    team_id,
+                    team.name,
+                    team.organization_id,
+                    team.organization_name,
+                )
+            ],
+        )
 
         try:
             await db.commit()
-            await UserProfileClient.update_user_team(
-                user_id=user_id, team_name=team.name, team_id=team_id
-            )
-            await UserProfileClient.update_user_org(
-                user_id=user_id,
-                organization_name=team.organization_name,
-                organization_id=team.organization_id,
+        except IntegrityError:
+            # Уникальность team_members.user_id: параллельное вступление в другую команду
+            await db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail="You already belong to a team. Leave your current team first.",
             )
-
-            updated_composition = await TeamCRUD.analyze_team_composition(db, team_id)
-
-            return {
-                "message": "Successfully joined the team",
-                "team_composition": updated_composition,
-            }
         except Exception as e:
             await db.rollback()
             raise HTTPException(status_code=500, detail=f"Error joining team: {str(e)}")
 
+        notify_relay()
+
+        return {
+            "message": "Successfully joined the team",
+            "team_composition": TeamCRUD.team_composition(team),
+        }
+
     @staticmethod
     async def leave_team(db: AsyncSession, team_id: int, user_id: int):
-        team_result = await db.execute(select(Team).where(Team.id == team_id))
+        team_result = await db.execute(
+            select(Team).where(Team.id == team_id).with_for_update()
+        )
         team = team_result.scalar_one_or_none()
 
         if team and team.leader_id == user_id:
@@ -289,23 +492,15 @@ class TeamCRUD:
             )
 
         try:
-            if (
-                team
-                and team.number_of_members is not None
-                and team.number_of_members > 0
-            ):
-                team.number_of_members -= 1
+            if team and team.number_of_members:
+                TeamCRUD._apply_role_delta(team, team_member.role, -1)
 
             await db.delete(team_member)
-            await db.commit()
-
-            await UserProfileClient.update_user_team(
-                user_id=user_id, team_name="", team_id=0
-            )
-
-            await UserProfileClient.update_user_org(
-                user_id=user_id, organization_name="", organization_id=0
+            enqueue_membership_changes(
+                db, [membership_change(user_id, 0, "", 0, "")]
             )
+            await db.commit()
+            notify_relay()
 
             return {"message": "Successfully left the team"}
         except Exception as e:
@@ -360,10 +555,7 @@ class TeamCRUD:
             user_profile = users_profiles.get(str(member.user_id), {})
             print(f"DEBUG: Profile for user {member.user_id}: {user_profile}")
 
-            try:
-                role = await TeamCRUD.get_user_role(member.user_id)
-            except:
-                role = "unknown"
+            role = member.role or TeamCRUD._extract_role(user_profile) or "unknown"
 
             member_data = {
                 "user_id": member.user_id,
@@ -399,12 +591,17 @@ class TeamCRUD:
             members = members_result.scalars().all()
 
             await db.delete(team)
+            await TeamCRUD._bump_team_counts(
+                db, team.region, team.organization_id, -1
+            )
+            enqueue_membership_changes(
+                db, [membership_change(member.user_id, 0, "") for member in members]
+            )
             await db.commit()
+            notify_relay()
+            team_counts_cache.invalidate()
 
-            for member in members:
-                await UserProfileClient.update_user_team(
-                    user_id=member.user_id, team_name="", team_id=0
-                )
+            await leaderboard.remove_team(team.id, team.region, team.organization_id)
 
             return True
         except Exception as e:
@@ -414,54 +611,174 @@ class TeamCRUD:
             )
 
     @staticmethod
-    async def get_all_teams(db: AsyncSession):
-        result = await db.execute(select(Team))
-        teams = result.scalars().all()
+    def _team_to_dict(team: Team, org_data: dict | None) -> dict:
+        team_dict = {
+            "id": team.id,
+            "name": team.name,
+            "direction": team.direction,
+            "region": team.region,
+            "leader_id": team.leader_id,
+            "organization_id": team.organization_id,
+            "organization_name": team.organization_name,
+            "points": team.points,
+            "description": team.description,
+            "tasks_completed": team.tasks_completed,
+            "number_of_members": team.number_of_members,
+            "created_at": team.created_at if hasattr(team, "created_at") else None,
+        }
 
-        if not teams:
-            return []
+        if org_data:
+            team_dict["organization_info"] = {
+                "id": team.organization_id,
+                "name": org_data.get("short_name") or org_data.get("full_name"),
+                "full_name": org_data.get("full_name"),
+                "short_name": org_data.get("short_name"),
+                "region": org_data.get("region"),
+                "type": org_data.get("type"),
+            }
 
-        org_ids = [team.organization_id for team in teams if team.organization_id]
-        org_ids = list(set(org_ids))
+        return team_dict
 
-        orgs_data = {}
-        if org_ids:
-            for org_id in org_ids:
-                org_data = await OrgsClient.get_organization_by_id(org_id)
-                if org_data:
-                    orgs_data[org_id] = org_data
+    @staticmethod
+    def _encode_cursor(values: list) -> str:
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
 
-        enriched_teams = []
-        for team in teams:
-            team_dict = {
-                "id": team.id,
-                "name": team.name,
-                "direction": team.direction,
-                "region": team.region,
-                "leader_id": team.leader_id,
-                "organization_id": team.organization_id,
-                "organization_name": team.organization_name,
-                "points": team.points,
-                "description": team.description,
-                "tasks_completed": team.tasks_completed,
-                "number_of_members": team.number_of_members,
-                "created_at": team.created_at if hasattr(team, "created_at") else None,
-            }
+    @staticmethod
+    def _decode_cursor(cursor: str, size: int) -> list:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        if (
+            not isinstance(values, list)
+            or len(values) != size
+            or not all(isinstance(v, int) for v in values)
+        ):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        return values
 
-            if team.organization_id and team.organization_id in orgs_data:
-                org_data = orgs_data[team.organization_id]
-                team_dict["organization_info"] = {
-                    "id": team.organization_id,
-                    "name": org_data.get("short_name") or org_data.get("full_name"),
-                    "full_name": org_data.get("full_name"),
-                    "short_name": org_data.get("short_name"),
-                    "region": org_data.get("region"),
-                    "type": org_data.get("type"),
-                }
+    @staticmethod
+    async def get_all_teams_stream(
+        region: Optional[str] = None,
+        direction: Optional[DirectionEnum] = None,
+        organization_id: Optional[int] = None,
+        sort_by: TeamsSortBy = "id",
+        order: SortOrder = "asc",
+        cursor: Optional[str] = None,
+        limit: Optional[int] = 50,
+        with_total: bool = True,
+        paginated: bool = True,
+    ) -> AsyncIterator[str]:
+        """
+        Keyset-пагинация по id или (points, id). Курсор, общее количество и первая
+        пачка строк читаются до начала ответа, поэтому ошибки БД возвращаются
+        обычным статусом. Дальше страница отдаётся генератором JSON-чанков.
+        paginated=False — прежний формат: массив всех команд без курсора и total.
+        """
+        keys = [Team.points, Team.id] if sort_by == "points" else [Team.id]
+        descending = order == "desc"
+
+        filters = []
+        if region:
+            filters.append(Team.region == region)
+        if direction:
+            filters.append(Team.direction == direction)
+        if organization_id:
+            filters.append(Team.organization_id == organization_id)
+
+        page_filters = list(filters)
+        if cursor:
+            values = TeamCRUD._decode_cursor(cursor, len(keys))
+            row_key = tuple_(*keys) if len(keys) > 1 else keys[0]
+            cursor_key = tuple_(*values) if len(values) > 1 else values[0]
+            page_filters.append(
+                row_key < cursor_key if descending else row_key > cursor_key
+            )
 
-            enriched_teams.append(team_dict)
+        stmt = (
+            select(Team)
+            .where(*page_filters)
+            .order_by(*(k.desc() if descending else k.asc() for k in keys))
+        )
+        if limit is not None:
+            stmt = stmt.limit(limit + 1)
 
-        return enriched_teams
+        session = async_session_maker()
+        try:
+            total = None
+            if paginated and with_total:
+                total = (
+                    await session.execute(select(func.count(Team.id)).where(*filters))
+                ).scalar_one()
+
+            result = await session.stream_scalars(stmt)
+            partitions = result.partitions(TEAMS_STREAM_CHUNK)
+            first_chunk = await anext(partitions, None)
+        except Exception as e:
+            await session.close()
+            logging.error(f"Error loading teams page: {str(e)}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Error loading teams: {str(e)}")
+
+        async def chunks():
+            if first_chunk is not None:
+                yield first_chunk
+                async for chunk in partitions:
+                    yield chunk
+
+        async def generate():
+            try:
+                yield '{"items":[' if paginated else "["
+
+                sent = 0
+                last_team = None
+                has_more = False
+
+                async for chunk in chunks():
+                    if limit is not None and sent + len(chunk) > limit:
+                        has_more = True
+                        chunk = chunk[: limit - sent]
+                    if not chunk:
+                        break
+
+                    orgs_data = await OrgsClient.get_cached_organizations(
+                        [t.organization_id for t in chunk if t.organization_id]
+                    )
+                    for team in chunk:
+                        item = TeamCRUD._team_to_dict(
+                            team, orgs_data.get(team.organization_id)
+                        )
+                        yield ("," if sent else "") + json.dumps(
+                            item, ensure_ascii=False, default=str
+                        )
+                        sent += 1
+                        last_team = team
+
+                    if has_more:
+                        break
+
+                if not paginated:
+                    yield "]"
+                    return
+
+                next_cursor = None
+                if has_more and last_team is not None:
+                    next_cursor = TeamCRUD._encode_cursor(
+                        [getattr(last_team, k.key) or 0 for k in keys]
+                    )
+
+                yield (
+                    f'],"next_cursor":{json.dumps(next_cursor)},'
+                    f'"total":{json.dumps(total)}}}'
+                )
+            except Exception as e:
+                # Статус уже отправлен: обрываем ответ, чтобы клиент не принял его за полный
+                logging.error(f"Teams stream failed mid-response: {str(e)}", exc_info=True)
+                raise
+            finally:
+                await session.close()
+
+        return generate()
 
     @staticmethod
     async def get_team_by_id(db: AsyncSession, team_id: int):
@@ -471,17 +788,6 @@ class TeamCRUD:
         if not team:
             return None
 
-        if team.organization_id:
-            org_data = await OrgsClient.get_organization_by_id(team.organization_id)
-            if org_data:
-                current_org_name = org_data.get("short_name") or org_data.get(
-                    "full_name"
-                )
-
-                if current_org_name and current_org_name != team.organization_name:
-                    team.organization_name = current_org_name
-                    await db.commit()
-
         return team
 
     @staticmethod
@@ -492,10 +798,13 @@ class TeamCRUD:
         if not team:
             raise HTTPException(status_code=404, detail="Team not found")
 
+        old_region, old_organization_id = team.region, team.organization_id
+        old_name, old_organization_name = team.name, team.organization_name
+
         # Сначала обрабатываем organization_id, если он передан и не None
         if "organization_id" in update_data and update_data["organization_id"] is not None:
             org_id = update_data["organization_id"]
-            org_data = await OrgsClient.get_organization_by_id(org_id)
+            org_data = await OrgsClient.get_cached_organization(org_id)
 
             if not org_data:
                 raise HTTPException(
@@ -521,16 +830,179 @@ class TeamCRUD:
             # else:
             #     setattr(team, key, None)
 
+        counts_changed = (
+            team.region != old_region or team.organization_id != old_organization_id
+        )
+        if counts_changed:
+            await TeamCRUD._bump_team_counts(db, old_region, old_organization_id, -1)
+            await TeamCRUD._bump_team_counts(db, team.region, team.organization_id, 1)
+
+        profile_fields_changed = (
+            team.name != old_name
+            or team.organization_id != old_organization_id
+            or team.organization_name != old_organization_name
+        )
+        if profile_fields_changed:
+            member_ids = await db.scalars(
+                select(TeamMember.user_id).where(TeamMember.team_id == team_id)
+            )
+            enqueue_membership_changes(
+                db,
+                [
+                    membership_change(
+                        user_id,
+                        team.id,
+                        team.name,
+                        team.organization_id,
+                        team.organization_name,
+                    )
+                    for user_id in member_ids
+                ],
+            )
+
         try:
             await db.commit()
             await db.refresh(team)
-            return team
         except Exception as e:
             await db.rollback()
             raise HTTPException(
                 status_code=500, detail=f"Error updating team: {str(e)}"
             )
 
+        if profile_fields_changed or counts_changed:
+            notify_relay()
+        if counts_changed:
+            team_counts_cache.invalidate()
+        await leaderboard.set_team(team, old_region, old_organization_id)
+        return team
+
+    @staticmethod
+    async def add_points(
+        db: AsyncSession, team_id: int, points: int, tasks_completed: int = 1
+    ):
+        """Атомарно начисляет очки одним UPDATE ... RETURNING, без read-modify-write."""
+        result = await db.execute(
+            update(Team)
+            .where(Team.id == team_id)
+            .values(
+                points=func.coalesce(Team.points, 0) + points,
+                tasks_completed=func.coalesce(Team.tasks_completed, 0)
+                + tasks_completed,
+            )
+            .returning(
+                Team.points, Team.tasks_completed, Team.region, Team.organization_id
+            )
+        )
+        row = result.one_or_none()
+
+        if row is None:
+            await db.rollback()
+            raise HTTPException(status_code=404, detail="Team not found")
+
+        await db.commit()
+
+        new_points, new_tasks_completed, region, organization_id = row
+        await leaderboard.increment_team(team_id, points, region, organization_id)
+
+        return {
+            "team_id": team_id,
+            "points": new_points,
+            "tasks_completed": new_tasks_completed,
+        }
+
+    @staticmethod
+    def _leaderboard_filters(region: Optional[str], organization_id: Optional[int]):
+        if organization_id:
+            return [Team.organization_id == organization_id]
+        if region:
+            return [Team.region == region]
+        return []
+
+    @staticmethod
+    async def get_leaderboard(
+        db: AsyncSession,
+        limit: int = 10,
+        region: Optional[str] = None,
+        organization_id: Optional[int] = None,
+    ):
+        ranked = await leaderboard.top(limit, region, organization_id)
+
+        if ranked is None:
+            result = await db.execute(
+                select(Team.id, Team.points)
+                .where(*TeamCRUD._leaderboard_filters(region, organization_id))
+                .order_by(Team.points.desc(), Team.id.asc())
+                .limit(limit)
+            )
+            ranked = [(team_id, points or 0) for team_id, points in result.all()]
+
+        if not ranked:
+            return []
+
+        names = dict(
+            (
+                await db.execute(
+                    select(Team.id, Team.name).where(
+                        Team.id.in_([team_id for team_id, _ in ranked])
+                    )
+                )
+            ).all()
+        )
+
+        return [
+            {
+                "rank": position,
+                "team_id": team_id,
+                "name": names.get(team_id),
+                "points": points,
+            }
+            for position, (team_id, points) in enumerate(ranked, 1)
+        ]
+
+    @staticmethod
+    async def get_team_rank(
+        db: AsyncSession,
+        team_id: int,
+        region: Optional[str] = None,
+        organization_id: Optional[int] = None,
+    ):
+        ranked = await leaderboard.rank(team_id, region, organization_id)
+
+        if ranked is None:
+            team = (
+                await db.execute(
+                    select(Team.points).where(
+                        Team.id == team_id,
+                        *TeamCRUD._leaderboard_filters(region, organization_id),
+                    )
+                )
+            ).one_or_none()
+            if team is None:
+                ranked = (None, None)
+            else:
+                points = team.points or 0
+                ahead = (
+                    await db.execute(
+                        select(func.count(Team.id)).where(
+                            *TeamCRUD._leaderboard_filters(region, organization_id),
+                            or_(
+                                func.coalesce(Team.points, 0) > points,
+                                and_(
+                                    func.coalesce(Team.points, 0) == points,
+                                    Team.id < team_id,
+                                ),
+                            ),
+                        )
+                    )
+                ).scalar_one()
+                ranked = (ahead + 1, points)
+
+        position, points = ranked
+        if position is None:
+            raise HTTPException(status_code=404, detail="Team not found in leaderboard")
+
+        return {"team_id": team_id, "rank": position, "points": points}
+
     @staticmethod
     async def get_teams_by_organization(db: AsyncSession, org_id: int):
         result = await db.execute(select(Team).where(Team.organization_id == org_id))
@@ -539,7 +1011,7 @@ class TeamCRUD:
         if not teams:
             return []
 
-        org_data = await OrgsClient.get_organization_by_id(org_id)
+        org_data = await OrgsClient.get_cached_organization(org_id)
 
         enriched_teams = []
         for team in teams:
@@ -569,31 +1041,27 @@ class TeamCRUD:
         return enriched_teams
 
     @staticmethod
-    async def analyze_team_composition(db: AsyncSession, team_id: int):
-        members = await TeamCRUD.get_team_members(db, team_id)
-
-        print(
-            f"DEBUG analyze_team_composition: Team {team_id} members: {[m.user_id for m in members]}"
-        )
-
-        student_count = 0
-        teacher_count = 0
+    async def get_teams_count_by_region(db: AsyncSession, region: Optional[str] = None):
+        async def load():
+            if region:
+                count = await db.scalar(
+                    select(TeamRegionCount.teams_count).where(
+                        TeamRegionCount.region == region
+                    )
+                )
+                return {"region": region, "teams_count": count or 0}
 
-        for member in members:
-            print(
-                f"DEBUG analyze_team_composition: Getting role for member {member.user_id}"
+            result = await db.execute(
+                select(TeamRegionCount.region, TeamRegionCount.teams_count)
+                .where(TeamRegionCount.teams_count > 0)
+                .order_by(TeamRegionCount.teams_count.desc())
             )
-            role = await TeamCRUD.get_user_role(member.user_id)
-            if role == "student":
-                student_count += 1
-            elif role == "teacher":
-                teacher_count += 1
+            return [
+                {"region": region_name or None, "teams_count": count}
+                for region_name, count in result.all()
+            ]
 
-        return {
-            "students": student_count,
-            "teachers": teacher_count,
-            "total": len(members),
-        }
+        return await team_counts_cache.get(("region", region), load)
 
     @staticmethod
     async def get_team_count_by_id(
@@ -602,19 +1070,14 @@ class TeamCRUD:
         if not org_ids:
             return {}
 
-        query = (
-            select(Team.organization_id, func.count(Team.id))
-            .where(Team.organization_id.in_(org_ids))
-            .group_by(Team.organization_id)
-        )
-
-        res = await db.execute(query)
-        rows = res.all()
-
-        counts = {org_id: 0 for org_id in org_ids}
-
-        for org_id, cnt in rows:
-            if org_id in counts:
-                counts[org_id] = cnt
+        async def load():
+            result = await db.execute(
+                select(TeamOrgCount.organization_id, TeamOrgCount.teams_count).where(
+                    TeamOrgCount.organization_id.in_(org_ids)
+                )
+            )
+            counts = {org_id: 0 for org_id in org_ids}
+            counts.update(dict(result.all()))
+            return counts
 
-        return counts
+        return await team_counts_cache.get(("org", tuple(sorted(set(org_ids)))), load)
@@ -0,0 +1,19 @@
+from __future__ import annotations
+from sqlalchemy import Column, Integer, String, text
+from db.base import Base
+
+
+class TeamRegionCount(Base):
+    """Количество команд по региону; команды без региона учитываются под ''."""
+
+    __tablename__ = "team_region_counts"
+
+    region = Column(String, primary_key=True)
+    teams_count = Column(Integer, nullable=False, server_default=text("0"))
+
+
+class TeamOrgCount(Base):
+    __tablename__ = "team_org_counts"
+
+    organization_id = Column(Integer, primary_key=True)
+    teams_count = Column(Integer, nullable=False, server_default=text("0"))
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from sqlalchemy import Boolean, Column, Integer, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, ForeignKey, String, UniqueConstraint
 from db.base import Base
 
 
@@ -7,6 +7,9 @@ class TeamMember(Base):
     __tablename__ = "team_members"
 
     id = Column(Integer, primary_key=True)
-    team_id = Column(Integer, ForeignKey("teams.id"), nullable=False)
+    team_id = Column(Integer, ForeignKey("teams.id"), nullable=False, index=True)
     user_id = Column(Integer, nullable=False)
     is_leader = Column(Boolean, default=False)
+    role = Column(String, nullable=True)
+
+    __table_args__ = (UniqueConstraint("user_id", name="uq_team_members_user_id"),)
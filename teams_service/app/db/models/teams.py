@@ -1,7 +1,7 @@
 from __future__ import annotations
 from db.base import Base
 from db.models.teams_enums.enums import DirectionEnum
-from sqlalchemy import Column, Integer, String, Enum, Text
+from sqlalchemy import Column, Index, Integer, String, Enum, Text, text
 from sqlalchemy.orm import relationship
 
 
@@ -14,9 +14,18 @@ class Team(Base):
     description = Column(Text, nullable=True)
     region = Column(String)
     tasks_completed = Column(Integer, nullable=True)
-    points = Column(Integer, nullable=True)
+    points = Column(Integer, nullable=True, server_default=text("0"))
     organization_id = Column(Integer)
     organization_name = Column(String)
     leader_id = Column(Integer)
     members = relationship("TeamMember", backref="team", cascade="all, delete-orphan")
     number_of_members = Column(Integer, nullable=True)
+    students_count = Column(Integer, nullable=False, server_default=text("0"))
+    teachers_count = Column(Integer, nullable=False, server_default=text("0"))
+
+    __table_args__ = (
+        Index("ix_teams_points_id", "points", "id"),
+        Index("ix_teams_region_points_id", "region", "points", "id"),
+        Index("ix_teams_organization_id_points_id", "organization_id", "points", "id"),
+        Index("ix_teams_direction_points_id", "direction", "points", "id"),
+    )
@@ -0,0 +1,16 @@
+from __future__ import annotations
+from sqlalchemy import Column, DateTime, Integer, String
+from db.base import Base
+
+
+class UserRole(Base):
+    """
+    Последняя известная роль пользователя. changed_at — время события
+    user.role_updated; NULL — роль получена запросом к user_profile.
+    """
+
+    __tablename__ = "user_roles"
+
+    user_id = Column(Integer, primary_key=True)
+    role = Column(String, nullable=False)
+    changed_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,9 +1,27 @@
+import asyncio
+import logging
 import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_client import Counter, Histogram, generate_latest
 
 from routes.teams_router.router import router as team_router
+from services.metrics import start_outbound_tracking
+from services.rabbitmq import (
+    consume_org_cache_invalidation,
+    consume_org_updated_events,
+    consume_role_updated_events,
+)
+from services.http_client import init_http_clients, close_http_clients
+from services.outbox import run_outbox_relay
+from services.role_backfill import run_role_backfill
+from services.leaderboard import (
+    init_leaderboard,
+    close_leaderboard,
+    run_leaderboard_reconciler,
+)
+from config import settings
 
 
 SERVICE_NAME = "teams_service"
@@ -20,17 +38,89 @@ REQUEST_LATENCY = Histogram(
     ["service", "path"],
 )
 
+OUTBOUND_PER_REQUEST = Histogram(
+    "outbound_requests_per_request",
+    "Outbound HTTP calls made while serving one request",
+    ["service", "route"],
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16, 32),
+)
+
+
+logger = logging.getLogger(__name__)
+
+consumer_tasks: list[asyncio.Task] = []
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("=== STARTUP: Creating pooled HTTP clients ===")
+    init_http_clients()
+
+    logger.info("=== STARTUP: Connecting leaderboard to Redis ===")
+    await init_leaderboard()
+
+    logger.info("=== STARTUP: Starting RabbitMQ consumers ===")
+    consumers = {
+        "Role updated consumer": consume_role_updated_events,
+        "Org updated consumer": consume_org_updated_events,
+        "Org cache invalidation consumer": consume_org_cache_invalidation,
+        "Outbox relay": run_outbox_relay,
+    }
+
+    def handle_task_result(task: asyncio.Task, consumer_name: str) -> None:
+        try:
+            task.result()
+        except asyncio.CancelledError:
+            logger.info(f"{consumer_name} was cancelled")
+        except Exception as e:
+            logger.error(f"{consumer_name} crashed: {e}")
+
+    for consumer_name, consumer in consumers.items():
+        task = asyncio.create_task(consumer(settings.RABBITMQ_URL))
+        task.add_done_callback(
+            lambda t, name=consumer_name: handle_task_result(t, name)
+        )
+        consumer_tasks.append(task)
+
+    # Роли участников, вступивших до появления team_members.role
+    backfill_task = asyncio.create_task(run_role_backfill())
+    backfill_task.add_done_callback(
+        lambda t: handle_task_result(t, "Member role backfill")
+    )
+    consumer_tasks.append(backfill_task)
+
+    # Пересборка лидерборда после неудачной записи в Redis
+    reconciler_task = asyncio.create_task(run_leaderboard_reconciler())
+    reconciler_task.add_done_callback(
+        lambda t: handle_task_result(t, "Leaderboard reconciler")
+    )
+    consumer_tasks.append(reconciler_task)
+
+    yield
+
+    logger.info("=== SHUTDOWN: Cancelling RabbitMQ consumers ===")
+    for task in consumer_tasks:
+        task.cancel()
+    await asyncio.gather(*consumer_tasks, return_exceptions=True)
+    consumer_tasks.clear()
+
+    logger.info("=== SHUTDOWN: Closing HTTP clients ===")
+    await close_http_clients()
+    await close_leaderboard()
+
 
 app = FastAPI(
     title="FastAPI",
     description="xxx",
     root_path="/teams",
+    lifespan=lifespan,
 )
 
 
 @app.middleware("http")
 async def metrics_middleware(request: Request, call_next):
     start_time = time.time()
+    outbound_calls = start_outbound_tracking()
     response = await call_next(request)
 
     duration = time.time() - start_time
@@ -48,6 +138,12 @@ async def metrics_middleware(request: Request, call_next):
         path,
     ).observe(duration)
 
+    route = request.scope.get("route")
+    OUTBOUND_PER_REQUEST.labels(
+        SERVICE_NAME,
+        route.path if route else path,
+    ).observe(len(outbound_calls))
+
     return response
 
 
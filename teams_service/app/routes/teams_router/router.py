@@ -1,13 +1,14 @@
 from typing import Optional
 
-from sqlalchemy import func, select
-from db.models.teams import Team
 from services.user_profile_client import UserProfileClient
 from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from shemas.team_shemas.team_register import TeamRegister
-from cruds.teams_crud.crud import TeamCRUD
+from cruds.teams_crud.crud import SortOrder, TeamCRUD, TeamsSortBy
+from db.models.teams_enums.enums import DirectionEnum
 from shemas.team_shemas.team_update import TeamUpdate
+from shemas.team_shemas.team_points import TeamPointsAward
 from db.session import get_db
 from services.grabber import get_current_user
 from services.orgs_client import OrgsClient
@@ -26,25 +27,7 @@ async def get_teams_count_by_region(
     db: AsyncSession = Depends(get_db),
 ):
     try:
-        if region:
-            query = select(func.count()).where(Team.region == region)
-            result = await db.execute(query)
-            count = result.scalar()
-
-            return {"region": region, "teams_count": count}
-
-        query = (
-            select(Team.region, func.count(Team.id).label("teams_count"))
-            .group_by(Team.region)
-            .order_by(func.count(Team.id).desc())
-        )
-
-        result = await db.execute(query)
-        regions_stats = result.all()
-
-        return [
-            {"region": region, "teams_count": count} for region, count in regions_stats
-        ]
+        return await TeamCRUD.get_teams_count_by_region(db=db, region=region)
 
     except Exception as e:
         logging.error(f"Error getting teams count by region: {str(e)}", exc_info=True)
@@ -95,6 +78,18 @@ async def update_team_data(
         raise HTTPException(status_code=500, detail=f"{str(e)}")
 
 
+@team_management_router.post("/add_points/{team_id}")
+async def add_points_to_team(
+    team_id: int, award: TeamPointsAward, db: AsyncSession = Depends(get_db)
+):
+    return await TeamCRUD.add_points(
+        db=db,
+        team_id=team_id,
+        points=award.points,
+        tasks_completed=award.tasks_completed,
+    )
+
+
 @team_membership_router.post("/join_team/{team_id}")
 async def join_team(team_id: int, request: Request, db: AsyncSession = Depends(get_db)):
     user_id = await get_current_user(request)
@@ -155,9 +150,58 @@ async def check_can_join_team(
 
 
 @team_discovery_router.get("/all_teams/")
-async def get_all_teams(db: AsyncSession = Depends(get_db)):
-    teams = await TeamCRUD.get_all_teams(db)
-    return teams
+async def get_all_teams():
+    """Прежний контракт: массив всех команд. Постраничный вывод — /v2/all_teams/."""
+    stream = await TeamCRUD.get_all_teams_stream(limit=None, paginated=False)
+    return StreamingResponse(stream, media_type="application/json")
+
+
+@team_discovery_router.get("/v2/all_teams/")
+async def get_all_teams_page(
+    region: Optional[str] = Query(None),
+    direction: Optional[DirectionEnum] = Query(None),
+    organization_id: Optional[int] = Query(None),
+    sort_by: TeamsSortBy = Query("id"),
+    order: SortOrder = Query("asc"),
+    cursor: Optional[str] = Query(None, description="next_cursor из предыдущей страницы"),
+    limit: int = Query(50, ge=1, le=200),
+    with_total: bool = Query(True, description="Считать общее количество команд"),
+):
+    stream = await TeamCRUD.get_all_teams_stream(
+        region=region,
+        direction=direction,
+        organization_id=organization_id,
+        sort_by=sort_by,
+        order=order,
+        cursor=cursor,
+        limit=limit,
+        with_total=with_total,
+    )
+    return StreamingResponse(stream, media_type="application/json")
+
+
+@team_discovery_router.get("/leaderboard")
+async def get_leaderboard(
+    limit: int = Query(10, ge=1, le=100),
+    region: Optional[str] = Query(None),
+    organization_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    return await TeamCRUD.get_leaderboard(
+        db=db, limit=limit, region=region, organization_id=organization_id
+    )
+
+
+@team_discovery_router.get("/leaderboard/{team_id}/rank")
+async def get_team_rank(
+    team_id: int,
+    region: Optional[str] = Query(None),
+    organization_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    return await TeamCRUD.get_team_rank(
+        db=db, team_id=team_id, region=region, organization_id=organization_id
+    )
 
 
 @team_discovery_router.get("/get_team_by_id/{team_id}")
@@ -171,23 +215,42 @@ async def get_team_by_id(team_id: int, db: AsyncSession = Depends(get_db)):
 
         members = await TeamCRUD.get_team_members_with_profiles(db, team_id)
 
-        composition = await TeamCRUD.analyze_team_composition(db, team_id)
+        # Роли участников без сохранённой роли уже разрешены по профилям
+        legacy_ids = set(await TeamCRUD._legacy_member_ids(db, team_id))
+        composition = TeamCRUD.team_composition(
+            team,
+            {m["user_id"]: m["role"] for m in members if m["user_id"] in legacy_ids},
+        )
 
         leader_info = None
         if team.leader_id:
-            leader_profile = await UserProfileClient.get_user_profile(team.leader_id)
-            if leader_profile:
+            leader = next(
+                (m for m in members if m["user_id"] == team.leader_id), None
+            )
+            if leader:
                 leader_info = {
                     "user_id": team.leader_id,
-                    "username": leader_profile.get("username", ""),
-                    "name": leader_profile.get("NameIRL", ""),
-                    "surname": leader_profile.get("Surname", ""),
-                    "role": await TeamCRUD.get_user_role(team.leader_id),
+                    "username": leader["username"],
+                    "name": leader["name"],
+                    "surname": leader["surname"],
+                    "role": leader["role"],
                 }
+            else:
+                leader_profile = await UserProfileClient.get_user_profile(
+                    team.leader_id
+                )
+                if leader_profile:
+                    leader_info = {
+                        "user_id": team.leader_id,
+                        "username": leader_profile.get("username", ""),
+                        "name": leader_profile.get("NameIRL", ""),
+                        "surname": leader_profile.get("Surname", ""),
+                        "role": TeamCRUD._extract_role(leader_profile),
+                    }
 
         organization_info = None
         if team.organization_id:
-            org_data = await OrgsClient.get_organization_by_id(team.organization_id)
+            org_data = await OrgsClient.get_cached_organization(team.organization_id)
             if org_data:
                 organization_info = {
                     "id": team.organization_id,
@@ -1,6 +1,7 @@
 # services/bot_client.py
-import httpx
 import logging
+from services.http_client import get_http_client
+from services.metrics import record_outbound
 
 
 class BotClient:
@@ -9,22 +10,23 @@ class BotClient:
     @staticmethod
     async def send_team_request_to_bot(leader_id: int, team_name: str, org_name: str):
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.post(
-                    BotClient.BOT_URL,
-                    json={
-                        "leader_id": leader_id,
-                        "team_name": team_name,
-                        "org_name": org_name,
-                    },
+            record_outbound("admin_bot", "team-requests")
+            client = get_http_client("admin_bot")
+            resp = await client.post(
+                BotClient.BOT_URL,
+                json={
+                    "leader_id": leader_id,
+                    "team_name": team_name,
+                    "org_name": org_name,
+                },
+            )
+            if resp.status_code == 200:
+                logging.info(
+                    f"✅ Team request sent to bot successfully: {team_name}, org: {org_name}"
+                )
+            else:
+                logging.error(
+                    f"❌ Failed to send team request: {resp.status_code} - {resp.text}"
                 )
-                if resp.status_code == 200:
-                    logging.info(
-                        f"✅ Team request sent to bot successfully: {team_name}, org: {org_name}"
-                    )
-                else:
-                    logging.error(
-                        f"❌ Failed to send team request: {resp.status_code} - {resp.text}"
-                    )
         except Exception as e:
             logging.error(f"Exception sending team request to bot: {e}")
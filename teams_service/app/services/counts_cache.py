@@ -0,0 +1,55 @@
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+from config import settings
+from services.single_flight import SingleFlight
+
+
+class TeamCountsCache:
+    """
+    Короткоживущий TTL + LRU кэш ответов по счётчикам команд.
+    Одновременные промахи по одному ключу выполняют загрузку один раз.
+    Загрузка, начатая до invalidate, свой результат в кэш не кладёт.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._flight = SingleFlight()
+        self._generation = 0
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._data.get(key)
+        if entry is not None:
+            if entry[0] >= time.monotonic():
+                self._data.move_to_end(key)
+                return entry[1]
+            del self._data[key]
+
+        # После invalidate новые запросы не присоединяются к старой загрузке
+        generation = self._generation
+        return await self._flight.run(
+            (generation, key), lambda: self._load(generation, key, loader)
+        )
+
+    async def _load(
+        self, generation: int, key: Hashable, loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        value = await loader()
+        if generation == self._generation:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._data.clear()
+
+
+team_counts_cache = TeamCountsCache(
+    maxsize=settings.TEAM_COUNTS_CACHE_MAXSIZE, ttl=settings.TEAM_COUNTS_CACHE_TTL
+)
@@ -0,0 +1,72 @@
+import logging
+
+import httpx
+
+from config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Лимиты пула и таймауты для каждого сервиса, в который ходит teams_service.
+TARGETS = {
+    "user_profile": {
+        "base_url": settings.USER_PROFILE_URL,
+        "max_connections": 50,
+        "max_keepalive_connections": 20,
+        "timeout": 5.0,
+    },
+    "orgs": {
+        "base_url": settings.ORGS_URL,
+        "max_connections": 20,
+        "max_keepalive_connections": 10,
+        "timeout": 5.0,
+    },
+    "admin_bot": {
+        "base_url": "",
+        "max_connections": 5,
+        "max_keepalive_connections": 2,
+        "timeout": 5.0,
+    },
+}
+
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+def _build_client(target: str) -> httpx.AsyncClient:
+    conf = TARGETS[target]
+    return httpx.AsyncClient(
+        base_url=conf["base_url"],
+        limits=httpx.Limits(
+            max_connections=conf["max_connections"],
+            max_keepalive_connections=conf["max_keepalive_connections"],
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(conf["timeout"], connect=settings.HTTP_CONNECT_TIMEOUT),
+    )
+
+
+def init_http_clients() -> None:
+    for target in TARGETS:
+        if target not in _clients:
+            _clients[target] = _build_client(target)
+    logger.info("HTTP clients initialized: %s", list(_clients))
+
+
+async def close_http_clients() -> None:
+    for target, client in list(_clients.items()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.error(f"Error closing HTTP client for {target}: {e}")
+    _clients.clear()
+
+
+def get_http_client(target: str) -> httpx.AsyncClient:
+    """
+    Общий клиент с пулом соединений для сервиса target.
+    Вне lifespan (скрипты, alembic) клиент создаётся лениво.
+    """
+    client = _clients.get(target)
+    if client is None or client.is_closed:
+        client = _clients[target] = _build_client(target)
+    return client
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+from typing import Optional
+
+import redis.asyncio as redis
+from sqlalchemy import select
+
+from config import settings
+from db.models.teams import Team
+from db.session import async_session_maker
+
+
+logger = logging.getLogger(__name__)
+
+# v2: в score закодирован id команды (см. _score); ключи v1 удаляются пересборкой
+KEY_PREFIX = "leaderboard:v2"
+GLOBAL_KEY = f"{KEY_PREFIX}:teams"
+REBUILD_LOCK_KEY = "leaderboard:rebuild_lock"
+# Выставляется, когда запись в sorted set не прошла: до пересборки чтения идут в SQL
+DIRTY_KEY = "leaderboard:dirty"
+
+# При равных очках Redis сортирует участников по строке, а SQL — по id.
+# score = points * ID_SPAN - id: больше очков выше, при равенстве выше меньший id,
+# как в ORDER BY points DESC, id ASC. Точно, пока |score| < 2**53 (очки < 2**29).
+ID_SPAN = 1 << 24
+
+_redis: Optional[redis.Redis] = None
+# Локальная копия флага на случай, когда недоступен сам Redis
+_dirty = False
+
+
+def scope_key(region: Optional[str] = None, organization_id: Optional[int] = None) -> str:
+    if organization_id:
+        return f"{KEY_PREFIX}:org:{organization_id}"
+    if region:
+        return f"{KEY_PREFIX}:region:{region}"
+    return GLOBAL_KEY
+
+
+def _score(team_id: int, points: Optional[int]) -> int:
+    return (points or 0) * ID_SPAN - team_id
+
+
+def _points(team_id: int, score: float) -> int:
+    return (int(score) + team_id) // ID_SPAN
+
+
+def _team_keys(region: Optional[str], organization_id: Optional[int]) -> list[str]:
+    keys = [GLOBAL_KEY]
+    if region:
+        keys.append(scope_key(region=region))
+    if organization_id:
+        keys.append(scope_key(organization_id=organization_id))
+    return keys
+
+
+async def init_leaderboard() -> None:
+    global _redis, _dirty
+    _redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+    try:
+        if not await _redis.exists(GLOBAL_KEY):
+            _dirty = True
+    except Exception as e:
+        logger.error(f"Leaderboard init failed, falling back to SQL ranking: {e}")
+        _dirty = True
+    await reconcile_leaderboard()
+
+
+async def close_leaderboard() -> None:
+    global _redis
+    if _redis:
+        await _redis.aclose()
+        _redis = None
+
+
+async def rebuild_leaderboard() -> bool:
+    """
+    Полная пересборка sorted set'ов из таблицы teams (один воркер за раз).
+    Любая запись в GLOBAL_KEY или DIRTY_KEY во время чтения teams отменяет
+    пересборку (WATCH): иначе DELETE затёр бы начисление, которого нет в снимке.
+    Возвращает True, если sorted set'ы пересобраны.
+    """
+    if not _redis:
+        return False
+    if not await _redis.set(REBUILD_LOCK_KEY, "1", nx=True, ex=60):
+        return False
+
+    try:
+        async with _redis.pipeline(transaction=True) as pipe:
+            await pipe.watch(GLOBAL_KEY, DIRTY_KEY)
+            async with async_session_maker() as session:
+                result = await session.stream(
+                    select(Team.id, Team.points, Team.region, Team.organization_id)
+                )
+
+                stale_keys = [key async for key in _redis.scan_iter("leaderboard:*")]
+                pipe.multi()
+                for key in stale_keys:
+                    if key != REBUILD_LOCK_KEY:
+                        pipe.delete(key)
+
+                async for team_id, points, region, organization_id in result:
+                    for key in _team_keys(region, organization_id):
+                        pipe.zadd(key, {str(team_id): _score(team_id, points)})
+
+            try:
+                await pipe.execute()
+            except redis.WatchError:
+                logger.info("Leaderboard changed during rebuild, retrying later")
+                return False
+        logger.info("Leaderboard rebuilt")
+        return True
+    finally:
+        await _redis.delete(REBUILD_LOCK_KEY)
+
+
+async def _mark_dirty() -> None:
+    global _dirty
+    _dirty = True
+    try:
+        await _redis.set(DIRTY_KEY, "1")
+    except Exception as e:
+        logger.error(f"Failed to mark leaderboard dirty: {e}")
+
+
+async def reconcile_leaderboard() -> bool:
+    """Пересобирает sorted set'ы, если запись в них не прошла (здесь или в другом воркере)."""
+    global _dirty
+    if not _redis:
+        return False
+    try:
+        if not _dirty and not await _redis.exists(DIRTY_KEY):
+            return False
+        # Сброс до пересборки: сбой записи во время неё снова выставит флаг
+        _dirty = False
+        if not await rebuild_leaderboard():
+            _dirty = True
+            return False
+        return True
+    except Exception as e:
+        _dirty = True
+        logger.error(f"Leaderboard reconcile failed: {e}")
+        return False
+
+
+async def run_leaderboard_reconciler() -> None:
+    while True:
+        await asyncio.sleep(settings.LEADERBOARD_RECONCILE_INTERVAL)
+        await reconcile_leaderboard()
+
+
+async def increment_team(
+    team_id: int, points: int, region: Optional[str], organization_id: Optional[int]
+) -> None:
+    if not _redis:
+        return
+    try:
+        pipe = _redis.pipeline(transaction=True)
+        for key in _team_keys(region, organization_id):
+            pipe.zincrby(key, points * ID_SPAN, str(team_id))
+        await pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to increment team {team_id} in leaderboard: {e}")
+        await _mark_dirty()
+
+
+async def set_team(
+    team: Team,
+    old_region: Optional[str] = None,
+    old_organization_id: Optional[int] = None,
+) -> None:
+    if not _redis:
+        return
+    try:
+        pipe = _redis.pipeline(transaction=True)
+        for key in _team_keys(old_region, old_organization_id):
+            pipe.zrem(key, str(team.id))
+        for key in _team_keys(team.region, team.organization_id):
+            pipe.zadd(key, {str(team.id): _score(team.id, team.points)})
+        await pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to update team {team.id} in leaderboard: {e}")
+        await _mark_dirty()
+
+
+async def remove_team(
+    team_id: int, region: Optional[str], organization_id: Optional[int]
+) -> None:
+    if not _redis:
+        return
+    try:
+        pipe = _redis.pipeline(transaction=True)
+        for key in _team_keys(region, organization_id):
+            pipe.zrem(key, str(team_id))
+        await pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to remove team {team_id} from leaderboard: {e}")
+        await _mark_dirty()
+
+
+async def top(
+    limit: int, region: Optional[str] = None, organization_id: Optional[int] = None
+) -> Optional[list[tuple[int, int]]]:
+    """[(team_id, points)] по убыванию очков; None, если Redis недоступен или рассинхронизирован."""
+    if not _redis or _dirty:
+        return None
+    try:
+        pipe = _redis.pipeline(transaction=False)
+        pipe.exists(DIRTY_KEY)
+        pipe.zrevrange(scope_key(region, organization_id), 0, limit - 1, withscores=True)
+        dirty, rows = await pipe.execute()
+        if dirty:
+            return None
+        return [(int(team_id), _points(int(team_id), score)) for team_id, score in rows]
+    except Exception as e:
+        logger.error(f"Leaderboard top failed: {e}")
+        return None
+
+
+async def rank(
+    team_id: int, region: Optional[str] = None, organization_id: Optional[int] = None
+) -> Optional[tuple[Optional[int], Optional[int]]]:
+    """(место начиная с 1, очки); None, если Redis недоступен или рассинхронизирован."""
+    if not _redis or _dirty:
+        return None
+    try:
+        key = scope_key(region, organization_id)
+        pipe = _redis.pipeline(transaction=False)
+        pipe.exists(DIRTY_KEY)
+        pipe.zrevrank(key, str(team_id))
+        pipe.zscore(key, str(team_id))
+        dirty, position, score = await pipe.execute()
+        if dirty:
+            return None
+        if position is None:
+            return None, None
+        return position + 1, _points(team_id, score)
+    except Exception as e:
+        logger.error(f"Leaderboard rank failed: {e}")
+        return None
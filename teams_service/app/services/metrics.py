@@ -0,0 +1,30 @@
+from contextvars import ContextVar
+
+from prometheus_client import Counter
+
+
+OUTBOUND_REQUEST_COUNT = Counter(
+    "outbound_requests_total",
+    "Total outbound HTTP requests to other services",
+    ["service", "target", "endpoint"],
+)
+
+SERVICE_NAME = "teams_service"
+
+# Список вызовов, сделанных в рамках текущего входящего запроса.
+# Выставляется в metrics_middleware, клиенты дописывают в него через record_outbound.
+_outbound_calls: ContextVar[list | None] = ContextVar("outbound_calls", default=None)
+
+
+def start_outbound_tracking() -> list:
+    calls: list = []
+    _outbound_calls.set(calls)
+    return calls
+
+
+def record_outbound(target: str, endpoint: str) -> None:
+    OUTBOUND_REQUEST_COUNT.labels(SERVICE_NAME, target, endpoint).inc()
+
+    calls = _outbound_calls.get()
+    if calls is not None:
+        calls.append((target, endpoint))
@@ -0,0 +1,108 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from config import settings
+from services.single_flight import SingleFlight
+
+
+logger = logging.getLogger(__name__)
+
+Fetcher = Callable[[list[int]], Awaitable[Dict[int, Dict[str, Any]]]]
+
+
+class OrgCache:
+    """
+    TTL + LRU кэш записей организаций из orgs_service.
+    Одновременные промахи по одному id склеиваются в один запрос (single-flight).
+    Загрузка, начатая до invalidate, свой результат в кэш не кладёт.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[int, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._flight = SingleFlight()
+        self._generation = 0
+
+    def _get_fresh(self, org_id: int) -> Optional[Dict[str, Any]]:
+        entry = self._data.get(org_id)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[org_id]
+            return None
+
+        self._data.move_to_end(org_id)
+        return value
+
+    def _put(self, org_id: int, value: Dict[str, Any]) -> None:
+        self._data[org_id] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(org_id)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def get_many(
+        self, org_ids: Iterable[int], fetcher: Fetcher
+    ) -> Dict[int, Dict[str, Any]]:
+        result: Dict[int, Dict[str, Any]] = {}
+        missing: list[int] = []
+
+        for org_id in set(org_ids):
+            if not org_id or org_id <= 0:
+                continue
+
+            cached = self._get_fresh(org_id)
+            if cached is not None:
+                result[org_id] = cached
+            else:
+                missing.append(org_id)
+
+        if missing:
+            # После invalidate новые запросы не присоединяются к старой загрузке
+            generation = self._generation
+            loaded = await self._flight.run_many(
+                [(generation, org_id) for org_id in missing],
+                lambda keys: self._load(generation, keys, fetcher),
+            )
+            result.update(
+                (org_id, value)
+                for (_, org_id), value in loaded.items()
+                if value is not None
+            )
+
+        return result
+
+    async def _load(
+        self, generation: int, keys: list[tuple[int, int]], fetcher: Fetcher
+    ) -> dict:
+        org_ids = [org_id for _, org_id in keys]
+        try:
+            fetched = await fetcher(org_ids)
+        except Exception as e:
+            logger.error(f"Failed to fetch organizations {org_ids}: {e}")
+            fetched = {}
+
+        if generation == self._generation:
+            for org_id, value in fetched.items():
+                if value is not None:
+                    self._put(org_id, value)
+        return {(generation, org_id): fetched.get(org_id) for org_id in org_ids}
+
+    async def get(self, org_id: int, fetcher: Fetcher) -> Optional[Dict[str, Any]]:
+        return (await self.get_many([org_id], fetcher)).get(org_id)
+
+    def invalidate(self, org_ids: Optional[Iterable[int]] = None) -> None:
+        self._generation += 1
+        if org_ids is None:
+            self._data.clear()
+            return
+
+        for org_id in org_ids:
+            self._data.pop(org_id, None)
+
+
+org_cache = OrgCache(maxsize=settings.ORG_CACHE_MAXSIZE, ttl=settings.ORG_CACHE_TTL)
@@ -1,38 +1,71 @@
 import httpx
 import logging
 from typing import Optional, Dict, Any
-from config import settings
+from services.http_client import get_http_client
+from services.metrics import record_outbound
+from services.org_cache import org_cache
 
 logger = logging.getLogger(__name__)
 
 
 class OrgsClient:
-    ORGS_URL = settings.ORGS_URL
-
     @staticmethod
     async def get_organization_by_id(org_id: int) -> Optional[Dict[str, Any]]:
         if not org_id or org_id <= 0:
             return None
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.get(
-                    f"{OrgsClient.ORGS_URL}/organizations/org/{org_id}"
-                )
+            record_outbound("orgs", "organizations/org")
+            client = get_http_client("orgs")
+            resp = await client.get(f"/organizations/org/{org_id}")
 
-                if resp.status_code == 200:
-                    logger.info(f" Organization {org_id} fetched successfully")
-                    return resp.json()
-                elif resp.status_code == 404:
-                    logger.warning(f" Organization {org_id} not found")
-                    return None
-                else:
-                    logger.error(
-                        f" Error fetching organization {org_id}: {resp.status_code} - {resp.text}"
-                    )
-                    return None
+            if resp.status_code == 200:
+                logger.info(f" Organization {org_id} fetched successfully")
+                return resp.json()
+            elif resp.status_code == 404:
+                logger.warning(f" Organization {org_id} not found")
+                return None
+            else:
+                logger.error(
+                    f" Error fetching organization {org_id}: {resp.status_code} - {resp.text}"
+                )
+                return None
         except httpx.ConnectError as e:
             logger.error(f" Cannot connect to organizations service: {e}")
             return None
         except Exception as e:
             logger.error(f" Exception fetching organization {org_id}: {e}")
             return None
+
+    @staticmethod
+    async def get_organizations_by_ids(org_ids: list[int]) -> Dict[int, Dict[str, Any]]:
+        org_ids = [org_id for org_id in org_ids if org_id and org_id > 0]
+        if not org_ids:
+            return {}
+        try:
+            record_outbound("orgs", "organizations/batch")
+            client = get_http_client("orgs")
+            resp = await client.post(
+                "/organizations/batch", json={"org_ids": org_ids}
+            )
+
+            if resp.status_code == 200:
+                return {int(org_id): org for org_id, org in resp.json().items()}
+
+            logger.error(
+                f" Error fetching organizations batch: {resp.status_code} - {resp.text}"
+            )
+            return {}
+        except httpx.ConnectError as e:
+            logger.error(f" Cannot connect to organizations service: {e}")
+            return {}
+        except Exception as e:
+            logger.error(f" Exception fetching organizations batch: {e}")
+            return {}
+
+    @staticmethod
+    async def get_cached_organizations(org_ids: list[int]) -> Dict[int, Dict[str, Any]]:
+        return await org_cache.get_many(org_ids, OrgsClient.get_organizations_by_ids)
+
+    @staticmethod
+    async def get_cached_organization(org_id: int) -> Optional[Dict[str, Any]]:
+        return await org_cache.get(org_id, OrgsClient.get_organizations_by_ids)
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Optional
+
+import aio_pika
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from db.models.outbox import OutboxEvent
+from db.models.team_counts import TeamOrgCount
+from db.session import async_session_maker
+
+
+logger = logging.getLogger(__name__)
+
+MEMBERSHIP_EVENT = "team.membership_changed"
+TEAM_EVENTS_EXCHANGE = "team_events"
+
+ORG_COUNTS_EVENT = "org.counts_changed"
+ORG_EVENTS_EXCHANGE = "org_events"
+
+# Ключ advisory-блокировки: публикует только один воркер, порядок событий сохраняется
+RELAY_LOCK_ID = 0x7EA05
+
+_wakeup = asyncio.Event()
+
+
+def membership_change(
+    user_id: int,
+    team_id: int,
+    team_name: str,
+    organization_id: Optional[int] = None,
+    organization_name: Optional[str] = None,
+) -> dict:
+    """Состояние участника после операции; None в полях организации — не менять."""
+    return {
+        "user_id": user_id,
+        "team_id": team_id,
+        "team": team_name,
+        "organization_id": organization_id,
+        "organization_name": organization_name,
+    }
+
+
+def enqueue_membership_changes(db: AsyncSession, members: list[dict]) -> None:
+    """Кладёт событие в outbox в той же транзакции, что и изменение состава команды."""
+    if members:
+        db.add(OutboxEvent(event_type=MEMBERSHIP_EVENT, payload={"members": members}))
+
+
+def enqueue_org_counts_changed(db: AsyncSession, organization_ids: list[int]) -> None:
+    """Отмечает организации, у которых изменилось число команд."""
+    organization_ids = [org_id for org_id in organization_ids if org_id]
+    if organization_ids:
+        db.add(
+            OutboxEvent(
+                event_type=ORG_COUNTS_EVENT,
+                payload={"organization_ids": organization_ids},
+            )
+        )
+
+
+def notify_relay() -> None:
+    _wakeup.set()
+
+
+def _merge_members(events: list[OutboxEvent]) -> list[dict]:
+    """
+    Итоговое состояние каждого участника; seq — id последнего события по нему.
+    По seq user_profile отбрасывает состояние, доставленное позже более нового.
+    """
+    merged: dict[int, dict] = {}
+    for event in events:
+        for member in event.payload.get("members", []):
+            state = merged.setdefault(member["user_id"], {})
+            state.update({k: v for k, v in member.items() if v is not None})
+            state["seq"] = event.id
+    return list(merged.values())
+
+
+async def _publish(exchange, event_type: str, message_data: dict) -> None:
+    await exchange.publish(
+        aio_pika.Message(
+            body=json.dumps(message_data).encode(),
+            headers={"event_type": event_type},
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+        ),
+        routing_key=event_type,
+    )
+
+
+async def _publish_membership(session: AsyncSession, exchange, events: list) -> None:
+    members = _merge_members(events)
+    await _publish(
+        exchange,
+        MEMBERSHIP_EVENT,
+        {
+            "event_type": MEMBERSHIP_EVENT,
+            "members": members,
+            "timestamp": str(datetime.utcnow()),
+        },
+    )
+    logger.info(
+        "[OUTBOX] Published %s membership events (%s members)",
+        len(events),
+        len(members),
+    )
+
+
+async def _publish_org_counts(session: AsyncSession, exchange, events: list) -> None:
+    """Публикует текущее число команд (а не дельты), поэтому повторы безопасны."""
+    org_ids = sorted(
+        {org_id for event in events for org_id in event.payload["organization_ids"]}
+    )
+    counted_at = datetime.utcnow()
+    result = await session.execute(
+        select(TeamOrgCount.organization_id, TeamOrgCount.teams_count).where(
+            TeamOrgCount.organization_id.in_(org_ids)
+        )
+    )
+    counts = {org_id: 0 for org_id in org_ids}
+    counts.update(dict(result.all()))
+
+    await _publish(
+        exchange,
+        ORG_COUNTS_EVENT,
+        {
+            "event_type": ORG_COUNTS_EVENT,
+            "counts": [
+                {"id": org_id, "teams_count": count} for org_id, count in counts.items()
+            ],
+            "timestamp": str(counted_at),
+        },
+    )
+    logger.info("[OUTBOX] Published team counts for %s orgs", len(org_ids))
+
+
+async def _relay_batch(exchanges: dict) -> int:
+    async with async_session_maker() as session:  # type: ignore
+        locked = await session.scalar(
+            select(func.pg_try_advisory_xact_lock(RELAY_LOCK_ID))
+        )
+        if not locked:
+            return 0
+
+        result = await session.execute(
+            select(OutboxEvent)
+            .order_by(OutboxEvent.id)
+            .limit(settings.OUTBOX_BATCH_SIZE)
+        )
+        events = result.scalars().all()
+        if not events:
+            return 0
+
+        publishers = {
+            MEMBERSHIP_EVENT: _publish_membership,
+            ORG_COUNTS_EVENT: _publish_org_counts,
+        }
+        for event_type, publisher in publishers.items():
+            typed_events = [e for e in events if e.event_type == event_type]
+            if typed_events:
+                await publisher(session, exchanges[event_type], typed_events)
+
+        await session.execute(
+            delete(OutboxEvent).where(OutboxEvent.id.in_([e.id for e in events]))
+        )
+        await session.commit()
+        return len(events)
+
+
+async def run_outbox_relay(rabbitmq_url: str):
+    connection = await aio_pika.connect_robust(rabbitmq_url)
+    channel = await connection.channel()
+    exchanges = {
+        MEMBERSHIP_EVENT: await channel.declare_exchange(
+            TEAM_EVENTS_EXCHANGE, type="direct", durable=True
+        ),
+        ORG_COUNTS_EVENT: await channel.declare_exchange(
+            ORG_EVENTS_EXCHANGE, type="direct", durable=True
+        ),
+    }
+
+    logger.info("[OUTBOX] Relay started")
+
+    while True:
+        _wakeup.clear()
+        try:
+            published = await _relay_batch(exchanges)
+        except Exception as e:
+            logger.error("[OUTBOX] Relay batch failed: %s", e, exc_info=True)
+            published = 0
+
+        if published >= settings.OUTBOX_BATCH_SIZE:
+            continue
+
+        try:
+            await asyncio.wait_for(_wakeup.wait(), settings.OUTBOX_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,218 @@
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+import aio_pika
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from db.models.team_members import TeamMember
+from db.models.teams import Team
+from db.models.user_roles import UserRole
+from db.session import async_session_maker
+from services.org_cache import org_cache
+
+
+logger = logging.getLogger(__name__)
+
+KNOWN_ROLES = {"student", "teacher", "moder", "admin"}
+
+
+async def _recount_composition(session, team_id: int):
+    """Пересчитывает счётчики состава команды; строка команды уже заблокирована."""
+
+    def role_count(role: str):
+        return (
+            select(func.count(TeamMember.id))
+            .where(TeamMember.team_id == team_id, TeamMember.role == role)
+            .scalar_subquery()
+        )
+
+    await session.execute(
+        update(Team)
+        .where(Team.id == team_id)
+        .values(students_count=role_count("student"), teachers_count=role_count("teacher"))
+    )
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """Публикатор пишет str(datetime.utcnow()) — наивное UTC-время."""
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+async def apply_role_update(
+    user_id: int, role: str, changed_at: Optional[datetime] = None
+) -> int:
+    """
+    Сохраняет роль участника и пересчитывает состав его команды.
+    Сначала отдельной транзакцией пишется user_roles: если join_team уже
+    держит эту строку, ждём его коммита и ниже видим нового участника.
+    Блокировки берутся в том же порядке, что в join_team/leave_team: сначала
+    строка teams, затем team_members, иначе возможна взаимоблокировка.
+    Возвращает число обновлённых участников (0 — пользователь не в команде
+    или событие старее уже записанного).
+    """
+    async with async_session_maker() as session:  # type: ignore
+        stmt = pg_insert(UserRole).values(
+            user_id=user_id, role=role, changed_at=changed_at or func.now()
+        )
+        stored = await session.scalar(
+            stmt.on_conflict_do_update(
+                index_elements=[UserRole.user_id],
+                set_={"role": stmt.excluded.role, "changed_at": stmt.excluded.changed_at},
+                where=or_(
+                    UserRole.changed_at.is_(None),
+                    UserRole.changed_at <= stmt.excluded.changed_at,
+                ),
+            ).returning(UserRole.role)
+        )
+        await session.commit()
+        if stored is None:
+            return 0
+
+        # Участнику — последняя записанная роль, а не роль из этого события
+        latest_role = (
+            select(UserRole.role).where(UserRole.user_id == user_id).scalar_subquery()
+        )
+
+        while True:
+            team_id = await session.scalar(
+                select(TeamMember.team_id).where(TeamMember.user_id == user_id)
+            )
+            if team_id is None:
+                return 0
+
+            await session.execute(
+                select(Team.id).where(Team.id == team_id).with_for_update()
+            )
+            result = await session.execute(
+                update(TeamMember)
+                .where(TeamMember.user_id == user_id, TeamMember.team_id == team_id)
+                .values(role=latest_role)
+                .returning(TeamMember.id)
+            )
+            if result.first() is None:
+                # Пока ждали блокировку, участник вышел или перешёл в другую команду
+                await session.rollback()
+                continue
+
+            await _recount_composition(session, team_id)
+            await session.commit()
+            return 1
+
+
+async def consume_role_updated_events(rabbitmq_url: str):
+    connection = await aio_pika.connect_robust(rabbitmq_url)
+    channel = await connection.channel()
+
+    exchange = await channel.declare_exchange(
+        "user_events", type="direct", durable=True
+    )
+
+    queue = await channel.declare_queue("teams_role_queue", durable=True)
+
+    await queue.bind(exchange, routing_key="user.role_updated")
+
+    logger.info("[CONSUMER] Waiting for user.role_updated events")
+
+    async with queue.iterator() as queue_iter:
+        async for message in queue_iter:
+            try:
+                data = json.loads(message.body.decode())
+
+                user_id = data.get("user_id")
+                role_str = str(data.get("new_role")).lower()
+
+                if not user_id or role_str not in KNOWN_ROLES:
+                    logger.warning("[CONSUMER] Skipping role update payload: %s", data)
+                    await message.ack()
+                    continue
+
+                updated = await apply_role_update(
+                    user_id, role_str, _parse_timestamp(data.get("timestamp"))
+                )
+
+                logger.info(
+                    "[CONSUMER] Member role for user_id=%s set to %s (%s rows)",
+                    user_id,
+                    role_str,
+                    updated,
+                )
+                await message.ack()
+
+            except Exception as e:
+                logger.error(
+                    "[CONSUMER] Error processing user.role_updated: %s",
+                    e,
+                    exc_info=True,
+                )
+                await message.nack(requeue=False)
+
+
+async def _declare_org_events(channel):
+    return await channel.declare_exchange("org_events", type="direct", durable=True)
+
+
+async def consume_org_updated_events(rabbitmq_url: str):
+    """Общая durable-очередь: обновляет organization_name у команд изменённых организаций."""
+    connection = await aio_pika.connect_robust(rabbitmq_url)
+    channel = await connection.channel()
+    exchange = await _declare_org_events(channel)
+
+    queue = await channel.declare_queue("teams_org_updated_queue", durable=True)
+    await queue.bind(exchange, routing_key="org.updated")
+
+    logger.info("[CONSUMER] Waiting for org.updated events")
+
+    async with queue.iterator() as queue_iter:
+        async for message in queue_iter:
+            try:
+                data = json.loads(message.body.decode())
+                orgs = data.get("orgs") or []
+
+                async with async_session_maker() as session:  # type: ignore
+                    for org in orgs:
+                        org_name = org.get("short_name") or org.get("full_name")
+                        if not org.get("id") or not org_name:
+                            continue
+                        await session.execute(
+                            update(Team)
+                            .where(
+                                Team.organization_id == org["id"],
+                                Team.organization_name.is_distinct_from(org_name),
+                            )
+                            .values(organization_name=org_name)
+                        )
+                    await session.commit()
+
+                org_cache.invalidate(org.get("id") for org in orgs)
+                await message.ack()
+
+            except Exception as e:
+                logger.error(
+                    "[CONSUMER] Error processing org.updated: %s", e, exc_info=True
+                )
+                await message.nack(requeue=False)
+
+
+async def consume_org_cache_invalidation(rabbitmq_url: str):
+    """Эксклюзивная очередь воркера: сбрасывает изменённые организации из локального кэша."""
+    connection = await aio_pika.connect_robust(rabbitmq_url)
+    channel = await connection.channel()
+    exchange = await _declare_org_events(channel)
+
+    queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+    await queue.bind(exchange, routing_key="org.updated")
+
+    async with queue.iterator() as queue_iter:
+        async for message in queue_iter:
+            async with message.process():
+                data = json.loads(message.body.decode())
+                org_ids = [org.get("id") for org in data.get("orgs") or []]
+                org_cache.invalidate(org_ids)
+                logger.info("[CONSUMER] Org cache invalidated for %s", org_ids)
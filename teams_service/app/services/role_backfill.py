@@ -0,0 +1,98 @@
+import asyncio
+import logging
+
+from sqlalchemy import case, func, select, update
+
+from config import settings
+from db.models.team_members import TeamMember
+from db.models.teams import Team
+from db.session import async_session_maker
+from services.rabbitmq import _recount_composition
+
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_member_roles(batch_size: int = 500) -> int:
+    """
+    Дозаполняет team_members.role у участников, вступивших до появления
+    колонки (b1f4c2d9e7a3), ролями из user_profile и пересчитывает состав
+    их команд. Повторный запуск трогает только оставшиеся NULL.
+    Возвращает число заполненных участников.
+    """
+    from cruds.teams_crud.crud import TeamCRUD
+
+    filled = 0
+    last_id = 0
+    while True:
+        async with async_session_maker() as session:  # type: ignore
+            rows = (
+                await session.execute(
+                    select(TeamMember.id, TeamMember.user_id)
+                    .where(TeamMember.role.is_(None), TeamMember.id > last_id)
+                    .order_by(TeamMember.id)
+                    .limit(batch_size)
+                )
+            ).all()
+        if not rows:
+            return filled
+        last_id = rows[-1].id
+
+        # HTTP-вызов вне транзакции
+        roles = await TeamCRUD.get_users_roles([row.user_id for row in rows])
+        roles = {user_id: role for user_id, role in roles.items() if role}
+        if not roles:
+            continue
+
+        async with async_session_maker() as session:  # type: ignore
+            team_ids = sorted(
+                set(
+                    await session.scalars(
+                        select(TeamMember.team_id).where(
+                            TeamMember.user_id.in_(roles), TeamMember.role.is_(None)
+                        )
+                    )
+                )
+            )
+            # Порядок блокировок как в join_team/leave_team: строки teams, затем team_members
+            await session.execute(
+                select(Team.id)
+                .where(Team.id.in_(team_ids))
+                .order_by(Team.id)
+                .with_for_update()
+            )
+            result = await session.execute(
+                update(TeamMember)
+                .where(TeamMember.user_id.in_(roles), TeamMember.role.is_(None))
+                .values(role=case(roles, value=TeamMember.user_id))
+            )
+            for team_id in team_ids:
+                await _recount_composition(session, team_id)
+            await session.commit()
+            filled += result.rowcount
+
+
+async def run_role_backfill() -> None:
+    """
+    Фоновый бэкфилл ролей при старте. Пока user_profile недоступен или
+    остаются участники без роли, повторяется раз в ROLE_BACKFILL_INTERVAL.
+    """
+    while True:
+        try:
+            filled = await backfill_member_roles()
+            if filled:
+                logger.info(f"Backfilled roles for {filled} team members")
+
+            async with async_session_maker() as session:  # type: ignore
+                remaining = await session.scalar(
+                    select(func.count(TeamMember.id)).where(TeamMember.role.is_(None))
+                )
+            if not remaining:
+                return
+            logger.warning(f"{remaining} team members still have no role")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Team member role backfill failed: {e}")
+
+        await asyncio.sleep(settings.ROLE_BACKFILL_INTERVAL)
@@ -0,0 +1,90 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, Iterable, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Склеивает одновременные загрузки по одному ключу: загрузчик выполняется
+    один раз, остальные получают его результат или исключение. Если загрузку
+    отменили, ожидающие не зависают, а выполняют её сами.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        while (future := self._inflight.get(key)) is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Отменили этот запрос, а не загрузку — пробрасываем
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        future.set_result(result)
+        return result
+
+    async def run_many(
+        self,
+        keys: Iterable[Hashable],
+        loader: Callable[[list], Awaitable[dict]],
+    ) -> dict[Hashable, Optional[T]]:
+        """
+        То же для пачки ключей: ключи, которые уже загружаются, ждут чужую
+        загрузку, остальные загружаются одним вызовом loader(keys) -> {key: value}.
+        Ключи, которых нет в ответе, получают None.
+        """
+        keys = list(dict.fromkeys(keys))
+        waiting = {key: self._inflight[key] for key in keys if key in self._inflight}
+        to_load = [key for key in keys if key not in waiting]
+        result: dict[Hashable, Optional[T]] = {}
+
+        if to_load:
+            loop = asyncio.get_running_loop()
+            futures = {key: loop.create_future() for key in to_load}
+            self._inflight.update(futures)
+            try:
+                loaded = await loader(to_load)
+            except asyncio.CancelledError:
+                for future in futures.values():
+                    future.cancel()
+                raise
+            except BaseException as e:
+                for future in futures.values():
+                    future.set_exception(e)
+                    future.exception()
+                raise
+            finally:
+                for key in to_load:
+                    self._inflight.pop(key, None)
+
+            for key, future in futures.items():
+                result[key] = loaded.get(key)
+                future.set_result(result[key])
+
+        for key, future in waiting.items():
+            try:
+                result[key] = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                result.update(await self.run_many([key], loader))
+
+        return result
@@ -0,0 +1,6 @@
+from pydantic import BaseModel, Field
+
+
+class TeamPointsAward(BaseModel):
+    points: int = Field(..., title="Начисляемые очки")
+    tasks_completed: int = Field(1, ge=0, title="Сколько задач засчитать")
@@ -0,0 +1,69 @@
+import pytest
+import pytest_asyncio
+
+from db.models.teams import Team
+from db.models.teams_enums.enums import DirectionEnum
+from db.session import async_session_maker
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest_asyncio.fixture
+async def teams(db_engine):
+    async with async_session_maker() as session:
+        session.add_all(
+            [
+                Team(
+                    name=f"team {i}",
+                    direction=DirectionEnum.science,
+                    region="Москва" if i % 2 else "Казань",
+                    points=i * 10,
+                    number_of_members=1,
+                )
+                for i in range(1, 8)
+            ]
+        )
+        await session.commit()
+
+
+async def test_legacy_endpoint_returns_bare_list(client, teams):
+    response = await client.get("/all_teams/")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert isinstance(body, list)
+    assert [team["id"] for team in body] == list(range(1, 8))
+
+
+async def test_v2_pages_follow_cursor(client, teams):
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 3, "sort_by": "points", "order": "desc"}
+        if cursor:
+            params["cursor"] = cursor
+        page = (await client.get("/v2/all_teams/", params=params)).json()
+
+        assert page["total"] == 7
+        ids += [team["id"] for team in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert ids == list(range(7, 0, -1))
+
+
+async def test_v2_invalid_cursor_is_rejected_before_streaming(client, teams):
+    response = await client.get("/v2/all_teams/", params={"cursor": "broken"})
+    assert response.status_code == 400
+
+
+async def test_v2_database_error_returns_500(client, teams, monkeypatch):
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    async def broken_stream(self, *args, **kwargs):
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(AsyncSession, "stream_scalars", broken_stream)
+
+    response = await client.get("/v2/all_teams/")
+    assert response.status_code == 500
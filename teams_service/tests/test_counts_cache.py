@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from services.counts_cache import TeamCountsCache
+from services.single_flight import SingleFlight
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_single_flight_waiters_survive_cancelled_leader():
+    flight = SingleFlight()
+    started = asyncio.Event()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        started.set()
+        await asyncio.sleep(0.01)
+        return "value"
+
+    leader = asyncio.create_task(flight.run("key", loader))
+    await started.wait()
+    waiter = asyncio.create_task(flight.run("key", loader))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+    assert await asyncio.wait_for(waiter, 1) == "value"
+    assert len(calls) == 2
+
+
+async def test_single_flight_shares_errors():
+    flight = SingleFlight()
+
+    async def loader():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(flight.run("key", loader) for _ in range(5)), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+async def test_concurrent_misses_share_one_load():
+    cache = TeamCountsCache(maxsize=10, ttl=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"total": 1}
+
+    results = await asyncio.gather(*(cache.get("key", loader) for _ in range(20)))
+
+    assert len(calls) == 1
+    assert all(result == {"total": 1} for result in results)
+
+
+async def test_cache_is_bounded_lru():
+    cache = TeamCountsCache(maxsize=3, ttl=60)
+
+    async def loader():
+        return 0
+
+    for key in range(3):
+        await cache.get(key, loader)
+    await cache.get(0, loader)
+    await cache.get(3, loader)
+
+    assert list(cache._data) == [2, 0, 3]
+
+
+async def test_expired_entries_are_reloaded():
+    cache = TeamCountsCache(maxsize=10, ttl=0)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return len(calls)
+
+    await cache.get("key", loader)
+    await asyncio.sleep(0.001)
+    assert await cache.get("key", loader) == 2
+
+
+async def test_load_started_before_invalidate_is_not_cached():
+    cache = TeamCountsCache(maxsize=10, ttl=60)
+    release = asyncio.Event()
+
+    async def stale():
+        await release.wait()
+        return "stale"
+
+    async def fresh():
+        return "fresh"
+
+    pending = asyncio.create_task(cache.get("key", stale))
+    await asyncio.sleep(0)
+    cache.invalidate()
+
+    assert await cache.get("key", fresh) == "fresh"
+    release.set()
+    assert await pending == "stale"
+    assert await cache.get("key", stale) == "fresh"
@@ -0,0 +1,211 @@
+"""
+Стресс-тесты вступления в команду на настоящем Postgres: сотни параллельных
+вступлений не должны переполнить команду или рассинхронизировать счётчики.
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from cruds.teams_crud.crud import TeamCRUD
+from db.models.teams import Team
+from db.models.team_members import TeamMember
+from db.models.teams_enums.enums import DirectionEnum
+from db.session import async_session_maker
+from services.rabbitmq import apply_role_update
+
+pytestmark = pytest.mark.asyncio
+
+PARALLEL_JOINS = 300
+
+
+async def _create_team(leader_id: int, leader_role: str = "teacher") -> int:
+    async with async_session_maker() as session:
+        team = Team(
+            name=f"team of {leader_id}",
+            direction=DirectionEnum.science,
+            region="Москва",
+            leader_id=leader_id,
+            number_of_members=1,
+            students_count=int(leader_role == "student"),
+            teachers_count=int(leader_role == "teacher"),
+        )
+        session.add(team)
+        await session.flush()
+        session.add(
+            TeamMember(team_id=team.id, user_id=leader_id, is_leader=True, role=leader_role)
+        )
+        await session.commit()
+        return team.id
+
+
+async def _join(team_id: int, user_id: int) -> int:
+    async with async_session_maker() as session:
+        try:
+            await TeamCRUD.join_team(session, team_id, user_id)
+            return 200
+        except HTTPException as e:
+            return e.status_code
+
+
+async def _composition(team_id: int) -> tuple[dict, dict]:
+    """(счётчики из строки teams, фактический состав по team_members)"""
+    async with async_session_maker() as session:
+        team = await session.get(Team, team_id)
+        rows = dict(
+            (
+                await session.execute(
+                    select(TeamMember.role, func.count(TeamMember.id))
+                    .where(TeamMember.team_id == team_id)
+                    .group_by(TeamMember.role)
+                )
+            ).all()
+        )
+    actual = {
+        "students": rows.get("student", 0),
+        "teachers": rows.get("teacher", 0),
+        "total": sum(rows.values()),
+    }
+    return TeamCRUD.team_composition(team), actual
+
+
+@pytest_asyncio.fixture
+async def team_id(db_engine, services):
+    return await _create_team(leader_id=1)
+
+
+async def test_parallel_joins_never_overfill_team(services, team_id):
+    user_ids = range(100, 100 + PARALLEL_JOINS)
+    services.roles.update(
+        {user_id: "student" if user_id % 2 else "teacher" for user_id in user_ids}
+    )
+
+    statuses = await asyncio.gather(*(_join(team_id, user_id) for user_id in user_ids))
+
+    # Лидер-преподаватель + 1 студент + 2 преподавателя; остальные — 400, не 500
+    assert statuses.count(200) == 3
+    assert set(statuses) == {200, 400}
+
+    counters, actual = await _composition(team_id)
+    assert actual == {"students": 1, "teachers": 3, "total": 4}
+    assert counters == actual
+
+
+async def test_parallel_joins_of_one_user_land_in_one_team(db_engine, services):
+    user_id = 500
+    services.roles[user_id] = "teacher"
+    team_ids = [await _create_team(leader_id=1000 + i) for i in range(50)]
+
+    statuses = await asyncio.gather(*(_join(team_id, user_id) for team_id in team_ids))
+
+    assert statuses.count(200) == 1
+    assert set(statuses) == {200, 400}
+    async with async_session_maker() as session:
+        memberships = await session.scalar(
+            select(func.count(TeamMember.id)).where(TeamMember.user_id == user_id)
+        )
+    assert memberships == 1
+
+
+async def test_role_updates_race_with_joins_and_leaves(db_engine, services):
+    """Консьюмер ролей блокирует строки в том же порядке, что join/leave."""
+    team_ids = [await _create_team(leader_id=2000 + i) for i in range(20)]
+    members = {team_id: 3000 + i for i, team_id in enumerate(team_ids)}
+    newcomers = {team_id: 4000 + i for i, team_id in enumerate(team_ids)}
+    services.roles.update({user_id: "teacher" for user_id in members.values()})
+    services.roles.update({user_id: "student" for user_id in newcomers.values()})
+
+    for team_id, user_id in members.items():
+        assert await _join(team_id, user_id) == 200
+
+    async def leave(team_id: int, user_id: int):
+        async with async_session_maker() as session:
+            await TeamCRUD.leave_team(session, team_id, user_id)
+
+    await asyncio.gather(
+        *(leave(team_id, user_id) for team_id, user_id in members.items()),
+        *(apply_role_update(user_id, "student") for user_id in members.values()),
+        *(_join(team_id, user_id) for team_id, user_id in newcomers.items()),
+        *(apply_role_update(leader_id, "teacher") for leader_id in range(2000, 2020)),
+    )
+
+    for team_id in team_ids:
+        counters, actual = await _composition(team_id)
+        assert counters == actual
+        assert actual["total"] == 2
+
+
+async def test_legacy_roles_are_resolved_before_locking(services, team_id):
+    """Роли участников без role приходят тем же батч-запросом, что и роль вступающего."""
+    async with async_session_maker() as session:
+        session.add(TeamMember(team_id=team_id, user_id=2, is_leader=False, role=None))
+        await session.commit()
+    services.roles.update({2: "student", 3: "teacher"})
+
+    assert await _join(team_id, 3) == 200
+
+    assert services.count("user_profile") == 1
+    counters, actual = await _composition(team_id)
+    assert actual == {"students": 1, "teachers": 2, "total": 3}
+    assert counters == actual
+
+
+async def _member_role(user_id: int) -> str | None:
+    async with async_session_maker() as session:
+        return await session.scalar(
+            select(TeamMember.role).where(TeamMember.user_id == user_id)
+        )
+
+
+async def test_role_event_after_lookup_wins_over_fetched_role(services, team_id, monkeypatch):
+    """Событие пришло между запросом к user_profile и блокировкой команды."""
+    services.roles[5] = "teacher"
+    get_users_roles = TeamCRUD.get_users_roles
+
+    async def lookup_then_event(user_ids):
+        roles = await get_users_roles(user_ids)
+        await apply_role_update(5, "student")
+        return roles
+
+    monkeypatch.setattr(TeamCRUD, "get_users_roles", staticmethod(lookup_then_event))
+
+    assert await _join(team_id, 5) == 200
+    assert await _member_role(5) == "student"
+    counters, actual = await _composition(team_id)
+    assert counters == actual == {"students": 1, "teachers": 1, "total": 2}
+
+
+async def test_role_event_before_commit_waits_for_join(services, team_id):
+    """Событие пришло, пока транзакция вступления ещё не закоммичена."""
+    async with async_session_maker() as session:
+        team = (
+            await session.execute(select(Team).where(Team.id == team_id).with_for_update())
+        ).scalar_one()
+        role = await TeamCRUD._claim_user_role(session, 5, "teacher")
+        session.add(TeamMember(team_id=team_id, user_id=5, is_leader=False, role=role))
+        TeamCRUD._apply_role_delta(team, role, 1)
+
+        event = asyncio.create_task(apply_role_update(5, "student"))
+        await asyncio.sleep(0.2)
+        # Ждёт строку user_roles, которую держит вступление
+        assert not event.done()
+        await session.commit()
+
+    assert await asyncio.wait_for(event, 5) == 1
+    assert await _member_role(5) == "student"
+    counters, actual = await _composition(team_id)
+    assert counters == actual == {"students": 1, "teachers": 1, "total": 2}
+
+
+async def test_older_role_event_is_ignored(db_engine, services):
+    from datetime import datetime, timedelta, timezone
+
+    now = datetime.now(timezone.utc)
+    assert await apply_role_update(6, "teacher", now) == 0
+    await apply_role_update(6, "student", now - timedelta(minutes=1))
+
+    async with async_session_maker() as session:
+        assert await TeamCRUD._claim_user_role(session, 6, "student") == "teacher"
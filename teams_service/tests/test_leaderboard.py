@@ -0,0 +1,104 @@
+import random
+
+import pytest
+import pytest_asyncio
+
+from cruds.teams_crud.crud import TeamCRUD
+from db.models.teams import Team
+from db.models.teams_enums.enums import DirectionEnum
+from db.session import async_session_maker
+from services import leaderboard
+from services.leaderboard import _points, _score
+
+
+def test_score_order_matches_sql_fallback():
+    teams = [(team_id, random.choice([0, 5, 10, 10_000])) for team_id in range(1, 500)]
+
+    # ZREVRANGE: по убыванию score; SQL: ORDER BY points DESC, id ASC
+    by_score = sorted(teams, key=lambda t: _score(*t), reverse=True)
+    by_sql = sorted(teams, key=lambda t: (-t[1], t[0]))
+
+    assert by_score == by_sql
+
+
+def test_points_round_trip():
+    for team_id, points in [(1, 0), (9, 10), (10, 10), (16_000_000, 500_000_000), (3, -7)]:
+        assert _points(team_id, float(_score(team_id, points))) == points
+
+
+@pytest_asyncio.fixture
+async def redis_server(db_engine, monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        leaderboard,
+        "_redis",
+        fakeredis.aioredis.FakeRedis(server=server, decode_responses=True),
+    )
+    monkeypatch.setattr(leaderboard, "_dirty", False)
+
+    async with async_session_maker() as session:
+        session.add_all(
+            [
+                Team(name=f"team {points}", direction=DirectionEnum.science, points=points)
+                for points in (10, 20)
+            ]
+        )
+        await session.commit()
+    assert await leaderboard.rebuild_leaderboard()
+
+    yield server
+
+
+@pytest.mark.asyncio
+async def test_failed_increment_falls_back_to_sql_until_rebuilt(redis_server):
+    redis_server.connected = False
+    async with async_session_maker() as session:
+        await TeamCRUD.add_points(session, 1, 50)
+    redis_server.connected = True
+
+    # ZINCRBY не дошёл: sorted set отстаёт от teams.points
+    assert await leaderboard.top(10) is None
+    async with async_session_maker() as session:
+        top = await TeamCRUD.get_leaderboard(session, limit=10)
+    assert [(t["team_id"], t["points"]) for t in top] == [(1, 60), (2, 20)]
+
+    assert await leaderboard.reconcile_leaderboard()
+    assert await leaderboard.top(10) == [(1, 60), (2, 20)]
+    assert not await leaderboard.reconcile_leaderboard()
+
+
+@pytest.mark.asyncio
+async def test_dirty_flag_is_shared_between_workers(redis_server):
+    await leaderboard._redis.set(leaderboard.DIRTY_KEY, "1")
+
+    assert await leaderboard.rank(1) is None
+    assert await leaderboard.reconcile_leaderboard()
+    assert await leaderboard.rank(1) == (2, 10)
+
+
+@pytest.mark.asyncio
+async def test_rebuild_gives_way_to_concurrent_write(redis_server, monkeypatch):
+    await leaderboard._mark_dirty()
+
+    class WriteDuringSnapshot:
+        """Начисление очков, пришедшее, пока пересборка читает teams."""
+
+        def __init__(self):
+            self.session = async_session_maker()
+
+        async def __aenter__(self):
+            async with async_session_maker() as other:
+                await TeamCRUD.add_points(other, 2, 100)
+            return await self.session.__aenter__()
+
+        async def __aexit__(self, *exc):
+            return await self.session.__aexit__(*exc)
+
+    monkeypatch.setattr(leaderboard, "async_session_maker", WriteDuringSnapshot)
+    assert not await leaderboard.reconcile_leaderboard()
+    assert await leaderboard.top(10) is None
+
+    monkeypatch.setattr(leaderboard, "async_session_maker", async_session_maker)
+    assert await leaderboard.reconcile_leaderboard()
+    assert await leaderboard.top(10) == [(2, 120), (1, 10)]
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from services.org_cache import OrgCache
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_concurrent_misses_share_one_fetch():
+    cache = OrgCache(maxsize=10, ttl=60)
+    calls = []
+
+    async def fetcher(org_ids):
+        calls.append(sorted(org_ids))
+        await asyncio.sleep(0.01)
+        return {org_id: {"id": org_id} for org_id in org_ids}
+
+    results = await asyncio.gather(*(cache.get(1, fetcher) for _ in range(20)))
+
+    assert calls == [[1]]
+    assert all(result == {"id": 1} for result in results)
+
+
+async def test_waiters_survive_cancelled_fetch():
+    cache = OrgCache(maxsize=10, ttl=60)
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def fetcher(org_ids):
+        started.set()
+        await release.wait()
+        return {org_id: {"id": org_id} for org_id in org_ids}
+
+    leader = asyncio.create_task(cache.get(1, fetcher))
+    await started.wait()
+    waiter = asyncio.create_task(cache.get(1, fetcher))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+    release.set()
+    assert await asyncio.wait_for(waiter, 1) == {"id": 1}
+
+
+async def test_fetch_started_before_invalidate_is_not_cached():
+    cache = OrgCache(maxsize=10, ttl=60)
+    names = {1: "old"}
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def fetcher(org_ids):
+        snapshot = {org_id: {"name": names[org_id]} for org_id in org_ids}
+        started.set()
+        await release.wait()
+        return snapshot
+
+    stale = asyncio.create_task(cache.get(1, fetcher))
+    await started.wait()
+    names[1] = "new"
+    cache.invalidate([1])
+    release.set()
+
+    assert await stale == {"name": "old"}
+    assert await cache.get(1, fetcher) == {"name": "new"}
+
+
+async def test_overlapping_batches_fetch_each_id_once():
+    cache = OrgCache(maxsize=10, ttl=60)
+    calls = []
+
+    async def fetcher(org_ids):
+        calls.append(sorted(org_ids))
+        await asyncio.sleep(0.01)
+        return {org_id: {"id": org_id} for org_id in org_ids if org_id != 3}
+
+    first, second = await asyncio.gather(
+        cache.get_many([1, 2], fetcher), cache.get_many([2, 3], fetcher)
+    )
+
+    assert first == {1: {"id": 1}, 2: {"id": 2}}
+    assert second == {2: {"id": 2}}
+    assert sorted(calls) == [[1, 2], [3]]
@@ -0,0 +1,82 @@
+"""
+Бюджет исходящих HTTP-вызовов на один запрос к эндпоинту.
+Если эндпоинт начинает ходить в user_profile/orgs_service чаще, тест падает
+с фактическим числом вызовов.
+"""
+
+import pytest
+import pytest_asyncio
+
+from conftest import login
+from db.models.teams import Team
+from db.models.team_members import TeamMember
+from db.models.teams_enums.enums import DirectionEnum
+from db.session import async_session_maker
+
+pytestmark = pytest.mark.asyncio
+
+ORG_ID = 7
+LEADER_ID, TEACHER_ID, STUDENT_ID = 1, 2, 3
+
+OUTBOUND_BUDGET = {
+    "can_join_team": 1,
+    "join_team": 1,
+    "get_team_by_id": 2,
+}
+
+
+@pytest_asyncio.fixture
+async def team_id(db_engine, services):
+    services.roles.update({LEADER_ID: "teacher", TEACHER_ID: "teacher", STUDENT_ID: "student"})
+    services.orgs[ORG_ID] = {"id": ORG_ID, "full_name": "Университет", "short_name": "У"}
+
+    async with async_session_maker() as session:
+        team = Team(
+            name="team",
+            direction=DirectionEnum.science,
+            region="Москва",
+            leader_id=LEADER_ID,
+            organization_id=ORG_ID,
+            organization_name="У",
+            number_of_members=2,
+            students_count=0,
+            teachers_count=2,
+        )
+        session.add(team)
+        await session.flush()
+        session.add_all(
+            [
+                TeamMember(team_id=team.id, user_id=LEADER_ID, is_leader=True, role="teacher"),
+                TeamMember(team_id=team.id, user_id=TEACHER_ID, is_leader=False, role="teacher"),
+            ]
+        )
+        await session.commit()
+        return team.id
+
+
+async def _calls_for(services, request) -> int:
+    before = services.count()
+    response = await request
+    assert response.status_code == 200, response.text
+    return services.count() - before
+
+
+async def test_can_join_team_budget(client, services, team_id):
+    login(client, STUDENT_ID)
+    calls = await _calls_for(services, client.get(f"/can_join_team/{team_id}"))
+    assert calls <= OUTBOUND_BUDGET["can_join_team"], services.calls
+
+
+async def test_join_team_budget(client, services, team_id):
+    login(client, STUDENT_ID)
+    calls = await _calls_for(services, client.post(f"/join_team/{team_id}"))
+    assert calls <= OUTBOUND_BUDGET["join_team"], services.calls
+
+
+async def test_get_team_by_id_budget(client, services, team_id):
+    calls = await _calls_for(services, client.get(f"/get_team_by_id/{team_id}"))
+    assert calls <= OUTBOUND_BUDGET["get_team_by_id"], services.calls
+
+    # Организация уже в кэше: остаётся один батч-запрос профилей
+    calls = await _calls_for(services, client.get(f"/get_team_by_id/{team_id}"))
+    assert calls <= OUTBOUND_BUDGET["get_team_by_id"] - 1, services.calls
@@ -0,0 +1,82 @@
+"""
+Участники, вступившие до появления team_members.role, хранятся с role=NULL,
+а счётчики состава их команд — нули.
+"""
+
+import pytest
+import pytest_asyncio
+
+from cruds.teams_crud.crud import TeamCRUD
+from db.models.teams import Team
+from db.models.team_members import TeamMember
+from db.models.teams_enums.enums import DirectionEnum
+from db.session import async_session_maker
+from services.role_backfill import backfill_member_roles
+
+pytestmark = pytest.mark.asyncio
+
+LEGACY_TEACHERS = (1, 2, 3)
+
+
+@pytest_asyncio.fixture
+async def legacy_team_id(db_engine, services):
+    services.roles.update({user_id: "teacher" for user_id in LEGACY_TEACHERS})
+    async with async_session_maker() as session:
+        team = Team(
+            name="legacy",
+            direction=DirectionEnum.science,
+            region="Москва",
+            leader_id=LEGACY_TEACHERS[0],
+            number_of_members=len(LEGACY_TEACHERS),
+            students_count=0,
+            teachers_count=0,
+        )
+        session.add(team)
+        await session.flush()
+        session.add_all(
+            [
+                TeamMember(
+                    team_id=team.id,
+                    user_id=user_id,
+                    is_leader=user_id == LEGACY_TEACHERS[0],
+                    role=None,
+                )
+                for user_id in LEGACY_TEACHERS
+            ]
+        )
+        await session.commit()
+        return team.id
+
+
+async def test_can_join_counts_legacy_members_before_backfill(services, legacy_team_id):
+    services.roles.update({10: "teacher", 11: "student"})
+
+    async with async_session_maker() as session:
+        assert await TeamCRUD.can_user_join_team(session, legacy_team_id, 10) == (
+            False,
+            "Team already has 3 teachers",
+        )
+        can_join, _ = await TeamCRUD.can_user_join_team(session, legacy_team_id, 11)
+
+    assert can_join
+    # Роль вступающего и участников без роли — одним батч-запросом
+    assert services.count("user_profile") == 2
+
+
+async def test_backfill_fills_roles_and_recounts(services, legacy_team_id):
+    assert await backfill_member_roles(batch_size=2) == len(LEGACY_TEACHERS)
+    assert await backfill_member_roles() == 0
+
+    async with async_session_maker() as session:
+        team = await session.get(Team, legacy_team_id)
+        assert TeamCRUD.team_composition(team) == {"students": 0, "teachers": 3, "total": 3}
+
+
+async def test_backfill_skips_users_without_role(services, legacy_team_id):
+    del services.roles[LEGACY_TEACHERS[1]]
+
+    assert await backfill_member_roles() == len(LEGACY_TEACHERS) - 1
+
+    async with async_session_maker() as session:
+        team = await session.get(Team, legacy_team_id)
+        assert team.teachers_count == 2
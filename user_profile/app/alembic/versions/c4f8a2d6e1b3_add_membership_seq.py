@@ -0,0 +1,31 @@
+"""add membership_seq to user_profile
+
+Revision ID: c4f8a2d6e1b3
+Revises: 20bc1a4e634b
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4f8a2d6e1b3"
+down_revision: Union[str, None] = "20bc1a4e634b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "user_profile", sa.Column("membership_seq", sa.BigInteger(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("user_profile", "membership_seq")
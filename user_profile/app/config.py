@@ -9,6 +9,17 @@ class Settings(BaseSettings):
     DB_NAME: str
 
     RABBITMQ_URL: str
+    REDIS_URL: str = "redis://redis:6379/0"
+    PROFILE_CACHE_TTL: int = 300
+    PROFILE_CACHE_L1_TTL: float = 5.0
+    PROFILE_CACHE_L1_MAX_SIZE: int = 50000
+    USER_CREATED_PREFETCH: int = 500
+    USER_CREATED_BATCH_SIZE: int = 200
+    USER_CREATED_BATCH_WINDOW: float = 0.25
+    USER_CREATED_MAX_RETRIES: int = 5
+    USER_CREATED_RETRY_DELAY: float = 5.0
+    MEMBERSHIP_MAX_RETRIES: int = 8
+    MEMBERSHIP_RETRY_DELAY: float = 5.0
     SECRET_KEY: str
     ALGORITHM: str
 
@@ -1,7 +1,19 @@
 import logging
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func
+from sqlalchemy import (
+    BigInteger,
+    Integer,
+    String,
+    cast,
+    column,
+    func,
+    or_,
+    text,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from db.models.user_enum import UserEnum, UserEnumForAdmin, UserEnumForUser
 from db.models.user import User
@@ -13,6 +25,7 @@ from schemas.user import (
     ProfileUpdate,
 )
 from services.orgs_client import OrgsClient
+from services.profile_cache import profile_cache
 
 
 class ProfileCRUD:
@@ -66,9 +79,14 @@ class ProfileCRUD:
         return provider in {"vk", "yandex"}
 
     @classmethod
-    async def sync_oauth_profile(
-        cls, db: AsyncSession, sync_data: OAuthProfileSyncRequest
-    ):
+    def _merge_oauth_profile(
+        cls, sync_data: OAuthProfileSyncRequest, current: dict | None
+    ) -> dict:
+        """Returns the profile columns after applying an OAuth sync to the current values.
+
+        current is None for a new profile; existing values are only filled in,
+        except the username, which VK/Yandex logins may replace.
+        """
         first_name = cls._normalize_text(sync_data.first_name)
         last_name = cls._normalize_text(sync_data.last_name)
         patronymic = cls._normalize_text(sync_data.patronymic)
@@ -87,6 +105,17 @@ class ProfileCRUD:
         if not patronymic:
             patronymic = parsed_patronymic
 
+        if current is None:
+            return {
+                "id": sync_data.user_id,
+                "username": username,
+                "email": email,
+                "NameIRL": first_name,
+                "Surname": last_name,
+                "Patronymic": patronymic,
+                "Type": cls._resolve_role(sync_data.role),
+            }
+
         incoming_short_name = " ".join(
             part for part in [first_name, last_name] if part
         ).strip()
@@ -94,51 +123,67 @@ class ProfileCRUD:
             part for part in [first_name, last_name, patronymic] if part
         ).strip()
 
-        result = await db.execute(select(User).where(User.id == sync_data.user_id))
-        profile = result.scalar_one_or_none()
-        created = False
+        merged = dict(current)
+        current_name = cls._normalize_text(merged["NameIRL"])
+        current_surname = cls._normalize_text(merged["Surname"])
+        current_patronymic = cls._normalize_text(merged["Patronymic"])
 
-        if not profile:
-            profile = User(
-                id=sync_data.user_id,
-                username=username,
-                email=email,
-                NameIRL=first_name,
-                Surname=last_name,
-                Patronymic=patronymic,
-                Type=cls._resolve_role(sync_data.role),
-            )
-            db.add(profile)
-            created = True
-        else:
-            current_name = cls._normalize_text(profile.NameIRL)
-            current_surname = cls._normalize_text(profile.Surname)
-            current_patronymic = cls._normalize_text(profile.Patronymic)
+        if cls._should_replace_username(merged["username"], username, auth_provider):
+            merged["username"] = username
 
-            if cls._should_replace_username(profile.username, username, auth_provider):
-                profile.username = username
+        if email and not cls._normalize_text(merged["email"]):
+            merged["email"] = email
 
-            if email and not cls._normalize_text(profile.email):
-                profile.email = email
+        if first_name and not current_name:
+            merged["NameIRL"] = first_name
+            current_name = first_name
 
-            if first_name and not current_name:
-                profile.NameIRL = first_name
-                current_name = first_name
+        if last_name and not current_surname:
+            if current_name in {incoming_full_name, incoming_short_name}:
+                merged["NameIRL"] = first_name or current_name
+            merged["Surname"] = last_name
+            current_surname = last_name
 
-            if last_name and not current_surname:
-                if current_name in {incoming_full_name, incoming_short_name}:
-                    profile.NameIRL = first_name or current_name
-                profile.Surname = last_name
-                current_surname = last_name
+        if patronymic and not current_patronymic:
+            merged["Patronymic"] = patronymic
+
+        if merged["Type"] is None:
+            merged["Type"] = cls._resolve_role(sync_data.role)
+
+        return merged
+
+    @staticmethod
+    def _oauth_columns(profile: User) -> dict:
+        return {
+            "id": profile.id,
+            "username": profile.username,
+            "email": profile.email,
+            "NameIRL": profile.NameIRL,
+            "Surname": profile.Surname,
+            "Patronymic": profile.Patronymic,
+            "Type": profile.Type,
+        }
 
-            if patronymic and not current_patronymic:
-                profile.Patronymic = patronymic
+    @classmethod
+    async def sync_oauth_profile(
+        cls, db: AsyncSession, sync_data: OAuthProfileSyncRequest
+    ):
+        result = await db.execute(select(User).where(User.id == sync_data.user_id))
+        profile = result.scalar_one_or_none()
+        created = profile is None
 
-            if profile.Type is None:
-                profile.Type = cls._resolve_role(sync_data.role)
+        if created:
+            profile = User(**cls._merge_oauth_profile(sync_data, None))
+            db.add(profile)
+        else:
+            merged = cls._merge_oauth_profile(sync_data, cls._oauth_columns(profile))
+            for key, value in merged.items():
+                if getattr(profile, key) != value:
+                    setattr(profile, key, value)
 
         try:
             await db.commit()
+            await profile_cache.invalidate([profile.id])
             await db.refresh(profile)
             return {
                 "status": "success",
@@ -155,6 +200,44 @@ class ProfileCRUD:
                 status_code=500, detail=f"Error syncing OAuth profile: {str(e)}"
             )
 
+    @classmethod
+    async def upsert_oauth_profiles(
+        cls, db: AsyncSession, items: list[OAuthProfileSyncRequest]
+    ) -> int:
+        """Applies a batch of OAuth syncs in one transaction.
+
+        Current rows are locked and merged in Python with the same rules as
+        sync_oauth_profile, then written with one INSERT ... ON CONFLICT (id) DO UPDATE.
+        Several events for one user are applied in order.
+        """
+        if not items:
+            return 0
+
+        user_ids = sorted({item.user_id for item in items})
+        result = await db.execute(
+            select(User).where(User.id.in_(user_ids)).with_for_update()
+        )
+        rows = {
+            profile.id: cls._oauth_columns(profile) for profile in result.scalars().all()
+        }
+
+        for item in items:
+            rows[item.user_id] = cls._merge_oauth_profile(item, rows.get(item.user_id))
+
+        stmt = pg_insert(User).values(list(rows.values()))
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[User.id],
+                set_={
+                    key: stmt.excluded[key]
+                    for key in ("username", "email", "NameIRL", "Surname", "Patronymic", "Type")
+                },
+            )
+        )
+        await db.commit()
+        await profile_cache.invalidate(rows)
+        return len(rows)
+
     @staticmethod
     async def create_profile(db: AsyncSession, profile_data):
         exiting_profile = await db.execute(
@@ -254,6 +337,7 @@ class ProfileCRUD:
 
         try:
             await db.commit()
+            await profile_cache.invalidate([existing_profile.id])
             await db.refresh(existing_profile)
             return existing_profile
         except Exception as e:
@@ -273,6 +357,7 @@ class ProfileCRUD:
 
         try:
             await db.commit()
+            await profile_cache.invalidate([user.id])
             await db.refresh(user)
             return user, old_role
         except Exception as e:
@@ -297,6 +382,7 @@ class ProfileCRUD:
 
         try:
             await db.commit()
+            await profile_cache.invalidate([user.id])
             await db.refresh(user)
             return user, old_role
         except Exception as e:
@@ -325,6 +411,7 @@ class ProfileCRUD:
 
         try:
             await db.commit()
+            await profile_cache.invalidate([existing_profile.id])
             await db.refresh(existing_profile)
             return existing_profile
         except Exception as e:
@@ -348,6 +435,7 @@ class ProfileCRUD:
 
         try:
             await db.commit()
+            await profile_cache.invalidate([existing_profile.id])
             await db.refresh(existing_profile)
             logging.info(f"User {user_id} joined team '{team_name}' (ID: {team_id})")
             return existing_profile
@@ -372,6 +460,7 @@ class ProfileCRUD:
 
         try:
             await db.commit()
+            await profile_cache.invalidate([existing_profile.id])
             await db.refresh(existing_profile)
             logging.info(
                 f"User {user_id} team is in org '{organization_name}' (ID: {organization_id})"
@@ -383,6 +472,198 @@ class ProfileCRUD:
                 status_code=500, detail=f"Error while updating profile: {str(e)}"
             )
 
+    @staticmethod
+    async def apply_membership_changes(
+        db: AsyncSession, members: list[dict]
+    ) -> tuple[int, set[int]]:
+        """Applies a batch of team membership changes with one UPDATE ... FROM (VALUES ...).
+
+        None in organization fields keeps the current value. A change whose seq is
+        not newer than the profile's membership_seq is a late or retried delivery
+        and is skipped. Returns the number of updated profiles and the
+        organizations whose member counts may have changed.
+        """
+        rows = [
+            (
+                member["user_id"],
+                member.get("team") or "",
+                member.get("team_id") or 0,
+                member.get("organization_name"),
+                member.get("organization_id"),
+                member.get("seq"),
+            )
+            for member in members
+            if member.get("user_id")
+        ]
+        if not rows:
+            return 0, set()
+
+        previous_org_ids = await db.scalars(
+            select(User.Organization_id)
+            .where(User.id.in_([row[0] for row in rows]))
+            .distinct()
+        )
+        touched_org_ids = set(previous_org_ids) | {row[4] for row in rows}
+
+        changes = values(
+            column("user_id", Integer),
+            column("team", String),
+            column("team_id", Integer),
+            column("organization_name", String),
+            column("organization_id", Integer),
+            column("seq", BigInteger),
+            name="changes",
+        ).data(rows)
+        # A column that is NULL in every row renders as untyped NULL (text)
+        organization_name = cast(changes.c.organization_name, String)
+        organization_id = cast(changes.c.organization_id, Integer)
+        seq = cast(changes.c.seq, BigInteger)
+
+        result = await db.execute(
+            update(User)
+            .where(
+                User.id == changes.c.user_id,
+                or_(
+                    seq.is_(None),
+                    User.membership_seq.is_(None),
+                    User.membership_seq < seq,
+                ),
+            )
+            .values(
+                team=changes.c.team,
+                team_id=changes.c.team_id,
+                Organization=func.coalesce(organization_name, User.Organization),
+                Organization_id=func.coalesce(organization_id, User.Organization_id),
+                membership_seq=func.coalesce(seq, User.membership_seq),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        await profile_cache.invalidate([row[0] for row in rows])
+        return result.rowcount, {
+            org_id for org_id in touched_org_ids if org_id and org_id > 0
+        }
+
+    @staticmethod
+    async def bulk_update_learning(db: AsyncSession, updates: list) -> dict:
+        """Applies a batch of is_learned flags with one UPDATE ... FROM unnest(...).
+
+        Invalid items and unknown users are reported per input index; if a user
+        appears several times, the last flag wins.
+        """
+        errors = []
+        positions: dict[int, list[int]] = {}
+        flags: dict[int, bool] = {}
+
+        for index, item in enumerate(updates):
+            if not isinstance(item, dict):
+                errors.append({"index": index, "error": "Item is not a dictionary"})
+                continue
+
+            user_id = item.get("user_id")
+            is_learned = item.get("is_learned")
+            if user_id is None or is_learned is None:
+                errors.append({"index": index, "error": "Missing user_id or is_learned"})
+                continue
+
+            # bool("false") is True: accept only real JSON booleans
+            if not isinstance(is_learned, bool):
+                errors.append(
+                    {"index": index, "error": f"Invalid is_learned {is_learned!r}"}
+                )
+                continue
+
+            try:
+                if isinstance(user_id, bool):
+                    raise TypeError
+                user_id = int(user_id)
+            except (TypeError, ValueError):
+                errors.append({"index": index, "error": f"Invalid user_id {user_id!r}"})
+                continue
+
+            positions.setdefault(user_id, []).append(index)
+            flags[user_id] = is_learned
+
+        updated_ids: set[int] = set()
+        if flags:
+            result = await db.execute(
+                text(
+                    """
+                    UPDATE user_profile AS u
+                    SET is_learned = v.is_learned
+                    FROM unnest(CAST(:ids AS integer[]), CAST(:flags AS boolean[]))
+                        AS v(id, is_learned)
+                    WHERE u.id = v.id
+                    RETURNING u.id
+                    """
+                ),
+                {"ids": list(flags), "flags": list(flags.values())},
+            )
+            updated_ids = set(result.scalars().all())
+            await db.commit()
+
+        for user_id in flags.keys() - updated_ids:
+            errors.extend(
+                {"index": index, "error": f"User {user_id} not found"}
+                for index in positions[user_id]
+            )
+        errors.sort(key=lambda error: error["index"])
+
+        return {
+            "received": len(updates),
+            "updated": len(updated_ids),
+            "updated_ids": sorted(updated_ids),
+            "errors": errors,
+        }
+
+    @staticmethod
+    def _batch_record(user) -> dict:
+        return {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "NameIRL": user.NameIRL,
+            "Surname": user.Surname,
+            "Patronymic": user.Patronymic,
+            "Region": user.Region,
+            "Type": user.Type.value if user.Type else None,
+        }
+
+    @staticmethod
+    async def get_users_batch(
+        db: AsyncSession, user_ids: list[int], fields: list[str] | None = None
+    ) -> dict[int, dict]:
+        """Batch profile records; served from profile_cache, the DB is hit only for misses.
+
+        fields projects each record to the given keys (id is always kept). Misses
+        still load the full cached column set so the cache entries stay complete.
+        """
+
+        async def load(missing: list[int]) -> dict[int, dict]:
+            result = await db.execute(
+                select(
+                    User.id,
+                    User.username,
+                    User.email,
+                    User.NameIRL,
+                    User.Surname,
+                    User.Patronymic,
+                    User.Region,
+                    User.Type,
+                ).where(User.id.in_(missing))
+            )
+            return {row.id: ProfileCRUD._batch_record(row) for row in result.all()}
+
+        records = await profile_cache.get_many(user_ids, load)
+        if not fields:
+            return records
+
+        keys = ["id", *(field for field in dict.fromkeys(fields) if field != "id")]
+        return {
+            user_id: {key: record[key] for key in keys}
+            for user_id, record in records.items()
+        }
+
     @staticmethod
     async def get_users_by_org_id(db: AsyncSession, org_id: int):
         result = await db.execute(select(User).where(User.Organization_id == org_id))
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from sqlalchemy import Boolean, Integer, String, Enum as SQLEnum
+from sqlalchemy import BigInteger, Boolean, Integer, String, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column
 from db.base import Base
 from db.models.user_enum import UserEnum
@@ -29,3 +29,5 @@ class User(Base):
 
     team: Mapped[str] = mapped_column(String(100), nullable=True, default="")
     team_id: Mapped[int] = mapped_column(Integer, nullable=True, default=0)
+    # id последнего применённого события outbox teams_service
+    membership_seq: Mapped[int] = mapped_column(BigInteger, nullable=True)
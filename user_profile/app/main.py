@@ -8,11 +8,16 @@ from prometheus_client import Counter, Histogram, generate_latest
 
 from routes.profile_routers.router import router
 from routes.profile_routers.internal import router as internal_router
-from services.rabbitmq import consume_user_created_events, consume_role_updated_events
+from services.rabbitmq import (
+    consume_user_created_events,
+    consume_role_updated_events,
+    consume_team_membership_events,
+)
 from config import settings
 from db.base import Base
 from db.session import engine
 from services.parser import org_parser
+from services.profile_cache import profile_cache
 import aio_pika
 import logging
 
@@ -37,20 +42,30 @@ logger = logging.getLogger(__name__)
 
 consumer_task = None
 role_consumer_task = None
+membership_consumer_task = None
+cache_listener_task = None
 rabbitmq_connection = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global rabbitmq_connection, consumer_task, role_consumer_task
+    global rabbitmq_connection, consumer_task, role_consumer_task, membership_consumer_task
+    global cache_listener_task
 
     logger.info("=== STARTUP: Creating database tables ===")
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
-    logger.info("=== STARTUP: Parsing organizations ===")
-    file_path = os.path.join(os.path.dirname(__file__), "rsk_orgs_list.xlsx")
-    org_parser.parse_excel(file_path)
+    logger.info("=== STARTUP: Loading organizations index ===")
+    dirname = os.path.dirname(__file__)
+    org_parser.load(
+        os.path.join(dirname, "rsk_orgs_list.idx"),
+        os.path.join(dirname, "rsk_orgs_list.xlsx"),
+    )
+
+    logger.info("=== STARTUP: Connecting profile cache to Redis ===")
+    await profile_cache.init()
+    cache_listener_task = asyncio.create_task(profile_cache.listen_invalidations())
 
     logger.info("=== STARTUP: Connecting to RabbitMQ ===")
     try:
@@ -71,6 +86,10 @@ async def lifespan(app: FastAPI):
         consume_role_updated_events(settings.RABBITMQ_URL)
     )
 
+    membership_consumer_task = asyncio.create_task(
+        consume_team_membership_events(settings.RABBITMQ_URL)
+    )
+
     def handle_task_result(task: asyncio.Task, consumer_name: str) -> None:
         try:
             task.result()
@@ -85,6 +104,12 @@ async def lifespan(app: FastAPI):
     role_consumer_task.add_done_callback(
         lambda t: handle_task_result(t, "Role updated consumer")
     )
+    membership_consumer_task.add_done_callback(
+        lambda t: handle_task_result(t, "Team membership consumer")
+    )
+    cache_listener_task.add_done_callback(
+        lambda t: handle_task_result(t, "Profile cache invalidation listener")
+    )
 
     logger.info("=== STARTUP: RabbitMQ consumers started ===")
 
@@ -95,15 +120,26 @@ async def lifespan(app: FastAPI):
         consumer_task.cancel()
     if role_consumer_task:
         role_consumer_task.cancel()
+    if membership_consumer_task:
+        membership_consumer_task.cancel()
+    if cache_listener_task:
+        cache_listener_task.cancel()
 
     try:
-        await asyncio.gather(consumer_task, role_consumer_task, return_exceptions=True)
+        await asyncio.gather(
+            consumer_task,
+            role_consumer_task,
+            membership_consumer_task,
+            cache_listener_task,
+            return_exceptions=True,
+        )
     except Exception as e:
         logger.error(f"Error during consumer shutdown: {e}")
 
     logger.info("=== SHUTDOWN: Closing RabbitMQ connection ===")
     if rabbitmq_connection:
         await rabbitmq_connection.close()
+    await profile_cache.close()
 
     logger.info("=== SHUTDOWN: Complete ===")
 
@@ -165,5 +201,7 @@ async def health_check():
             "user_created": consumer_task is not None and not consumer_task.done(),
             "role_updated": role_consumer_task is not None
             and not role_consumer_task.done(),
+            "team_membership": membership_consumer_task is not None
+            and not membership_consumer_task.done(),
         },
     }
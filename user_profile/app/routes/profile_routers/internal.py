@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Header, HTTPException, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import update
 from typing import List, Dict, Any
 import hmac
 import logging
@@ -8,7 +7,6 @@ import logging
 from config import settings
 from cruds.profile_crud import ProfileCRUD
 from db.session import get_db
-from db.models.user import User
 from schemas.user import OAuthProfileSyncRequest
 
 logger = logging.getLogger(__name__)
@@ -51,43 +49,14 @@ async def internal_bulk_update_learning_status(
 
         logger.info(f"Processing {len(updates)} updates")
 
-        updated_count = 0
-        errors = []
-
-        for index, item in enumerate(updates):
-            if not isinstance(item, dict):
-                errors.append({"index": index, "error": "Item is not a dictionary"})
-                continue
-
-            user_id = item.get("user_id")
-            is_learned = item.get("is_learned")
-
-            if user_id is None or is_learned is None:
-                errors.append({"index": index, "error": "Missing user_id or is_learned"})
-                continue
-
-            try:
-                result = await db.execute(
-                    update(User)
-                    .where(User.id == user_id)
-                    .values(is_learned=is_learned)
-                )
-                if result.rowcount > 0:
-                    updated_count += 1
-                    logger.info(f"Updated user {user_id} to is_learned={is_learned}")
-                else:
-                    logger.warning(f"User {user_id} not found")
-                    errors.append({"index": index, "error": f"User {user_id} not found"})
-            except Exception as e:
-                logger.error(f"Error updating user {user_id}: {e}")
-                errors.append({"index": index, "error": str(e)})
-
-        await db.commit()
+        outcome = await ProfileCRUD.bulk_update_learning(db=db, updates=updates)
+        errors = outcome["errors"]
 
         response = {
             "status": "success",
-            "received": len(updates),
-            "updated": updated_count,
+            "received": outcome["received"],
+            "updated": outcome["updated"],
+            "updated_ids": outcome["updated_ids"],
         }
 
         if errors:
@@ -110,28 +79,14 @@ async def internal_bulk_update_learning_status_v2(
 ):
     verify_internal_authorization(authorization)
 
-    updates = data.get("updates", [])
-    updated = 0
-
-    for item in updates:
-        user_id = item.get("user_id")
-        is_learned = item.get("is_learned")
-
-        if user_id is not None and is_learned is not None:
-            result = await db.execute(
-                update(User)
-                .where(User.id == user_id)
-                .values(is_learned=is_learned)
-            )
-            if result.rowcount > 0:
-                updated += 1
-
-    await db.commit()
+    outcome = await ProfileCRUD.bulk_update_learning(
+        db=db, updates=data.get("updates", [])
+    )
 
     return {
         "status": "success",
-        "received": len(updates),
-        "updated": updated,
+        "received": outcome["received"],
+        "updated": outcome["updated"],
     }
 
 
@@ -1,6 +1,8 @@
 import logging
-from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy import select, update
+import msgpack
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from schemas.user import (
@@ -21,7 +23,11 @@ from db.models.user import User
 from db.session import get_db
 from cruds.profile_crud import ProfileCRUD
 from services.grabber import get_current_user
-from services.rabbitmq import get_rabbitmq_connection, publish_role_update
+from services.rabbitmq import (
+    get_rabbitmq_connection,
+    publish_org_members_counts,
+    publish_role_update,
+)
 from aio_pika.abc import AbstractRobustConnection
 from services.auth_client import get_admin
 
@@ -77,31 +83,29 @@ async def update_learning_status(
 async def bulk_update_learning(
     request: BulkUpdateLearningRequest, db: AsyncSession = Depends(get_db)
 ):
-    updated = 0
-    for user_data in request.users:
-        result = await db.execute(
-            update(User)
-            .where(User.id == user_data["user_id"])
-            .values(is_learned=user_data["is_learned"])
-        )
-        if result.rowcount > 0:
-            updated += 1
-
-    await db.commit()
-    return {"status": "success", "updated": updated}
+    outcome = await ProfileCRUD.bulk_update_learning(db=db, updates=request.users)
+    return {"status": "success", "updated": outcome["updated"]}
 
 
 @profile_management_router.post("/update_user_profile_joined_org/")
 async def update_user_profile_joined_org(
-    update_data: ProfileJoinedOrg, db: AsyncSession = Depends(get_db)
+    update_data: ProfileJoinedOrg,
+    db: AsyncSession = Depends(get_db),
+    rabbitmq: AbstractRobustConnection = Depends(get_rabbitmq_connection),
 ):
     logging.info(f" Updating org for user {update_data.user_id}: {update_data}")
-    return await ProfileCRUD.update_profile_joined_org(
+    old_org_id = await db.scalar(
+        select(User.Organization_id).where(User.id == update_data.user_id)
+    )
+    profile = await ProfileCRUD.update_profile_joined_org(
         db=db,
         user_id=update_data.user_id,
         organization_name=update_data.Organization,
         organization_id=update_data.Organization_id,
     )
+    if profile.Organization_id != old_org_id:
+        await publish_org_members_counts(rabbitmq, [old_org_id, profile.Organization_id])
+    return profile
 
 
 @profile_management_router.patch("/my-role")
@@ -167,38 +171,37 @@ async def update_role(
 async def update_my_profile(
     update_data: ProfileUpdate,
     db: AsyncSession = Depends(get_db),
+    rabbitmq: AbstractRobustConnection = Depends(get_rabbitmq_connection),
     user_id: int = Depends(get_current_user),
 ):
-    return await ProfileCRUD.update_my_profile(db, update_data, user_id)
+    old_org_id = await db.scalar(select(User.Organization_id).where(User.id == user_id))
+    profile = await ProfileCRUD.update_my_profile(db, update_data, user_id)
+    if profile.Organization_id != old_org_id:
+        await publish_org_members_counts(rabbitmq, [old_org_id, profile.Organization_id])
+    return profile
 
 
 @profile_batch_router.post("/get_users_batch")
 async def get_users_batch(
-    batch_request: UserBatchRequest, db: AsyncSession = Depends(get_db)
+    batch_request: UserBatchRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
 ):
     try:
-        if not batch_request.user_ids:
-            return {}
-
-        result = await db.execute(
-            select(User).where(User.id.in_(batch_request.user_ids))
-        )
-        users = result.scalars().all()
-
         users_data = {}
-        for user in users:
-            users_data[user.id] = {
-                "id": user.id,
-                "username": user.username,
-                "email": user.email,
-                "NameIRL": user.NameIRL,
-                "Surname": user.Surname,
-                "Patronymic": user.Patronymic,
-                "Region": user.Region,
-                "Type": user.Type.value if user.Type else None,
-            }
-
-        return users_data
+        if batch_request.user_ids:
+            users_data = await ProfileCRUD.get_users_batch(
+                db, batch_request.user_ids, batch_request.fields
+            )
+
+        if "msgpack" in request.headers.get("accept", ""):
+            return Response(
+                content=msgpack.packb(
+                    {str(user_id): data for user_id, data in users_data.items()}
+                ),
+                media_type="application/msgpack",
+            )
+        return ORJSONResponse(users_data)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching users: {str(e)}")
@@ -1,6 +1,13 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Literal, Optional
+
+
+BatchField = Literal[
+    "id", "username", "email", "NameIRL", "Surname", "Patronymic", "Region", "Type"
+]
 
 
 class UserBatchRequest(BaseModel):
     user_ids: List[int]
+    # None — все поля; id возвращается всегда
+    fields: Optional[List[BatchField]] = None
@@ -0,0 +1,234 @@
+"""Compact binary index of rsk_orgs_list.xlsx for the organization picker.
+
+Build step (Docker image build, or on first start if the artifact is missing):
+
+    python -m services.org_index rsk_orgs_list.xlsx rsk_orgs_list.idx
+
+File layout, little-endian, every section 8-byte aligned:
+
+    header    MAGIC, then u32 counts: orgs, grams, postings, names bytes, keys bytes
+    ids       u32[orgs]        original 1-based ids, entries sorted by key
+    name_off  u32[orgs + 1]    offsets into names
+    key_off   u32[orgs + 1]    offsets into keys
+    grams     u64[grams]       sorted trigrams, three code points x 21 bits
+    post_off  u32[grams + 1]   offsets into postings
+    postings  u32[postings]    entry numbers, ascending per gram
+    names     bytes            UTF-8 display names
+    keys      bytes            UTF-8 lowercased names, each followed by "\\n"
+"""
+
+import bisect
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, Iterable, List, Optional
+
+
+MAGIC = b"ORGIDX01"
+HEADER = struct.Struct("<8s5I")
+NGRAM = 3
+NAME_COLUMN = "Учебное заведение"
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _gram_code(gram: str) -> int:
+    a, b, c = (min(ord(char), 0x1FFFFF) for char in gram)
+    return (a << 42) | (b << 21) | c
+
+
+def _grams(key: str) -> set[int]:
+    return {_gram_code(key[i : i + NGRAM]) for i in range(len(key) - NGRAM + 1)}
+
+
+def _align(buffer: bytearray) -> None:
+    buffer.extend(b"\0" * (-len(buffer) % 8))
+
+
+def read_names(excel_path: str) -> List[str]:
+    """Unique non-empty names from the NAME_COLUMN column, in sheet order."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else "" for value in next(rows, ())]
+        column = header.index(NAME_COLUMN)
+
+        names = {}
+        for row in rows:
+            value = row[column] if column < len(row) else None
+            name = str(value).strip() if value is not None else ""
+            if name:
+                names.setdefault(name, None)
+        return list(names)
+    finally:
+        workbook.close()
+
+
+def build_index(excel_path: str, index_path: str) -> int:
+    names = read_names(excel_path)
+    entries = sorted(
+        ((normalize(name), name, org_id) for org_id, name in enumerate(names, 1)),
+        key=lambda entry: (entry[0], entry[2]),
+    )
+
+    postings: Dict[int, List[int]] = {}
+    names_blob, keys_blob = bytearray(), bytearray()
+    name_offsets, key_offsets = [0], [0]
+    for position, (key, name, _) in enumerate(entries):
+        names_blob += name.encode()
+        name_offsets.append(len(names_blob))
+        keys_blob += key.encode() + b"\n"
+        key_offsets.append(len(keys_blob))
+        for gram in _grams(key):
+            postings.setdefault(gram, []).append(position)
+
+    grams = sorted(postings)
+    post_offsets, flat = [0], []
+    for gram in grams:
+        flat.extend(postings[gram])
+        post_offsets.append(len(flat))
+
+    out = bytearray(
+        HEADER.pack(MAGIC, len(entries), len(grams), len(flat), len(names_blob), len(keys_blob))
+    )
+    for fmt, values in (
+        ("I", [entry[2] for entry in entries]),
+        ("I", name_offsets),
+        ("I", key_offsets),
+        ("Q", grams),
+        ("I", post_offsets),
+        ("I", flat),
+    ):
+        _align(out)
+        out += struct.pack(f"<{len(values)}{fmt}", *values)
+    _align(out)
+    out += names_blob
+    out += keys_blob
+
+    with open(index_path, "wb") as f:
+        f.write(out)
+    return len(entries)
+
+
+class OrgIndex:
+    """Read-only view over a memory-mapped index; pages are shared between workers."""
+
+    def __init__(self, index_path: str):
+        with open(index_path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.size, n_grams, n_postings, names_len, keys_len = HEADER.unpack_from(
+            self._mm, 0
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{index_path} is not an organization index")
+
+        view = self._view = memoryview(self._mm)
+        offset = HEADER.size
+
+        def section(fmt: str, count: int, itemsize: int):
+            nonlocal offset
+            offset += -offset % 8
+            data = view[offset : offset + count * itemsize].cast(fmt)
+            offset += count * itemsize
+            return data
+
+        self._ids = section("I", self.size, 4)
+        self._name_off = section("I", self.size + 1, 4)
+        self._key_off = section("I", self.size + 1, 4)
+        self._grams = section("Q", n_grams, 8)
+        self._post_off = section("I", n_grams + 1, 4)
+        self._postings = section("I", n_postings, 4)
+        offset += -offset % 8
+        self._names_start = offset
+        self._keys_start = offset + names_len
+        self._keys_end = self._keys_start + keys_len
+
+    def _record(self, position: int) -> Dict:
+        start = self._names_start + self._name_off[position]
+        end = self._names_start + self._name_off[position + 1]
+        return {"id": self._ids[position], "name": self._mm[start:end].decode()}
+
+    def _key(self, position: int) -> bytes:
+        start = self._keys_start + self._key_off[position]
+        end = self._keys_start + self._key_off[position + 1] - 1
+        return self._mm[start:end]
+
+    def _postings_for(self, gram: int):
+        i = bisect.bisect_left(self._grams, gram)
+        if i == len(self._grams) or self._grams[i] != gram:
+            return None
+        return self._postings[self._post_off[i] : self._post_off[i + 1]]
+
+    def _scan(self, needle: bytes) -> List[int]:
+        """Short queries: substring search over the keys blob in C, no n-grams needed."""
+        positions = []
+        pos = self._mm.find(needle, self._keys_start, self._keys_end)
+        while pos != -1:
+            position = bisect.bisect_right(self._key_off, pos - self._keys_start) - 1
+            positions.append(position)
+            next_key = self._keys_start + self._key_off[position + 1]
+            pos = self._mm.find(needle, next_key, self._keys_end)
+        return positions
+
+    def search(self, query: str) -> List[int]:
+        """Entry numbers (in name order) whose lowercased name contains query."""
+        query = normalize(query)
+        if not query:
+            return list(range(self.size))
+        needle = query.encode()
+        if len(query) < NGRAM:
+            return self._scan(needle)
+
+        lists = []
+        for gram in _grams(query):
+            postings = self._postings_for(gram)
+            if postings is None:
+                return []
+            lists.append(postings)
+        lists.sort(key=len)
+
+        candidates = set(lists[0])
+        for postings in lists[1:]:
+            candidates.intersection_update(postings)
+            if not candidates:
+                return []
+        return [position for position in sorted(candidates) if needle in self._key(position)]
+
+    def records(self, positions: Iterable[int]) -> List[Dict]:
+        return [self._record(position) for position in positions]
+
+    def close(self) -> None:
+        for data in (
+            self._ids,
+            self._name_off,
+            self._key_off,
+            self._grams,
+            self._post_off,
+            self._postings,
+            self._view,
+        ):
+            data.release()
+        self._mm.close()
+
+
+def open_index(index_path: str, excel_path: Optional[str] = None) -> OrgIndex:
+    """Maps the index, building it first if it is missing or older than the workbook."""
+    if excel_path and os.path.exists(excel_path) and (
+        not os.path.exists(index_path)
+        or os.path.getmtime(index_path) < os.path.getmtime(excel_path)
+    ):
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        build_index(excel_path, tmp_path)
+        os.replace(tmp_path, index_path)
+    return OrgIndex(index_path)
+
+
+if __name__ == "__main__":
+    count = build_index(sys.argv[1], sys.argv[2])
+    print(f"Indexed {count} organizations into {sys.argv[2]}")
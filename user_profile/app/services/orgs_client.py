@@ -10,29 +10,40 @@ class OrgsClient:
     ORGS_URL = settings.ORGS_URL
 
     @staticmethod
-    async def get_organization_by_id(org_id: int) -> Optional[Dict[str, Any]]:
-        if not org_id or org_id <= 0:
-            return None
+    async def get_organizations_by_ids(
+        org_ids: list[int], with_counts: bool = False
+    ) -> Dict[int, Dict[str, Any]]:
+        org_ids = [org_id for org_id in org_ids if org_id and org_id > 0]
+        if not org_ids:
+            return {}
         try:
             async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.get(
-                    f"{OrgsClient.ORGS_URL}/organizations/org/{org_id}"
+                resp = await client.post(
+                    f"{OrgsClient.ORGS_URL}/organizations/batch",
+                    json={"org_ids": org_ids, "with_counts": with_counts},
                 )
 
                 if resp.status_code == 200:
-                    logger.info(f" Organization {org_id} fetched successfully")
-                    return resp.json()
-                elif resp.status_code == 404:
-                    logger.warning(f" Organization {org_id} not found")
-                    return None
-                else:
-                    logger.error(
-                        f" Error fetching organization {org_id}: {resp.status_code} - {resp.text}"
-                    )
-                    return None
+                    return {int(org_id): org for org_id, org in resp.json().items()}
+
+                logger.error(
+                    f" Error fetching organizations {org_ids}: {resp.status_code} - {resp.text}"
+                )
+                return {}
         except httpx.ConnectError as e:
             logger.error(f" Cannot connect to organizations service: {e}")
-            return None
+            return {}
         except Exception as e:
-            logger.error(f" Exception fetching organization {org_id}: {e}")
+            logger.error(f" Exception fetching organizations {org_ids}: {e}")
+            return {}
+
+    @staticmethod
+    async def get_organization_by_id(org_id: int) -> Optional[Dict[str, Any]]:
+        if not org_id or org_id <= 0:
             return None
+
+        orgs = await OrgsClient.get_organizations_by_ids([org_id])
+        org = orgs.get(org_id)
+        if org is None:
+            logger.warning(f" Organization {org_id} not found")
+        return org
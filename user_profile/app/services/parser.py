@@ -1,40 +1,32 @@
-import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from services.org_index import OrgIndex, open_index
 
 
 class OrgsParser:
     def __init__(self):
-        self.organizations = []
-
-    def parse_excel(self, file_path: str) -> List[Dict]:
-        df = pd.read_excel(file_path)
-        org_names = df["Учебное заведение"].dropna().unique().tolist()
-        self.organizations = [
-            {"id": i, "name": str(name).strip()}
-            for i, name in enumerate(org_names, 1)
-            if str(name).strip()
-        ]
-        return self.organizations
+        self.index: Optional[OrgIndex] = None
+
+    def load(self, index_path: str, excel_path: Optional[str] = None) -> int:
+        """Maps the prebuilt index (see services.org_index) instead of parsing Excel."""
+        if self.index is not None:
+            self.index.close()
+        self.index = open_index(index_path, excel_path)
+        return self.index.size
 
     def get_organizations(
         self, skip: int = 0, limit: int = 50, search: str = None
     ) -> Dict:
-        data = self.organizations
-
-        if search:
-            data = [
-                org
-                for org in data
-                if search.lower() in str(org.get("name", "")).lower()
-            ]
-
-        total = len(data)
-        paginated_data = data[skip : skip + limit]
+        if self.index is None:
+            return {"organizations": []}
 
-        return {"organizations": paginated_data}
+        positions = self.index.search(search or "")
+        return {"organizations": self.index.records(positions[skip : skip + limit])}
 
     def get_all_orgs(self) -> List[Dict]:
-        return self.organizations
+        if self.index is None:
+            return []
+        return self.index.records(range(self.index.size))
 
 
 org_parser = OrgsParser()
@@ -0,0 +1,188 @@
+import json
+import logging
+import time
+from itertools import islice
+from typing import Awaitable, Callable, Iterable, Optional
+
+import redis.asyncio as redis
+
+from config import settings
+
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "profile:"
+VERSION_PREFIX = "profile:ver:"
+INVALIDATE_CHANNEL = "profile:invalidate"
+
+# KEYS = data keys, then version keys; ARGV = ttl, versions seen before the
+# load, records. A record is written only if its version has not moved.
+FILL_SCRIPT = """
+local n = #KEYS / 2
+local written = 0
+for i = 1, n do
+    local current = redis.call('GET', KEYS[n + i]) or ''
+    if current == ARGV[1 + i] then
+        redis.call('SET', KEYS[i], ARGV[1 + n + i], 'EX', ARGV[1])
+        written = written + 1
+    end
+end
+return written
+"""
+
+
+class ProfileCache:
+    """Two-level cache of batch profile records keyed by user id.
+
+    L1 is a per-process dict with a short TTL; L2 is Redis. Writes delete the
+    Redis keys and broadcast the ids so every worker drops them from its L1.
+    Redis errors are logged and reads fall through to the database.
+
+    A read that misses loads from the database and then fills the cache. An
+    invalidation landing in between must win, otherwise the pre-write record
+    would be cached for a full TTL. Invalidation bumps a per-id version in
+    Redis, and the fill runs as a script that skips ids whose version moved.
+    L1 uses a process-wide epoch the same way.
+    """
+
+    def __init__(self, ttl: int, l1_ttl: float, l1_max_size: int):
+        self.ttl = ttl
+        self.l1_ttl = l1_ttl
+        self.l1_max_size = l1_max_size
+        self._redis: Optional[redis.Redis] = None
+        self._l1: dict[int, tuple[float, dict]] = {}
+        self._epoch = 0
+        self._fill = None
+
+    async def init(self) -> None:
+        self._redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        self._fill = self._redis.register_script(FILL_SCRIPT)
+
+    async def close(self) -> None:
+        if self._redis:
+            await self._redis.aclose()
+            self._redis = None
+
+    def _l1_get(self, user_ids: list[int]) -> dict[int, dict]:
+        now = time.monotonic()
+        found = {}
+        for user_id in user_ids:
+            entry = self._l1.get(user_id)
+            if entry is not None and entry[0] >= now:
+                found[user_id] = entry[1]
+        return found
+
+    def _l1_put(self, records: dict[int, dict]) -> None:
+        expires_at = time.monotonic() + self.l1_ttl
+        for user_id, record in records.items():
+            self._l1.pop(user_id, None)
+            self._l1[user_id] = (expires_at, record)
+
+        overflow = len(self._l1) - self.l1_max_size
+        if overflow > 0:
+            for user_id in list(islice(self._l1, overflow)):
+                del self._l1[user_id]
+
+    def _l1_drop(self, user_ids: Iterable[int]) -> None:
+        self._epoch += 1
+        for user_id in user_ids:
+            self._l1.pop(user_id, None)
+
+    async def get_many(
+        self,
+        user_ids: Iterable[int],
+        loader: Callable[[list[int]], Awaitable[dict[int, dict]]],
+    ) -> dict[int, dict]:
+        """Returns records for the ids that exist; one MGET, then the loader for misses."""
+        user_ids = list(dict.fromkeys(user_ids))
+        epoch = self._epoch
+        found = self._l1_get(user_ids)
+        missing = [user_id for user_id in user_ids if user_id not in found]
+        versions: Optional[dict[int, str]] = None
+
+        if missing and self._redis:
+            try:
+                # One MGET for records and versions: the versions predate the load
+                values = await self._redis.mget(
+                    [f"{KEY_PREFIX}{i}" for i in missing]
+                    + [f"{VERSION_PREFIX}{i}" for i in missing]
+                )
+                from_redis = {
+                    user_id: json.loads(value)
+                    for user_id, value in zip(missing, values)
+                    if value
+                }
+                versions = {
+                    user_id: version or ""
+                    for user_id, version in zip(missing, values[len(missing):])
+                }
+            except Exception as e:
+                logger.error(f"Profile cache read failed: {e}")
+                from_redis = {}
+
+            found.update(from_redis)
+            if self._epoch == epoch:
+                self._l1_put(from_redis)
+            missing = [user_id for user_id in missing if user_id not in from_redis]
+
+        if missing:
+            loaded = await loader(missing)
+            found.update(loaded)
+            if self._epoch == epoch:
+                self._l1_put(loaded)
+
+            if loaded and versions is not None and self._redis:
+                try:
+                    await self._fill(
+                        keys=[f"{KEY_PREFIX}{i}" for i in loaded]
+                        + [f"{VERSION_PREFIX}{i}" for i in loaded],
+                        args=[self.ttl]
+                        + [versions[i] for i in loaded]
+                        + [json.dumps(record) for record in loaded.values()],
+                    )
+                except Exception as e:
+                    logger.error(f"Profile cache write failed: {e}")
+
+        return found
+
+    async def invalidate(self, user_ids: Iterable[Optional[int]]) -> None:
+        user_ids = [user_id for user_id in user_ids if user_id]
+        if not user_ids:
+            return
+
+        self._l1_drop(user_ids)
+        if not self._redis:
+            return
+
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    # Outlives the record so an in-flight fill still sees the bump
+                    pipe.incr(f"{VERSION_PREFIX}{user_id}")
+                    pipe.expire(f"{VERSION_PREFIX}{user_id}", self.ttl * 2)
+                pipe.delete(*(f"{KEY_PREFIX}{user_id}" for user_id in user_ids))
+                pipe.publish(INVALIDATE_CHANNEL, json.dumps(user_ids))
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Profile cache invalidation failed: {e}")
+
+    async def listen_invalidations(self) -> None:
+        """Drops ids invalidated by other workers from this worker's L1."""
+        if not self._redis:
+            return
+
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(INVALIDATE_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    self._l1_drop(json.loads(message["data"]))
+        finally:
+            await pubsub.aclose()
+
+
+profile_cache = ProfileCache(
+    ttl=settings.PROFILE_CACHE_TTL,
+    l1_ttl=settings.PROFILE_CACHE_L1_TTL,
+    l1_max_size=settings.PROFILE_CACHE_L1_MAX_SIZE,
+)
@@ -8,11 +8,13 @@ from aio_pika.abc import AbstractRobustConnection
 from fastapi import Request
 from sqlalchemy import select
 
+from config import settings
 from cruds.profile_crud import ProfileCRUD
 from db.models.user import User
 from db.models.user_enum import UserEnum
 from db.session import async_session_maker
 from schemas.user import OAuthProfileSyncRequest
+from services.profile_cache import profile_cache
 
 
 logging.basicConfig(level=logging.INFO)
@@ -69,77 +71,268 @@ async def publish_role_update(
         raise
 
 
+async def publish_org_members_counts(rabbitmq_connection, org_ids) -> None:
+    """
+    Публикует актуальное число участников организаций (org.counts_changed).
+    orgs_service хранит его в organizations.members_count.
+    """
+    org_ids = sorted({org_id for org_id in org_ids if org_id and org_id > 0})
+    if not rabbitmq_connection or not org_ids:
+        return
+
+    try:
+        # Момент снимка: orgs_service не применяет счётчики старше уже записанных
+        counted_at = datetime.utcnow()
+        async with async_session_maker() as session:  # type: ignore
+            counts = await ProfileCRUD.get_member_count_by_id(session, org_ids)
+
+        channel = await rabbitmq_connection.channel()
+        exchange = await channel.declare_exchange(
+            "org_events", type="direct", durable=True
+        )
+
+        message_data = {
+            "event_type": "org.counts_changed",
+            "counts": [
+                {"id": org_id, "members_count": count}
+                for org_id, count in counts.items()
+            ],
+            "timestamp": str(counted_at),
+        }
+
+        await exchange.publish(
+            aio_pika.Message(
+                body=json.dumps(message_data).encode(),
+                headers={"event_type": "org.counts_changed"},
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key="org.counts_changed",
+        )
+        await channel.close()
+
+    except Exception as e:
+        logger.error(
+            "[PUBLISHER] Failed to publish org member counts: %s", e, exc_info=True
+        )
+
+
+USER_CREATED_QUEUE = "user_profile_queue"
+MEMBERSHIP_QUEUE = "user_profile_membership_queue"
+
+
+def _retry_queue(queue_name: str, attempt: int) -> str:
+    return f"{queue_name}.retry.{attempt}"
+
+
+def _retry_delay(retry_delay: float, attempt: int) -> float:
+    return retry_delay * 2 ** (attempt - 1)
+
+
+def _dead_letter_queue(queue_name: str) -> str:
+    return f"{queue_name}.dlq"
+
+
+async def _declare_retry_queues(
+    channel, queue_name: str, max_retries: int, retry_delay: float
+) -> None:
+    """
+    По retry-очереди на попытку с x-message-ttl на всю очередь, плюс DLQ.
+    RabbitMQ истекает сообщения только с головы очереди, поэтому в общей
+    очереди с per-message TTL короткая задержка ждала бы самую длинную.
+    """
+    for attempt in range(1, max_retries + 1):
+        await channel.declare_queue(
+            _retry_queue(queue_name, attempt),
+            durable=True,
+            arguments={
+                "x-message-ttl": int(_retry_delay(retry_delay, attempt) * 1000),
+                "x-dead-letter-exchange": "",
+                "x-dead-letter-routing-key": queue_name,
+            },
+        )
+    await channel.declare_queue(_dead_letter_queue(queue_name), durable=True)
+
+
+async def _dead_letter(channel, message, queue_name: str, error: Exception) -> None:
+    await channel.default_exchange.publish(
+        aio_pika.Message(
+            body=message.body,
+            headers={**(message.headers or {}), "x-error": str(error)[:500]},
+            content_type=message.content_type,
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+        ),
+        routing_key=_dead_letter_queue(queue_name),
+    )
+    await message.ack()
+
+
+def _parse_user_created(message) -> OAuthProfileSyncRequest | None:
+    """None — сообщение без user_id, его просто подтверждаем."""
+    data = json.loads(message.body.decode())
+    user_id = data.get("user_id")
+    if not user_id:
+        logger.warning("[CONSUMER] Missing user_id in payload: %s", data)
+        return None
+
+    return OAuthProfileSyncRequest(
+        user_id=user_id,
+        email=data.get("email", ""),
+        username=data.get("username", ""),
+        first_name=data.get("first_name"),
+        last_name=data.get("last_name"),
+        patronymic=data.get("patronymic"),
+        full_name=data.get("full_name") or data.get("name"),
+        role=data.get("role"),
+        auth_provider=data.get("auth_provider"),
+    )
+
+
+async def _retry_or_dead_letter(
+    channel,
+    message,
+    queue_name: str,
+    max_retries: int,
+    retry_delay: float,
+    error: Exception,
+) -> None:
+    """
+    Вместо sleep в обработчике: сообщение уходит в retry-очередь своей попытки,
+    откуда по истечении TTL возвращается в queue_name; после max_retries — в DLQ.
+    """
+    attempt = int((message.headers or {}).get("x-retry-count", 0)) + 1
+    headers = {**(message.headers or {}), "x-retry-count": attempt, "x-error": str(error)[:500]}
+
+    if attempt > max_retries:
+        routing_key = _dead_letter_queue(queue_name)
+        logger.error(
+            "[CONSUMER] %s message moved to DLQ after %s attempts: %s",
+            queue_name,
+            attempt - 1,
+            error,
+        )
+    else:
+        routing_key = _retry_queue(queue_name, attempt)
+        logger.warning(
+            "[CONSUMER] %s message retry %s in %ss: %s",
+            queue_name,
+            attempt,
+            _retry_delay(retry_delay, attempt),
+            error,
+        )
+
+    await channel.default_exchange.publish(
+        aio_pika.Message(
+            body=message.body,
+            headers=headers,
+            content_type=message.content_type,
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+        ),
+        routing_key=routing_key,
+    )
+    await message.ack()
+
+
+async def _process_user_created_batch(channel, messages: list) -> None:
+    items, valid_messages = [], []
+    for message in messages:
+        try:
+            item = _parse_user_created(message)
+        except Exception as e:
+            # Битый JSON/схема не исправится повтором
+            logger.error("[CONSUMER] Invalid user.created payload: %s", e)
+            await _dead_letter(channel, message, USER_CREATED_QUEUE, e)
+            continue
+
+        if item is None:
+            await message.ack()
+            continue
+        items.append(item)
+        valid_messages.append(message)
+
+    if not items:
+        return
+
+    try:
+        async with async_session_maker() as session:  # type: ignore
+            upserted = await ProfileCRUD.upsert_oauth_profiles(session, items)
+        # Все более ранние доставки уже подтверждены, поэтому multiple=True
+        # подтверждает ровно эту пачку
+        await valid_messages[-1].ack(multiple=True)
+        logger.info(
+            "[CONSUMER] user.created batch: %s messages, %s profiles upserted",
+            len(messages),
+            upserted,
+        )
+        return
+    except Exception as e:
+        logger.error("[CONSUMER] user.created batch failed, retrying one by one: %s", e)
+
+    # Изолируем ядовитые сообщения: каждое отдельной транзакцией
+    for item, message in zip(items, valid_messages):
+        try:
+            async with async_session_maker() as session:  # type: ignore
+                await ProfileCRUD.upsert_oauth_profiles(session, [item])
+            await message.ack()
+        except Exception as e:
+            await _retry_or_dead_letter(
+                channel,
+                message,
+                USER_CREATED_QUEUE,
+                settings.USER_CREATED_MAX_RETRIES,
+                settings.USER_CREATED_RETRY_DELAY,
+                e,
+            )
+
+
 async def consume_user_created_events(rabbitmq_url: str):
+    """
+    Пакетный потребитель user.created: prefetch USER_CREATED_PREFETCH, пачки до
+    USER_CREATED_BATCH_SIZE сообщений или USER_CREATED_BATCH_WINDOW секунд,
+    одна транзакция и одно подтверждение на пачку.
+    """
     logger.info("[CONSUMER] Starting user.created consumer")
 
     try:
         connection = await aio_pika.connect_robust(rabbitmq_url)
         channel = await connection.channel()
+        await channel.set_qos(prefetch_count=settings.USER_CREATED_PREFETCH)
+
         exchange = await channel.declare_exchange(
             "user_events", type="direct", durable=True
         )
-        queue = await channel.declare_queue("user_profile_queue", durable=True)
+        queue = await channel.declare_queue(USER_CREATED_QUEUE, durable=True)
         await queue.bind(exchange, routing_key="user.created")
 
+        await _declare_retry_queues(
+            channel,
+            USER_CREATED_QUEUE,
+            settings.USER_CREATED_MAX_RETRIES,
+            settings.USER_CREATED_RETRY_DELAY,
+        )
+
+        # Доставки складываются в локальный буфер. Отмена wait_for(buffer.get())
+        # по таймауту окна безопасна, в отличие от отмены __anext__ итератора
+        # очереди, которая закрывает консьюмер.
+        buffer: asyncio.Queue = asyncio.Queue()
+        await queue.consume(buffer.put)
+
         logger.info("[CONSUMER] Waiting for user.created events")
 
-        async with queue.iterator() as queue_iter:
-            async for message in queue_iter:
-                max_retries = 3
-                retry_count = 0
-                processed = False
-
-                while retry_count < max_retries and not processed:
-                    try:
-                        data = json.loads(message.body.decode())
-                        logger.info("[CONSUMER] Processing user.created payload: %s", data)
-
-                        user_id = data.get("user_id")
-                        if not user_id:
-                            logger.warning("[CONSUMER] Missing user_id in payload: %s", data)
-                            await message.ack()
-                            processed = True
-                            continue
-
-                        async with async_session_maker() as session:  # type: ignore
-                            sync_result = await ProfileCRUD.sync_oauth_profile(
-                                db=session,
-                                sync_data=OAuthProfileSyncRequest(
-                                    user_id=user_id,
-                                    email=data.get("email", ""),
-                                    username=data.get("username", ""),
-                                    first_name=data.get("first_name"),
-                                    last_name=data.get("last_name"),
-                                    patronymic=data.get("patronymic"),
-                                    full_name=data.get("full_name") or data.get("name"),
-                                    role=data.get("role"),
-                                    auth_provider=data.get("auth_provider"),
-                                ),
-                            )
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await buffer.get()]
+            deadline = loop.time() + settings.USER_CREATED_BATCH_WINDOW
 
-                        logger.info(
-                            "[CONSUMER] Profile sync result for user_id=%s: %s",
-                            user_id,
-                            sync_result,
-                        )
-                        await message.ack()
-                        processed = True
-
-                    except Exception as e:
-                        retry_count += 1
-                        logger.error(
-                            "[CONSUMER] Error processing user.created (attempt %s/%s): %s",
-                            retry_count,
-                            max_retries,
-                            e,
-                            exc_info=True,
-                        )
+            while len(batch) < settings.USER_CREATED_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(buffer.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
 
-                        if retry_count < max_retries:
-                            await asyncio.sleep(retry_count * 2)
-                        else:
-                            await message.nack(requeue=False)
-                            processed = True
+            await _process_user_created_batch(channel, batch)
 
     except Exception as e:
         logger.error("[CONSUMER] Fatal error in user.created consumer: %s", e, exc_info=True)
@@ -201,6 +394,7 @@ async def consume_role_updated_events(rabbitmq_url: str):
                     if user:
                         user.Type = new_role_enum
                         await session.commit()
+                        await profile_cache.invalidate([user_id])
                         logger.info(
                             "[CONSUMER] Role updated for user_id=%s to %s",
                             user_id,
@@ -218,3 +412,69 @@ async def consume_role_updated_events(rabbitmq_url: str):
                     exc_info=True,
                 )
                 await message.nack(requeue=False)
+
+
+async def consume_team_membership_events(rabbitmq_url: str):
+    """
+    Ошибки обработки не теряют событие: оно уходит в retry-очередь с растущей
+    задержкой, после MEMBERSHIP_MAX_RETRIES — в DLQ. Устаревшее состояние,
+    доставленное после более нового, отбрасывает apply_membership_changes по seq.
+    """
+    connection = await aio_pika.connect_robust(rabbitmq_url)
+    channel = await connection.channel()
+
+    exchange = await channel.declare_exchange(
+        "team_events", type="direct", durable=True
+    )
+
+    queue = await channel.declare_queue(MEMBERSHIP_QUEUE, durable=True)
+
+    await queue.bind(exchange, routing_key="team.membership_changed")
+    await _declare_retry_queues(
+        channel,
+        MEMBERSHIP_QUEUE,
+        settings.MEMBERSHIP_MAX_RETRIES,
+        settings.MEMBERSHIP_RETRY_DELAY,
+    )
+
+    logger.info("[CONSUMER] Waiting for team.membership_changed events")
+
+    async with queue.iterator() as queue_iter:
+        async for message in queue_iter:
+            try:
+                data = json.loads(message.body.decode())
+                members = data.get("members") or []
+            except Exception as e:
+                logger.error("[CONSUMER] Invalid team.membership_changed payload: %s", e)
+                await _dead_letter(channel, message, MEMBERSHIP_QUEUE, e)
+                continue
+
+            try:
+                async with async_session_maker() as session:  # type: ignore
+                    updated, org_ids = await ProfileCRUD.apply_membership_changes(
+                        session, members
+                    )
+            except Exception as e:
+                logger.error(
+                    "[CONSUMER] Error processing team.membership_changed: %s",
+                    e,
+                    exc_info=True,
+                )
+                await _retry_or_dead_letter(
+                    channel,
+                    message,
+                    MEMBERSHIP_QUEUE,
+                    settings.MEMBERSHIP_MAX_RETRIES,
+                    settings.MEMBERSHIP_RETRY_DELAY,
+                    e,
+                )
+                continue
+
+            await publish_org_members_counts(connection, org_ids)
+
+            logger.info(
+                "[CONSUMER] Membership changes applied: %s received, %s profiles updated",
+                len(members),
+                updated,
+            )
+            await message.ack()
@@ -0,0 +1,83 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from cruds.profile_crud import ProfileCRUD
+from db.models.user import User
+from db.session import async_session_maker
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest_asyncio.fixture
+async def users(db_engine):
+    async with async_session_maker() as session:
+        session.add_all([User(id=user_id, is_learned=False) for user_id in (1, 2, 3)])
+        await session.commit()
+
+
+async def learned() -> dict[int, bool]:
+    async with async_session_maker() as session:
+        return dict((await session.execute(select(User.id, User.is_learned))).all())
+
+
+@pytest.mark.parametrize("is_learned", [1, "true", "false", 0])
+async def test_non_boolean_flag_is_rejected(users, is_learned):
+    async with async_session_maker() as session:
+        outcome = await ProfileCRUD.bulk_update_learning(
+            session, [{"user_id": 1, "is_learned": is_learned}]
+        )
+
+    assert outcome["updated"] == 0
+    assert outcome["errors"] == [
+        {"index": 0, "error": f"Invalid is_learned {is_learned!r}"}
+    ]
+    assert await learned() == {1: False, 2: False, 3: False}
+
+
+async def test_missing_flag_is_rejected(users):
+    async with async_session_maker() as session:
+        outcome = await ProfileCRUD.bulk_update_learning(
+            session, [{"user_id": 1, "is_learned": None}, {"user_id": 2}]
+        )
+
+    assert outcome["errors"] == [
+        {"index": 0, "error": "Missing user_id or is_learned"},
+        {"index": 1, "error": "Missing user_id or is_learned"},
+    ]
+    assert await learned() == {1: False, 2: False, 3: False}
+
+
+async def test_returning_reports_only_updated_rows(users):
+    async with async_session_maker() as session:
+        outcome = await ProfileCRUD.bulk_update_learning(
+            session,
+            [
+                {"user_id": 1, "is_learned": True},
+                {"user_id": 404, "is_learned": True},
+                {"user_id": 2, "is_learned": "yes"},
+                {"user_id": 3, "is_learned": False},
+                {"user_id": 1, "is_learned": True},
+            ],
+        )
+
+    assert outcome["received"] == 5
+    assert outcome["updated"] == 2
+    assert outcome["updated_ids"] == [1, 3]
+    assert outcome["errors"] == [
+        {"index": 1, "error": "User 404 not found"},
+        {"index": 2, "error": "Invalid is_learned 'yes'"},
+    ]
+    assert await learned() == {1: True, 2: False, 3: False}
+
+
+async def test_last_flag_wins_for_repeated_user(users):
+    async with async_session_maker() as session:
+        outcome = await ProfileCRUD.bulk_update_learning(
+            session,
+            [{"user_id": 2, "is_learned": True}, {"user_id": "2", "is_learned": False}],
+        )
+
+    assert outcome["updated_ids"] == [2]
+    assert outcome["errors"] == []
+    assert await learned() == {1: False, 2: False, 3: False}
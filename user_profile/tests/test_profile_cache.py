@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+
+from services.profile_cache import KEY_PREFIX
+
+pytestmark = pytest.mark.asyncio
+
+
+class Database:
+    """Таблица профилей; loader отдаёт снимок, сделанный до ожидания gate."""
+
+    def __init__(self, rows: dict[int, str]):
+        self.rows = dict(rows)
+        self.loads: list[list[int]] = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.loaded = asyncio.Event()
+
+    async def loader(self, user_ids):
+        self.loads.append(list(user_ids))
+        snapshot = {user_id: {"name": self.rows[user_id]} for user_id in user_ids}
+        self.loaded.set()
+        await self.gate.wait()
+        return snapshot
+
+
+async def test_invalidation_during_fill_is_not_overwritten(cache):
+    db = Database({1: "old", 2: "old"})
+    db.gate.clear()
+
+    read = asyncio.create_task(cache.get_many([1, 2], db.loader))
+    await db.loaded.wait()
+    db.rows[1] = "new"
+    await cache.invalidate([1])
+    db.gate.set()
+
+    # Читатель сам видит свой снимок, но в кэш он не попадает
+    assert await read == {1: {"name": "old"}, 2: {"name": "old"}}
+    assert await cache._redis.get(f"{KEY_PREFIX}1") is None
+    assert json.loads(await cache._redis.get(f"{KEY_PREFIX}2")) == {"name": "old"}
+    assert 1 not in cache._l1_get([1, 2])
+
+    assert await cache.get_many([1, 2], db.loader) == {
+        1: {"name": "new"},
+        2: {"name": "old"},
+    }
+    assert db.loads == [[1, 2], [1]]
+
+
+async def test_fill_after_invalidation_is_cached(cache):
+    db = Database({1: "old"})
+    await cache.get_many([1], db.loader)
+    db.rows[1] = "new"
+    await cache.invalidate([1])
+
+    assert await cache.get_many([1], db.loader) == {1: {"name": "new"}}
+    assert json.loads(await cache._redis.get(f"{KEY_PREFIX}1")) == {"name": "new"}
+    assert await cache.get_many([1], db.loader) == {1: {"name": "new"}}
+    assert db.loads == [[1], [1]]
+
+
+async def test_l1_epoch_rejects_fill_that_started_before_drop(cache):
+    # Без Redis остаётся только L1: защищает его эпоха, а не версии
+    cache._redis = None
+    db = Database({1: "old"})
+    db.gate.clear()
+
+    read = asyncio.create_task(cache.get_many([1], db.loader))
+    await db.loaded.wait()
+    db.rows[1] = "new"
+    # Так другой воркер сбрасывает L1 через pub/sub
+    cache._l1_drop([1])
+    db.gate.set()
+
+    assert await read == {1: {"name": "old"}}
+    assert cache._l1_get([1]) == {}
+    assert await cache.get_many([1], db.loader) == {1: {"name": "new"}}
+    assert cache._l1_get([1]) == {1: {"name": "new"}}
+
+
+async def test_l1_serves_repeat_reads(cache):
+    db = Database({1: "a", 2: "b"})
+    await cache.get_many([1, 2], db.loader)
+    await cache._redis.flushall()
+
+    assert await cache.get_many([2, 1], db.loader) == {
+        1: {"name": "a"},
+        2: {"name": "b"},
+    }
+    assert db.loads == [[1, 2]]
@@ -0,0 +1,141 @@
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from config import settings
+from cruds.profile_crud import ProfileCRUD
+from db.models.user import User
+from db.session import async_session_maker
+from schemas.user import OAuthProfileSyncRequest
+from services.rabbitmq import USER_CREATED_QUEUE, _process_user_created_batch
+
+pytestmark = pytest.mark.asyncio
+
+
+class Message:
+    """Доставка user.created; acks — аргумент multiple каждого ack()."""
+
+    def __init__(self, payload: dict, headers: dict | None = None):
+        self.body = json.dumps(payload).encode()
+        self.headers = headers
+        self.content_type = "application/json"
+        self.acks: list[bool] = []
+
+    async def ack(self, multiple: bool = False) -> None:
+        self.acks.append(multiple)
+
+
+class Channel:
+    """default_exchange.publish складывает (routing_key, message) в published."""
+
+    def __init__(self):
+        self.published: list[tuple[str, object]] = []
+        self.default_exchange = self
+
+    async def publish(self, message, routing_key: str) -> None:
+        self.published.append((routing_key, message))
+
+
+async def profiles() -> dict[int, tuple]:
+    async with async_session_maker() as session:
+        rows = await session.execute(
+            select(User.id, User.username, User.NameIRL, User.Surname).order_by(User.id)
+        )
+        return {row.id: tuple(row[1:]) for row in rows}
+
+
+async def test_duplicate_user_in_one_batch_is_merged_in_order(db_engine):
+    items = [
+        OAuthProfileSyncRequest(user_id=1, first_name="Иван", username="ivan"),
+        OAuthProfileSyncRequest(user_id=2, full_name="Пётр Петров"),
+        OAuthProfileSyncRequest(user_id=1, last_name="Иванов", username="other"),
+    ]
+    async with async_session_maker() as session:
+        assert await ProfileCRUD.upsert_oauth_profiles(session, items) == 2
+
+    assert await profiles() == {
+        1: ("ivan", "Иван", "Иванов"),
+        2: ("user2", "Пётр", "Петров"),
+    }
+
+
+async def test_batch_upsert_only_fills_existing_profile(db_engine):
+    async with async_session_maker() as session:
+        session.add(User(id=1, username="ivan", NameIRL="Иван", Surname=""))
+        await session.commit()
+
+        await ProfileCRUD.upsert_oauth_profiles(
+            session,
+            [
+                OAuthProfileSyncRequest(user_id=1, first_name="Другой", last_name="Иванов"),
+                OAuthProfileSyncRequest(user_id=1, last_name="Сидоров"),
+            ],
+        )
+
+    assert await profiles() == {1: ("ivan", "Иван", "Иванов")}
+
+
+async def test_consumer_applies_duplicate_user_in_one_batch(db_engine):
+    channel = Channel()
+    messages = [
+        Message({"user_id": 1, "first_name": "Иван"}),
+        Message({"user_id": 1, "last_name": "Иванов"}),
+        Message({"email": "no-id@example.com"}),
+    ]
+
+    await _process_user_created_batch(channel, messages)
+
+    assert await profiles() == {1: ("user1", "Иван", "Иванов")}
+    # Без user_id подтверждается сразу, пачка — одним ack(multiple=True)
+    assert [message.acks for message in messages] == [[], [True], [False]]
+    assert channel.published == []
+
+
+async def test_failed_flush_retries_one_by_one(db_engine):
+    channel = Channel()
+    # username длиннее String(100): пачка откатывается целиком
+    poison = Message({"user_id": 2, "username": "x" * 101})
+    messages = [
+        Message({"user_id": 1, "first_name": "Иван"}),
+        poison,
+        Message({"user_id": 3, "first_name": "Анна"}),
+    ]
+
+    await _process_user_created_batch(channel, messages)
+
+    assert await profiles() == {1: ("user1", "Иван", ""), 3: ("user3", "Анна", "")}
+    assert [message.acks for message in messages] == [[False], [False], [False]]
+    [(routing_key, retried)] = channel.published
+    assert routing_key == f"{USER_CREATED_QUEUE}.retry.1"
+    assert retried.headers["x-retry-count"] == 1
+    assert retried.body == poison.body
+
+    # Повторная доставка уже записанных пользователей ничего не дублирует
+    redelivered = [
+        Message({"user_id": 1, "first_name": "Иван"}, headers={"x-retry-count": 1}),
+        Message({"user_id": 3, "last_name": "Смирнова"}),
+    ]
+    await _process_user_created_batch(channel, redelivered)
+
+    assert await profiles() == {
+        1: ("user1", "Иван", ""),
+        3: ("user3", "Анна", "Смирнова"),
+    }
+    async with async_session_maker() as session:
+        assert await session.scalar(select(func.count()).select_from(User)) == 2
+    assert len(channel.published) == 1
+
+
+async def test_poison_message_moves_to_dlq_after_max_retries(db_engine, monkeypatch):
+    monkeypatch.setattr(settings, "USER_CREATED_MAX_RETRIES", 2)
+    channel = Channel()
+    poison = Message({"user_id": 2, "username": "x" * 101}, headers={"x-retry-count": 2})
+
+    await _process_user_created_batch(channel, [poison])
+
+    [(routing_key, dead)] = channel.published
+    assert routing_key == f"{USER_CREATED_QUEUE}.dlq"
+    assert dead.headers["x-retry-count"] == 3
+    assert poison.acks == [False]
+    assert await profiles() == {}